@@ -0,0 +1,146 @@
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Central sums below this are floating-point noise (same cut-off as pandas' nanskew)
+_FPERR = 1e-14
+
+
+class ColumnStats:
+    """
+    Count, null count, mean, 2nd/3rd central sums (M2, M3), min and max of numeric columns, held as arrays
+    aligned with `columns`. Computed column by column in one vectorized sweep (`from_frame`), merged exactly
+    across chunks (`merge`, the Chan/Pebay pairwise update) or derived from value counts of discrete columns
+    (`from_counts`). Imputation means, the skewness rule and scaler parameters are all read from it.
+    """
+
+    def __init__(self, columns: Sequence[str], count, nulls, mean, m2, m3, minimum, maximum):
+        self.columns = list(columns)
+        self.count = np.asarray(count, dtype=np.int64)
+        self.nulls = np.asarray(nulls, dtype=np.int64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.m2 = np.asarray(m2, dtype=np.float64)
+        self.m3 = np.asarray(m3, dtype=np.float64)
+        self.min = np.asarray(minimum, dtype=np.float64)
+        self.max = np.asarray(maximum, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> 'ColumnStats':
+        return cls([], [], [], [], [], [], [], [])
+
+    @staticmethod
+    def _column(values: np.ndarray):
+        missing = np.isnan(values)
+        n_null = int(missing.sum())
+        observed = values[~missing] if n_null else values
+        n = len(observed)
+        if n == 0:
+            return 0, n_null, np.nan, 0.0, 0.0, np.nan, np.nan
+        mean = observed.sum(dtype=np.float64) / n
+        d = observed - mean
+        d2 = d * d
+        return n, n_null, mean, d2.sum(dtype=np.float64), (d2 * d).sum(dtype=np.float64), observed.min(), observed.max()
+
+    @classmethod
+    def _block(cls, block: np.ndarray, columns: slice) -> list:
+        return [cls._column(block[:, i]) for i in range(block.shape[1])]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Iterable[str] = None, executor=None) -> 'ColumnStats':
+        """
+        Statistics of the given (numeric) columns of df, one column at a time to bound temporaries. A parallel
+        executor (utils.parallel.ColumnBlockExecutor) computes column blocks concurrently instead.
+        """
+        columns = list(df.columns) if columns is None else list(columns)
+        if executor is not None and executor.parallel and columns:
+            rows = sum(executor.map(cls._block, executor.matrix(df, columns, np.float64)), [])
+        else:
+            rows = [cls._column(df[col].to_numpy(dtype=np.float64, na_value=np.nan)) for col in columns]
+        return cls(columns, *zip(*rows)) if rows else cls.empty()
+
+    @classmethod
+    def from_counts(cls, distributions: Dict[str, Dict[float, int]]) -> 'ColumnStats':
+        """Exact statistics of discrete columns given as {column: {value: row count}} (encoded categoricals)."""
+        rows = []
+        for col, dist in distributions.items():
+            values = np.array(list(dist.keys()), dtype=np.float64)
+            counts = np.array(list(dist.values()), dtype=np.float64)
+            n = counts.sum()
+            mean = (values * counts).sum() / n
+            d = values - mean
+            rows.append((int(n), 0, mean, (counts * d ** 2).sum(), (counts * d ** 3).sum(), values.min(), values.max()))
+        return cls(list(distributions), *zip(*rows)) if rows else cls.empty()
+
+    def merge(self, other: 'ColumnStats') -> 'ColumnStats':
+        """Statistics of the union of the rows behind self and other (columns matched by name)."""
+        columns = self.columns + [c for c in other.columns if c not in self.columns]
+        mine, theirs = self.select(columns, missing_ok=True), other.select(columns, missing_ok=True)
+        na, nb = mine.count.astype(np.float64), theirs.count.astype(np.float64)
+        n = na + nb
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = np.where((na > 0) & (nb > 0), theirs.mean - mine.mean, 0.0)
+            mean = np.where(na == 0, theirs.mean, np.where(nb == 0, mine.mean, mine.mean + delta * nb / n))
+            m2 = mine.m2 + theirs.m2 + np.where(n > 0, delta ** 2 * na * nb / n, 0.0)
+            m3 = (mine.m3 + theirs.m3 + np.where(n > 0, delta ** 3 * na * nb * (na - nb) / n ** 2, 0.0)
+                  + np.where(n > 0, 3.0 * delta * (na * theirs.m2 - nb * mine.m2) / n, 0.0))
+        return ColumnStats(columns, n.astype(np.int64), mine.nulls + theirs.nulls, mean, m2, m3,
+                           np.fmin(mine.min, theirs.min), np.fmax(mine.max, theirs.max))
+
+    def select(self, columns: Sequence[str], missing_ok: bool = False) -> 'ColumnStats':
+        """Statistics of a subset/reordering of the columns; with missing_ok, unknown columns are empty."""
+        index = {c: i for i, c in enumerate(self.columns)}
+        if not missing_ok:
+            unknown = [c for c in columns if c not in index]
+            if unknown:
+                raise KeyError(f"No statistics for columns {unknown}")
+        pos = np.array([index.get(c, -1) for c in columns], dtype=np.int64)
+        have = pos >= 0
+
+        def pick(values, default):
+            out = np.full(len(columns), default, dtype=values.dtype if values.size else np.float64)
+            out[have] = values[pos[have]]
+            return out
+        return ColumnStats(columns, pick(self.count, 0), pick(self.nulls, 0), pick(self.mean, np.nan),
+                           pick(self.m2, 0.0), pick(self.m3, 0.0), pick(self.min, np.nan), pick(self.max, np.nan))
+
+    @classmethod
+    def concat(cls, parts: List['ColumnStats']) -> 'ColumnStats':
+        """Side-by-side statistics of disjoint column sets."""
+        parts = [p for p in parts if p.columns]
+        if not parts:
+            return cls.empty()
+        return cls(sum((p.columns for p in parts), []), *(np.concatenate([getattr(p, a) for p in parts])
+                   for a in ('count', 'nulls', 'mean', 'm2', 'm3', 'min', 'max')))
+
+    def imputed(self) -> 'ColumnStats':
+        """Statistics after filling nulls with the mean: the central sums are unchanged, nulls become counts."""
+        return ColumnStats(self.columns, self.count + self.nulls, np.zeros_like(self.nulls), self.mean,
+                           self.m2, self.m3, self.min, self.max)
+
+    def variance(self) -> np.ndarray:
+        """Population variance (ddof=0), as the scalers use."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self.m2 / self.count, np.nan)
+
+    def skew(self) -> np.ndarray:
+        """Bias-corrected sample skewness, computed exactly like DataFrame.skew from the central sums."""
+        n = self.count.astype(np.float64)
+        m2 = np.where(np.abs(self.m2) < _FPERR, 0.0, self.m2)
+        m3 = np.where(np.abs(self.m3) < _FPERR, 0.0, self.m3)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+        result = np.where(m2 == 0, 0.0, result)
+        return np.where(n < 3, np.nan, result)
+
+    def to_profile(self) -> Dict[str, dict]:
+        """JSON-ready per-column data profile for run metadata."""
+        def num(x):
+            return None if not np.isfinite(x) else float(x)
+        std = np.sqrt(self.variance())
+        skew = self.skew()
+        return {
+            col: {'count': int(self.count[i]), 'nulls': int(self.nulls[i]), 'mean': num(self.mean[i]),
+                  'std': num(std[i]), 'skew': num(skew[i]), 'min': num(self.min[i]), 'max': num(self.max[i])}
+            for i, col in enumerate(self.columns)
+        }
@@ -0,0 +1,142 @@
+import os
+import sys
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.encoding import stable_bucket
+
+
+def _missing_mask(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == 'f':
+        return np.isnan(values)
+    if values.dtype.kind == 'O':
+        # None, or NaN (the only value not equal to itself)
+        return np.equal(values, None) | (values != values)
+    return np.zeros(len(values), dtype=bool)
+
+
+class CompiledPreprocessor:
+    """
+    The fitted preprocessing (imputation, categorical encoding, scaling) folded into flat NumPy arrays for
+    low-latency scoring: `transform(batch)` maps raw columns to the preprocessed feature matrix with a few
+    vectorized array operations and no pandas/sklearn calls.
+
+    Layout: numeric inputs have a fill value and an output position; each categorical input has a sorted
+    string lookup table giving a category index (-1 = unseen), plus a per-category output value (label code
+    or frequency) or a base output position for one-hot / hash indicators. Scaling is one fused affine
+    `x * mult + add` over the output row.
+    """
+
+    def __init__(self, input_columns: List[str], output_columns: List[str], numeric: Dict[str, dict],
+                 categorical: Dict[str, dict], mult: np.ndarray, add: np.ndarray):
+        self.input_columns = list(input_columns)
+        self.output_columns = list(output_columns)
+        self.numeric = numeric
+        self.categorical = categorical
+        self.mult = mult
+        self.add = add
+
+    @classmethod
+    def from_fitted(cls, numeric_cols: Sequence[str], object_cols: Sequence[str], fill_values: Mapping,
+                    encoder, scaler, output_columns: Sequence[str], exclude: Sequence[str] = ()):
+        """
+        Compiles the artifacts fitted by preprocessing.run_pipeline. Columns in `exclude` (the target) are
+        neither required in the input nor produced in the output.
+        """
+        exclude = set(exclude)
+        output_columns = [c for c in output_columns if c not in exclude]
+        position = {name: i for i, name in enumerate(output_columns)}
+        numeric = {col: {'fill': float(fill_values[col]), 'out': position[col]}
+                   for col in numeric_cols if col not in exclude}
+        categorical = {}
+        for col in object_cols:
+            if col in exclude:
+                continue
+            plan = encoder.plans_[col]
+            keys = np.array([str(c) for c in plan['categories']])
+            order = np.argsort(keys, kind='stable')
+            spec = {
+                'kind': plan['kind'],
+                'keys': keys[order],
+                'index': order.astype(np.int64),
+                'fill_index': int(np.flatnonzero(plan['categories'] == fill_values[col])[0]),
+            }
+            names = encoder.output_columns(col)
+            if plan['kind'] == 'label':
+                spec['values'] = np.arange(len(keys), dtype=np.float64)
+                spec['unseen'] = -1.0
+                spec['out'] = position[col]
+            elif plan['kind'] == 'frequency':
+                spec['values'] = plan['frequencies'].astype(np.float64)
+                spec['unseen'] = 0.0
+                spec['out'] = position[col]
+            else:
+                spec['out'] = np.array([position[n] for n in names], dtype=np.int64)
+                if plan['kind'] == 'hash':
+                    spec['buckets'] = plan['buckets']
+                    spec['n_buckets'] = encoder.n_hash_features
+            categorical[col] = spec
+        mult = np.ones(len(output_columns), dtype=np.float64)
+        add = np.zeros(len(output_columns), dtype=np.float64)
+        if scaler is not None:
+            scaled = {name: i for i, name in enumerate(scaler.feature_names_in_)}
+            idx = np.array([scaled[c] for c in output_columns], dtype=np.int64)
+            if hasattr(scaler, 'data_min_'):
+                mult, add = scaler.scale_[idx].copy(), scaler.min_[idx].copy()
+            else:
+                mult = 1.0 / scaler.scale_[idx]
+                add = -scaler.mean_[idx] * mult
+        input_columns = [c for c in list(numeric_cols) + list(object_cols) if c not in exclude]
+        return cls(input_columns, output_columns, numeric, categorical, mult, add)
+
+    def _category_index(self, spec: dict, values: np.ndarray) -> np.ndarray:
+        keys = spec['keys']
+        missing = _missing_mask(values)
+        strings = values.astype(str)
+        pos = np.minimum(np.searchsorted(keys, strings), len(keys) - 1)
+        found = keys[pos] == strings
+        index = np.where(found, spec['index'][pos], -1)
+        index[missing] = spec['fill_index']
+        return index
+
+    def _columns(self, batch) -> Dict[str, np.ndarray]:
+        if isinstance(batch, np.ndarray):
+            if batch.ndim != 2 or batch.shape[1] != len(self.input_columns):
+                raise ValueError(f"Expected a 2-D array with columns {self.input_columns}, got shape {batch.shape}.")
+            return {col: batch[:, i] for i, col in enumerate(self.input_columns)}
+        missing = [c for c in self.input_columns if c not in batch]
+        if missing:
+            raise KeyError(f"Batch is missing input columns: {missing}")
+        return {col: np.asarray(batch[col]) for col in self.input_columns}
+
+    def transform(self, batch) -> np.ndarray:
+        """
+        batch: mapping of input column -> 1-D array (e.g. a dict of lists, or a DataFrame), or a 2-D array
+        in `input_columns` order. Returns a float64 matrix in `output_columns` order.
+        """
+        columns = self._columns(batch)
+        n = len(next(iter(columns.values()))) if columns else 0
+        out = np.zeros((n, len(self.output_columns)), dtype=np.float64)
+        rows = np.arange(n)
+        for col, spec in self.numeric.items():
+            values = columns[col].astype(np.float64)
+            out[:, spec['out']] = np.where(np.isnan(values), spec['fill'], values)
+        for col, spec in self.categorical.items():
+            index = self._category_index(spec, columns[col])
+            known = index >= 0
+            if spec['kind'] in ('label', 'frequency'):
+                out[:, spec['out']] = np.where(known, spec['values'][np.maximum(index, 0)], spec['unseen'])
+            elif spec['kind'] == 'onehot':
+                out[rows[known], spec['out'][index[known]]] = 1.0
+            else:
+                buckets = np.empty(n, dtype=np.int64)
+                buckets[known] = spec['buckets'][index[known]]
+                # Unseen categories are hashed on the fly, exactly like CategoricalEncoder does
+                for i in np.flatnonzero(~known):
+                    buckets[i] = stable_bucket(columns[col][i], spec['n_buckets'])
+                out[rows, spec['out'][buckets]] = 1.0
+        out *= self.mult
+        out += self.add
+        return out
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+ENCODING_KINDS = ('label', 'onehot', 'frequency', 'hash')
+HIGH_CARDINALITY_STRATEGIES = ('frequency', 'hash')
+INDICATOR_DTYPE = np.uint8
+
+
+def stable_bucket(value, n_buckets: int) -> int:
+    """Hash bucket of a category that is identical across processes and Python versions (unlike hash())."""
+    digest = hashlib.md5(str(value).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little') % n_buckets
+
+
+class CategoricalEncoder:
+    """
+    Cardinality-aware encoder for all categorical columns of a frame, fitted in one pass over their value counts.
+
+    Per column: 2 or fewer categories -> label codes (in place); up to `max_onehot` -> one-hot indicator columns
+    `<col>__<category>` appended at the end; above that -> `high_cardinality` encoding, either 'frequency'
+    (share of rows holding the category, in place) or 'hash' (`n_hash_features` indicator columns
+    `<col>__hash<i>` appended at the end, unseen categories included). The fitted state is a few NumPy arrays
+    per column (sorted categories, their counts, hash buckets), so the pickled artifact stays small and every
+    transform is a vectorized category lookup.
+    """
+
+    def __init__(self, max_onehot: int = 50, high_cardinality: str = 'frequency', n_hash_features: int = 32):
+        if high_cardinality not in HIGH_CARDINALITY_STRATEGIES:
+            raise ValueError(f"high_cardinality must be one of {HIGH_CARDINALITY_STRATEGIES}, got '{high_cardinality}'.")
+        self.max_onehot = max_onehot
+        self.high_cardinality = high_cardinality
+        self.n_hash_features = n_hash_features
+        self.plans_: Dict[str, dict] = {}
+        self.n_rows_ = 0
+
+    def fit(self, df: pd.DataFrame, columns: List[str] = None) -> 'CategoricalEncoder':
+        columns = list(columns) if columns is not None else [c for c in df.columns if pd.api.types.is_object_dtype(df[c])]
+        counts = {col: Counter(df[col].value_counts(dropna=True).to_dict()) for col in columns}
+        return self.fit_counts(counts, len(df))
+
+    def fit_counts(self, counts: Dict[str, Counter], n_rows: int) -> 'CategoricalEncoder':
+        """Fits from per-column value counts, e.g. accumulated over chunks of a file too large to load."""
+        self.plans_ = {}
+        self.n_rows_ = int(n_rows)
+        for col, col_counts in counts.items():
+            categories = np.array(sorted(col_counts), dtype=object)
+            plan = {
+                'categories': categories,
+                'counts': np.array([col_counts[c] for c in categories], dtype=np.int64),
+            }
+            if len(categories) <= 2:
+                plan['kind'] = 'label'
+            elif len(categories) <= self.max_onehot:
+                plan['kind'] = 'onehot'
+            else:
+                plan['kind'] = self.high_cardinality
+            if plan['kind'] == 'frequency':
+                plan['frequencies'] = plan['counts'] / max(self.n_rows_, 1)
+            elif plan['kind'] == 'hash':
+                plan['buckets'] = np.array([stable_bucket(c, self.n_hash_features) for c in categories], dtype=np.int64)
+            self.plans_[col] = plan
+            logging.info(f"Encoding column {col} ({len(categories)} categories) as {plan['kind']}")
+        return self
+
+    def output_columns(self, col: str) -> List[str]:
+        """Names of the columns that encode `col`."""
+        plan = self.plans_[col]
+        if plan['kind'] == 'onehot':
+            return [f"{col}__{cat}" for cat in plan['categories']]
+        if plan['kind'] == 'hash':
+            return [f"{col}__hash{i}" for i in range(self.n_hash_features)]
+        return [col]
+
+    def codes(self, values, col: str) -> np.ndarray:
+        """Index of each value in the column's sorted categories; -1 for missing or unseen values."""
+        return pd.Categorical(values, categories=self.plans_[col]['categories']).codes.astype(np.int64)
+
+    def _indices(self, values, col: str):
+        """(row positions, indicator column) of the non-zero entries of a one-hot or hash block."""
+        plan = self.plans_[col]
+        if plan['kind'] == 'onehot':
+            codes = self.codes(values, col)
+            rows = np.flatnonzero(codes >= 0)
+            return rows, codes[rows]
+        values = pd.Series(values)
+        uniques = pd.unique(values.dropna())
+        lookup = pd.Series([stable_bucket(v, self.n_hash_features) for v in uniques], index=uniques, dtype=np.int64)
+        buckets = values.map(lookup).to_numpy()
+        rows = np.flatnonzero(~pd.isna(buckets))
+        return rows, buckets[rows].astype(np.int64)
+
+    def _single_column(self, values, col: str) -> np.ndarray:
+        plan = self.plans_[col]
+        codes = self.codes(values, col)
+        if plan['kind'] == 'label':
+            return codes
+        return np.where(codes >= 0, plan['frequencies'][np.maximum(codes, 0)], 0.0)
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Dense frame output matching the fitted layout: label/frequency columns replaced in place, one-hot and
+        hash blocks appended at the end in column order as uint8 indicators, with a single concat for all blocks.
+        """
+        blocks, expanded = [], []
+        for col, plan in self.plans_.items():
+            if plan['kind'] in ('label', 'frequency'):
+                df[col] = self._single_column(df[col], col)
+                continue
+            labels = self.output_columns(col)
+            rows, cols = self._indices(df[col], col)
+            block = np.zeros((len(df), len(labels)), dtype=INDICATOR_DTYPE)
+            block[rows, cols] = 1
+            blocks.append(pd.DataFrame(block, columns=labels, index=df.index))
+            expanded.append(col)
+        if expanded:
+            df = pd.concat([df.drop(columns=expanded)] + blocks, axis=1)
+        return df
+
+    def transform_sparse(self, df: pd.DataFrame):
+        """
+        CSR matrix of every encoded column (in plan order, see `feature_names`) for model code that accepts
+        sparse input; one-hot and hash blocks never materialize densely.
+        """
+        n = len(df)
+        parts = []
+        for col, plan in self.plans_.items():
+            if plan['kind'] in ('label', 'frequency'):
+                parts.append(sparse.csr_matrix(self._single_column(df[col], col).astype(np.float64).reshape(-1, 1)))
+                continue
+            rows, cols = self._indices(df[col], col)
+            parts.append(sparse.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                                           shape=(n, len(self.output_columns(col)))))
+        return sparse.hstack(parts, format='csr') if parts else sparse.csr_matrix((n, 0))
+
+    def transform_codes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Compact int32 category codes per column (-1 = missing/unseen), e.g. for native categorical support."""
+        return pd.DataFrame({col: self.codes(df[col], col).astype(np.int32) for col in self.plans_}, index=df.index)
+
+    def feature_names(self) -> List[str]:
+        return [name for col in self.plans_ for name in self.output_columns(col)]
+
+    def output_distributions(self) -> Dict[str, Dict[float, int]]:
+        """
+        Value -> row count of every encoded column over the fitted data, so exact moments (skewness, scaling)
+        of the encoded frame can be derived without materializing it.
+        """
+        result = {}
+        n = self.n_rows_
+        for col, plan in self.plans_.items():
+            counts = plan['counts']
+            if plan['kind'] == 'label':
+                result[col] = {float(i): int(c) for i, c in enumerate(counts)}
+            elif plan['kind'] == 'frequency':
+                dist = Counter()
+                for freq, c in zip(plan['frequencies'], counts):
+                    dist[float(freq)] += int(c)
+                result[col] = dict(dist)
+            else:
+                totals = counts if plan['kind'] == 'onehot' else \
+                    np.bincount(plan['buckets'], weights=counts, minlength=self.n_hash_features).astype(np.int64)
+                for name, c in zip(self.output_columns(col), totals):
+                    result[name] = {1.0: int(c), 0.0: n - int(c)}
+        return {k: {v: c for v, c in dist.items() if c > 0} for k, dist in result.items()}
@@ -12,18 +12,41 @@ from sklearn.feature_selection import mutual_info_classif, mutual_info_regressio
 from sklearn.model_selection import train_test_split
 import warnings
 
-# Import secure_file_permissions and get_git_commit from preprocessing context
-# If not available as modules, define basic versions here based on context
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.artifact_io import REDACTED, ArtifactWriter, read_frame, secure_file_permissions, write_frame
+from utils.dtypes import compact_dtypes, feature_dtype, flag_dtype, DTYPE_POLICIES
+from utils.parallel import ColumnBlockExecutor, PARALLEL_BACKENDS
+from data.rolling import ROLLING_FUNCS, rolling_aggregate, expanding_aggregate, time_window_starts, window_blocks
+from data.incremental import FullRecomputeRequired, PartitionTail
+from data.feature_plan import STAT_FUNCS, FeaturePlan, rolling_groups
+from data.feature_selection import MI_METHODS, histogram_mutual_info, prune_correlated
 
-def secure_file_permissions(filepath):
+def _artifact_written(message):
+    """Callback for a written artifact: owner-only permissions, then message logged."""
+    def written(path):
+        secure_file_permissions(path)
+        logging.info(message)
+    return written
+
+def save_frame(df, path, message, csv_export=False, writer=None, fmt=None):
     """
-    Restricts file permissions to owner read/write only (POSIX). Logs a warning on failure.
+    Writes df to path (see write_frame) readable by the owner only and logs message; queued on writer (an
+    ArtifactWriter, which also redacts) when given.
     """
-    try:
-        os.chmod(filepath, 0o600)
-        logging.info(f"Restricted permissions for {filepath} to owner read/write only.")
-    except Exception as e:
-        logging.warning(f"Could not set secure file permissions for {filepath}: {e}")
+    if writer is None:
+        write_frame(df, path, fmt, csv_export=csv_export)
+        _artifact_written(message)(path)
+    else:
+        writer.write_frame(df, path, fmt, csv_export=csv_export, then=_artifact_written(message))
+
+def save_json(obj, path, message, writer=None):
+    """save_frame for JSON documents."""
+    if writer is None:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2)
+        _artifact_written(message)(path)
+    else:
+        writer.write_json(obj, path, then=_artifact_written(message))
 
 def get_git_commit():
     """
@@ -63,74 +86,376 @@ def deduplicate_columns(df):
     """
     Removes duplicated columns from the DataFrame, retaining the first occurrence.
     """
+    duplicated = df.columns.duplicated()
+    if not duplicated.any():
+        return df  # avoid copying the whole frame when there is nothing to drop
     before = df.shape[1]
-    df = df.loc[:, ~df.columns.duplicated()]
+    df = df.loc[:, ~duplicated]
     after = df.shape[1]
     if after < before:
         logging.info(f"Deduplicated columns. {before-after} duplicate columns removed.")
     return df
 
-def create_rolling_features(df, cols, windows, agg_funcs, log_new_features=True, feature_log=None):
+DEFAULT_ROLLING_WINDOWS = '5,15,30'
+FEATURE_STATE_VERSION = 1
+
+def window_spec(window):
+    """
+    Kernel form of one rolling window: a row count (int, or a digit string such as '30') or a positive
+    duration ('5min', '1h', '24h', anything pd.Timedelta parses) as np.timedelta64.
+    """
+    if isinstance(window, str) and window.strip().isdigit():
+        window = int(window)
+    if isinstance(window, (int, np.integer)):
+        if window < 1:
+            raise ValueError(f"Rolling window must cover at least one row, got {window}.")
+        return int(window)
+    try:
+        duration = pd.Timedelta(window)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid rolling window '{window}': expected a row count or a duration such as '5min'.")
+    if duration <= pd.Timedelta(0):
+        raise ValueError(f"Rolling window duration must be positive, got '{window}'.")
+    return duration.to_timedelta64()
+
+def parse_rolling_windows(spec):
+    """Comma-separated CLI windows ('5,15,30', '5min,1h,24h', or mixed): row counts become ints, durations stay strings."""
+    windows = [w.strip() for w in spec.split(',') if w.strip()]
+    for w in windows:
+        window_spec(w)
+    return [int(w) if w.isdigit() else w for w in windows]
+
+def timestamp_values(df, col='timestamp'):
+    """
+    df[col] as datetime64[ns] values for time-based windows (text timestamps are parsed); raises ValueError
+    when the column is missing, numeric (e.g. encoded by preprocessing) or has missing/unparseable entries.
+    """
+    if col not in df.columns:
+        raise ValueError(f"Time-based rolling windows need a '{col}' column.")
+    series = df[col]
+    if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            raise ValueError(f"'{col}' is numeric ({series.dtype}); pass it through preprocessing unencoded "
+                             f"to use time-based windows.")
+        series = pd.to_datetime(series.astype(object))
+    if series.isna().any():
+        raise ValueError(f"'{col}' has {int(series.isna().sum())} missing values; time-based windows need all of them.")
+    return series.to_numpy(dtype='datetime64[ns]')
+
+def _window_block(block, out, columns, windows, funcs, times=None, shift=None, offset=0, window_block=None,
+                  carry=None, block_windows=None):
+    """
+    Kernel for one column block: len(windows) * len(funcs) outputs per column into out (windows=None: expanding).
+    shift, offset, window_block and carry continue a partition from its tail (see data.incremental); block_windows
+    sizes the duration block when windows is a subset of them.
+    """
+    if windows is not None and times is not None:
+        windows = [w if isinstance(w, int) else time_window_starts(times, w) for w in windows]
+        if block_windows and window_block is None:
+            window_block = window_blocks([time_window_starts(times, w) for w in block_windows])
+    n_outputs = len(funcs) * (len(windows) if windows else 1)
+    # float64 outputs are written in place; narrower ones go through one float64 scratch block
+    scratch = None if out.dtype == np.float64 else np.empty((block.shape[0], n_outputs), dtype=np.float64, order='F')
+    for j in range(block.shape[1]):
+        column_shift = None if shift is None else shift[j]
+        target = out[:, j * n_outputs:(j + 1) * n_outputs] if scratch is None else scratch
+        if windows is None:
+            expanding_aggregate(block[:, j], funcs, target, shift=column_shift,
+                                carry=None if carry is None else carry[j])
+        else:
+            rolling_aggregate(block[:, j], windows, funcs, target, shift=column_shift, offset=offset,
+                              block=window_block)
+        for k, func in enumerate(funcs * (len(windows) if windows else 1)):
+            if func == 'std':
+                target[:, k][np.isnan(target[:, k])] = 0.0
+        if scratch is not None:
+            out[:, j * n_outputs:(j + 1) * n_outputs] = scratch
+
+def row_partitions(df, group_col):
+    """
+    (order, bounds) partitioning df's rows by group_col: order lists row positions group by group, keeping
+    the frame's (time) order within each group, and bounds delimits the groups in that order. Rows with a
+    missing group value form a group of their own.
+    """
+    codes, _ = pd.factorize(df[group_col])
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    return order, np.concatenate(([0], bounds, [len(df)]))
+
+def _add_window_features(df, cols, names, windows, funcs, dtype, executor, partitions=None, times=None,
+                         blocks=None, block_windows=None):
+    """
+    Computes the window features of cols and adds the ones not already there (see _add_block): block-parallel
+    over columns, or, given partitions (see row_partitions), within each partition and parallel across them.
+    times (datetime64, in df's row order) places the duration windows (see _window_block for block_windows).
+    """
+    executor = executor or ColumnBlockExecutor()
+    n_outputs = len(names) // max(len(cols), 1)
+    if partitions is None:
+        times = None if times is None else executor.vector(times)
+        values = executor.transform(_window_block, executor.matrix(df, cols), n_outputs=n_outputs, dtype=dtype,
+                                    windows=windows, funcs=funcs, times=times, block_windows=block_windows)
+    else:
+        order, bounds = partitions
+        row_kwargs = {} if times is None else {'times': executor.vector(times, rows=order)}
+        values = executor.transform_partitions(_window_block, executor.matrix(df, cols, rows=order), bounds,
+                                               n_outputs=n_outputs, dtype=dtype, row_kwargs=row_kwargs,
+                                               windows=windows, funcs=funcs, block_windows=block_windows)
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        values = values[inverse]  # back to the frame's row order
+    if isinstance(values, np.memmap):
+        values = np.array(values, order='F')  # the executor's shared buffers go when it closes
+    return _add_block(df, names, values, blocks)
+
+class FeatureBlocks:
+    """
+    Engineered columns collected as 2-D blocks in their final dtypes and joined to the frame by one concat.
+    Names already present (or not in `keep`) are skipped.
+    """
+
+    def __init__(self, df, keep=None):
+        self.df = df
+        self.taken = set(df.columns)
+        self.keep = None if keep is None else set(keep)
+        self.blocks = []
+
+    def add(self, names, values):
+        """Adds the columns of the (n_rows, len(names)) array values; returns the names actually added."""
+        keep = []
+        for i, name in enumerate(names):
+            if name not in self.taken and (self.keep is None or name in self.keep):
+                self.taken.add(name)
+                keep.append(i)
+        if keep:
+            block = values if len(keep) == len(names) else values[:, keep]
+            self.blocks.append(([names[i] for i in keep], block))
+        return [names[i] for i in keep]
+
+    def frame(self):
+        """The input frame followed by the added blocks, in the order added."""
+        if not self.blocks:
+            return self.df
+        new = [pd.DataFrame(values, columns=names, index=self.df.index, copy=False) for names, values in self.blocks]
+        # copy=False would consolidate same-dtype blocks into new arrays instead (two copies at the peak)
+        return pd.concat([self.df] + new, axis=1)
+
+def _add_block(df, names, values, blocks=None):
+    """
+    Adds the columns to blocks, leaving df as it is, or without blocks appends them to df with one concat;
+    either way names already present are skipped. Returns df and the names added.
+    """
+    if blocks is not None:
+        return df, blocks.add(names, values)
+    blocks = FeatureBlocks(df)
+    added = blocks.add(names, values)
+    return blocks.frame(), added
+
+def create_rolling_features(df, cols, windows, agg_funcs, log_new_features=True, feature_log=None, dtype=np.float64,
+                            executor=None, partitions=None, times=None, blocks=None, block_windows=None):
+    """
+    Rolling `agg_funcs` (mean/std/min/max) over each window, a row count or a duration (see window_spec) over
+    `times`, for every column in cols, within partitions if given; executor spreads the columns over its workers.
+    block_windows lists all configured windows when `windows` is a part of them.
+    """
+    funcs = [f for f in agg_funcs if f in ROLLING_FUNCS]
+    names = [f'{col}_roll{w}_{func}' for col in cols for w in windows for func in funcs]
+    specs = [window_spec(w) for w in windows]
+    if times is None and any(not isinstance(w, int) for w in specs):
+        raise ValueError("Time-based rolling windows need the row timestamps (times).")
+    durations = [s for s in map(window_spec, block_windows or []) if not isinstance(s, int)]
     new_features = []
-    for col in cols:
-        for w in windows:
-            roll = df[col].rolling(window=w, min_periods=1)
-            for func in agg_funcs:
-                feature_name = f'{col}_roll{w}_{func}'
-                if feature_name in df.columns:
-                    continue  # Avoid duplication
-                if func == 'mean':
-                    df[feature_name] = roll.mean()
-                elif func == 'std':
-                    df[feature_name] = roll.std().fillna(0)
-                elif func == 'min':
-                    df[feature_name] = roll.min()
-                elif func == 'max':
-                    df[feature_name] = roll.max()
-                else:
-                    continue
-                new_features.append(feature_name)
+    if names:
+        df, new_features = _add_window_features(df, cols, names, specs, funcs, dtype, executor, partitions, times,
+                                                blocks, durations)
     if log_new_features and feature_log is not None:
         feature_log.extend(new_features)
         logging.info(f"Rolling features generated: {new_features}")
     return df
 
-def create_stat_aggregations(df, cols, log_new_features=True, feature_log=None):
+def create_stat_aggregations(df, cols, log_new_features=True, feature_log=None, dtype=np.float64, executor=None,
+                             partitions=None, blocks=None):
+    """
+    Expanding mean/max/min/std of every column in cols, parallel over executor and restarted in every
+    partition like the rolling features (and collected in blocks like them).
+    """
+    names = [f'{col}_{stat}' for col in cols for stat in STAT_FUNCS]
     new_features = []
-    for col in cols:
-        for stat, fn in [('mean', 'mean'), ('max', 'max'), ('min', 'min'), ('std', 'std')]:
-            name = f'{col}_{stat}'
-            if name in df.columns:
-                continue  # Avoid duplication
-            if stat == 'std':
-                df[name] = df[col].expanding().std().fillna(0)
-            else:
-                df[name] = getattr(df[col].expanding(), fn)()
-            new_features.append(name)
+    if names:
+        df, new_features = _add_window_features(df, cols, names, None, list(STAT_FUNCS), dtype, executor, partitions,
+                                                blocks=blocks)
     if log_new_features and feature_log is not None:
         feature_log.extend(new_features)
         logging.info(f"Stat aggregations generated: {new_features}")
     return df
 
-def create_condition_encoding(df, sensor_cols, thresh_dict, log_new_features=True, feature_log=None):
-    new_features = []
+def _partition_rows(df, group_col):
+    """(group value, row positions) of every partition, in row_partitions order; (None, all rows) without group_col."""
+    if group_col is None:
+        return [(None, np.arange(len(df)))]
+    if not len(df):
+        return []
+    order, bounds = row_partitions(df, group_col)
+    keys = df[group_col].to_numpy(dtype=object)[order[bounds[:-1]]]
+    return [(None if pd.isna(key) else key, order[a:b]) for key, a, b in zip(keys, bounds[:-1], bounds[1:])]
+
+def partition_tails(df, cols, windows, group_col=None, times=None):
+    """PartitionTail of every partition of df, keyed by group value, as left by computing df's window features."""
+    specs = [window_spec(w) for w in windows]
+    values = df[cols].to_numpy(dtype=np.float64)
+    tails = {}
+    for key, rows in _partition_rows(df, group_col):
+        tails[key] = PartitionTail(len(cols), times is not None)
+        tails[key].advance(values[rows], None if times is None else times[rows], specs)
+    return tails
+
+def append_window_features(df, cols, windows, agg_funcs, tails, log_new_features=True, feature_log=None,
+                           dtype=np.float64, group_col=None, times=None, blocks=None):
+    """
+    Rolling and expanding features of rows appended to a stored table, each partition continued from its tail.
+    Raises FullRecomputeRequired (before changing anything) when a window needs rows beyond the tails.
+    """
+    funcs = [f for f in agg_funcs if f in ROLLING_FUNCS]
+    specs = [window_spec(w) for w in windows]
+    values = df[cols].to_numpy(dtype=np.float64)
+    rolling = np.empty((len(df), len(cols) * len(specs) * len(funcs)), dtype=dtype)
+    stats = np.empty((len(df), len(cols) * len(STAT_FUNCS)), dtype=dtype)
+    columns = slice(0, len(cols))
+    steps = []
+    for key, rows in _partition_rows(df, group_col):
+        tail = tails.get(key) or PartitionTail(len(cols), times is not None)
+        part, part_times = values[rows], None if times is None else times[rows]
+        context = tail.context(part, part_times, specs)
+        if rolling.shape[1]:
+            out = np.empty((len(context['matrix']), rolling.shape[1]))
+            _window_block(context['matrix'], out, columns, context['windows'], funcs, shift=context['shift'],
+                          offset=context['offset'], window_block=context['window_block'])
+            rolling[rows] = out[context['tail_rows']:]
+        out = np.empty((len(rows), stats.shape[1]))
+        _window_block(part, out, columns, None, list(STAT_FUNCS), shift=context['shift'], carry=tail.carry)
+        stats[rows] = out
+        steps.append((key, tail, part, part_times, context))
+    for key, tail, part, part_times, context in steps:
+        tail.advance(part, part_times, specs, context)
+        tails[key] = tail
+    df, rolling_features = _add_block(
+        df, [f'{col}_roll{w}_{func}' for col in cols for w in windows for func in funcs], rolling, blocks)
+    df, stat_features = _add_block(df, [f'{col}_{stat}' for col in cols for stat in STAT_FUNCS], stats, blocks)
+    if log_new_features and feature_log is not None:
+        feature_log.extend(rolling_features + stat_features)
+        logging.info(f"Rolling features generated: {rolling_features}")
+        logging.info(f"Stat aggregations generated: {stat_features}")
+    return df
+
+def create_condition_encoding(df, sensor_cols, thresh_dict, log_new_features=True, feature_log=None, dtype=np.int64,
+                              blocks=None):
+    """
+    {col}_high / {col}_low flags (value above / below thresh_dict[col]) for the sensor_cols listed in
+    thresh_dict, filled into one preallocated block and added like the window features (see _add_block).
+    """
     # Only condition encode columns explicitly listed in thresh_dict
-    for col in sensor_cols:
-        if col in thresh_dict:
-            threshold = thresh_dict[col]
-            high_name = f'{col}_high'
-            low_name = f'{col}_low'
-            if high_name not in df.columns:
-                df[high_name] = (df[col] > threshold).astype(int)
-                new_features.append(high_name)
-            if low_name not in df.columns:
-                df[low_name] = (df[col] < threshold).astype(int)
-                new_features.append(low_name)
+    encoded = [col for col in sensor_cols if col in thresh_dict]
+    names = [f'{col}_{side}' for col in encoded for side in ('high', 'low')]
+    flags = np.empty((len(df), len(names)), dtype=dtype, order='F')
+    for k, col in enumerate(encoded):
+        values, threshold = df[col], thresh_dict[col]
+        flags[:, 2 * k] = (values > threshold).to_numpy()
+        flags[:, 2 * k + 1] = (values < threshold).to_numpy()
+    df, new_features = _add_block(df, names, flags, blocks)
     if log_new_features and feature_log is not None:
         feature_log.extend(new_features)
         logging.info(f"Condition encoding generated: {new_features}")
     return df
 
+def materialize_features(df, plan, names=None, dtype_policy='compact', executor=None, partitions=None, times=None,
+                         feature_log=None):
+    """df followed by the features `names` of plan (all by default), computing only what they need."""
+    specs = plan.specs if names is None else plan.resolve(names)
+    wanted = {s.name for s in specs}
+    specs = [s for s in plan.specs if s.name in wanted]
+    blocks = FeatureBlocks(df, keep=wanted)
+    dtype = feature_dtype(dtype_policy)
+    for cols, windows, funcs in rolling_groups(specs):
+        partial = len(windows) < len(plan.windows)
+        create_rolling_features(df, cols, windows, funcs, feature_log=feature_log, dtype=dtype, executor=executor,
+                                partitions=partitions, times=times, blocks=blocks,
+                                block_windows=plan.windows if partial else None)
+    stat_cols = list(dict.fromkeys(s.column for s in specs if s.kind == 'stat'))
+    create_stat_aggregations(df, stat_cols, feature_log=feature_log, dtype=dtype, executor=executor,
+                             partitions=partitions, blocks=blocks)
+    flag_cols = list(dict.fromkeys(s.column for s in specs if s.kind == 'flag'))
+    create_condition_encoding(df, flag_cols, plan.condition_thresholds, feature_log=feature_log,
+                              dtype=flag_dtype(dtype_policy), blocks=blocks)
+    out = blocks.frame()
+    order = list(df.columns) + [s.name for s in specs]
+    return out if list(out.columns) == order else out[order]
+
+def selection_sample(df, n_rows, group_col=None, n_segments=4, seed=42):
+    """
+    Rows and partition bounds of a sample of about n_rows rows to score candidate features on: whole groups
+    with group_col, otherwise n_segments runs of consecutive rows.
+    """
+    if group_col is not None:
+        order, bounds = row_partitions(df, group_col)
+        sizes = np.diff(bounds)
+        drawn = np.random.default_rng(seed).permutation(len(sizes))
+        drawn = drawn[:np.searchsorted(np.cumsum(sizes[drawn]), n_rows) + 1]
+        return np.sort(np.concatenate([order[bounds[g]:bounds[g + 1]] for g in drawn])), None
+    length = max(n_rows // n_segments, 1)
+    starts = np.linspace(0, len(df) - length, n_segments).astype(np.int64)
+    rows = (starts[:, None] + np.arange(length)).ravel()
+    return rows, np.arange(n_segments + 1) * length
+
+def save_feature_plan(plan, path, writer=None):
+    """Writes the feature plan (see data.feature_plan) as JSON, readable by the owner only."""
+    save_json(plan.to_dict(), path, f"Feature plan saved to {path}", writer)
+
+def save_feature_state(state, path, writer=None):
+    """Persists the incremental feature state (see engineer_features(state_path=...)) with joblib."""
+    import joblib
+    if writer is not None:
+        writer.submit(save_feature_state, state, path)
+        return
+    joblib.dump(state, path)
+    secure_file_permissions(path)
+    logging.info(f"Feature state saved to {path}")
+
+def check_appendable(state, config, df, stored):
+    """
+    Raises FullRecomputeRequired unless df's rows can be appended to the stored feature table described by
+    state: same feature configuration and input columns, the stored row count, and (with a 'timestamp'
+    column) no new row sorting before the last stored one.
+    """
+    if state.get('version') != FEATURE_STATE_VERSION or state['config'] != config:
+        raise FullRecomputeRequired("the feature configuration changed since the stored table was built")
+    if list(df.columns) != state['input_columns'] or list(stored.columns[:len(df.columns)]) != state['input_columns']:
+        raise FullRecomputeRequired("the input columns changed since the stored table was built")
+    if len(stored) != state['n_rows']:
+        raise FullRecomputeRequired(f"the stored table has {len(stored)} rows, the feature state {state['n_rows']}")
+    for col in config['numeric_cols']:
+        if stored[col].dtype.kind == 'f' and df[col].dtype.kind == 'f' and stored[col].dtype != df[col].dtype:
+            raise FullRecomputeRequired(f"'{col}' changes from {stored[col].dtype} to {df[col].dtype}")
+    if 'timestamp' in df.columns and len(df) and state['last_timestamp'] is not None:
+        try:
+            earlier = df['timestamp'].iloc[0] < state['last_timestamp']
+        except TypeError:
+            earlier = True
+        if earlier:
+            raise FullRecomputeRequired("new rows start before the last stored timestamp")
+
+def load_feature_input(input_path):
+    """(frame, label for the metadata) of a data artifact path or an in-memory DataFrame; exits if unreadable."""
+    if isinstance(input_path, pd.DataFrame):
+        return input_path, '<in-memory DataFrame>'
+    try:
+        return read_frame(input_path), input_path
+    except FileNotFoundError:
+        logging.error(f"Input file {input_path} not found.")
+        sys.exit(1)
+    except Exception as e:
+        logging.error(f"Failed to load input: {e}")
+        sys.exit(1)
+
 def engineer_features(
     input_path,
     output_path,
@@ -140,22 +465,35 @@ def engineer_features(
     exclude=None,
     feature_metadata_path=None,
     resource_row_warn=100000,
-    resource_col_warn=200
+    resource_col_warn=200,
+    return_df=False,
+    csv_export=False,
+    dtype_policy='compact',
+    target_col=None,
+    n_workers=1,
+    parallel_backend='threads',
+    group_col=None,
+    state_path=None,
+    append=False,
+    feature_names=None,
+    sample_rows=None,
+    plan_path=None,
+    return_plan=False,
+    writer=None
 ):
     """
     Ingests data, checks schema/quality, sorts before time-dependent ops, generates features with dedup, logs audit/meta.
+    state_path/append continue the table incrementally (see data.incremental); feature_names/plan_path limit it to a
+    feature plan's selection and sample_rows featurizes a selection sample instead.
     """
     feature_log = []
-    try:
-        df = pd.read_csv(input_path)
-    except FileNotFoundError:
-        logging.error(f"Input file {input_path} not found.")
-        sys.exit(1)
-    except Exception as e:
-        logging.error(f"Failed to load input: {e}")
+    df, input_label = load_feature_input(input_path)
+    df = compact_dtypes(df, exclude=[target_col] if target_col else [], policy=dtype_policy)
+    if group_col is not None and group_col not in df.columns:
+        logging.error(f"Group column '{group_col}' not found in the input.")
         sys.exit(1)
     orig_cols = [c for c in df.columns if c not in (exclude or [])]
-    numeric_cols = [c for c in orig_cols if pd.api.types.is_numeric_dtype(df[c])]
+    numeric_cols = [c for c in orig_cols if pd.api.types.is_numeric_dtype(df[c]) and c != group_col]
     # Validate presence of at least one numeric column
     if not numeric_cols:
         logging.error("No numeric columns found for feature engineering.")
@@ -167,39 +505,120 @@ def engineer_features(
         logging.warning(f"Large number of columns: {df.shape[1]}. May exceed memory or runtime best practices.")
     # Data validation for required columns
     validate_input_data(df, expected_cols=orig_cols)
+    try:
+        time_based = any(not isinstance(window_spec(w), int) for w in rolling_windows)
+        if time_based:
+            df['timestamp'] = timestamp_values(df)
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
     # Always sort by timestamp before rolling/statistical features
     if 'timestamp' in df.columns:
-        df = df.sort_values('timestamp').reset_index(drop=True)
-    # Rolling/statistical feature engineering with deduplication
-    df = create_rolling_features(df, numeric_cols, rolling_windows, agg_funcs, feature_log=feature_log)
-    df = create_stat_aggregations(df, numeric_cols, feature_log=feature_log)
-    # Only apply condition encoding to columns given in condition_thresholds
-    threshold_dict = condition_thresholds or {}
-    df = create_condition_encoding(df, sensor_cols=list(threshold_dict.keys()), thresh_dict=threshold_dict, feature_log=feature_log)
-    # Remove any potential duplicate columns
+        df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    sample_bounds = None
+    if sample_rows and sample_rows < len(df):
+        rows, sample_bounds = selection_sample(df, sample_rows, group_col)
+        df = df.iloc[rows].reset_index(drop=True)
+        logging.info(f"Engineering features on a selection sample of {len(df)} rows")
+    times = df['timestamp'].to_numpy(dtype='datetime64[ns]') if time_based else None
+    partitions = row_partitions(df, group_col) if group_col is not None else None
+    if sample_bounds is not None:
+        partitions = (np.arange(len(df)), sample_bounds)
+    if partitions is not None:
+        logging.info(f"Computing window features within {len(partitions[1]) - 1} partition(s)")
+    input_columns = list(df.columns)
+    plan = FeaturePlan(numeric_cols, rolling_windows, agg_funcs, condition_thresholds, input_columns)
+    if feature_names is not None:
+        if append:
+            logging.error("Appending keeps complete feature tables; it cannot be combined with feature_names.")
+            sys.exit(1)
+        try:
+            plan = plan.select(feature_names)
+        except ValueError as e:
+            logging.error(str(e))
+            sys.exit(1)
+    if plan_path:
+        save_feature_plan(plan, plan_path, writer)
+    state_config = {'numeric_cols': numeric_cols, 'rolling_windows': [str(w) for w in rolling_windows],
+                    'agg_funcs': list(agg_funcs), 'group_col': group_col, 'dtype_policy': dtype_policy,
+                    'condition_thresholds': dict(condition_thresholds or {}), 'feature_names': plan.selected}
+    if append and not (state_path and os.path.exists(state_path) and os.path.exists(output_path)):
+        logging.warning(f"No stored feature table and state to append to; computing {output_path} in full.")
+        append = False
+    if append:
+        # Every feature family lands in one block; the output frame is assembled once below
+        blocks = FeatureBlocks(df)
+        import joblib
+        state, stored = joblib.load(state_path), read_frame(output_path)
+        try:
+            check_appendable(state, state_config, df, stored)
+            df = append_window_features(df, numeric_cols, rolling_windows, agg_funcs, state['partitions'],
+                                        feature_log=feature_log, dtype=feature_dtype(dtype_policy),
+                                        group_col=group_col, times=times, blocks=blocks)
+        except FullRecomputeRequired as e:
+            logging.warning(f"Recomputing all {len(stored) + len(df)} rows instead of appending: {e}")
+            combined = pd.concat([stored[state['input_columns']], df[input_columns]], ignore_index=True)
+            return engineer_features(
+                combined, output_path, rolling_windows=rolling_windows, agg_funcs=agg_funcs,
+                condition_thresholds=condition_thresholds, exclude=exclude,
+                feature_metadata_path=feature_metadata_path, resource_row_warn=resource_row_warn,
+                resource_col_warn=resource_col_warn, return_df=return_df, csv_export=csv_export,
+                dtype_policy=dtype_policy, target_col=target_col, n_workers=n_workers,
+                parallel_backend=parallel_backend, group_col=group_col, state_path=state_path, plan_path=plan_path,
+                return_plan=return_plan, writer=writer)
+        logging.info(f"Appending {len(df)} rows to the {len(stored)} stored in {output_path}")
+        # Only apply condition encoding to columns given in condition_thresholds
+        threshold_dict = condition_thresholds or {}
+        df = create_condition_encoding(df, sensor_cols=list(threshold_dict.keys()), thresh_dict=threshold_dict,
+                                       feature_log=feature_log, dtype=flag_dtype(dtype_policy), blocks=blocks)
+        df = blocks.frame()
+    else:
+        # Rolling/statistical features and condition flags of the plan (only the selected ones, if any)
+        with ColumnBlockExecutor(n_workers, parallel_backend) as executor:
+            df = materialize_features(df, plan, plan.selected, dtype_policy, executor=executor,
+                                      partitions=partitions, times=times, feature_log=feature_log)
+    # Remove any potential duplicate columns (of the input; generated names are never duplicated)
     df = deduplicate_columns(df)
+    if state_path:
+        if append:
+            state['n_rows'] += len(df)
+        else:
+            state = {'version': FEATURE_STATE_VERSION, 'config': state_config, 'input_columns': input_columns,
+                     'n_rows': len(df), 'last_timestamp': None,
+                     'partitions': partition_tails(df, numeric_cols, rolling_windows, group_col, times)}
+        if 'timestamp' in df.columns and len(df):
+            state['last_timestamp'] = df['timestamp'].iloc[-1]
+    if append:
+        # The input columns are compacted over all rows, as a full run would
+        df = pd.concat([stored, df], ignore_index=True)
+        df = compact_dtypes(df, exclude=[c for c in df.columns if c not in input_columns or c == target_col],
+                            policy=dtype_policy)
     # Save feature engineered data
-    df.to_csv(output_path, index=False)
-    secure_file_permissions(output_path)
-    logging.info(f'Feature engineered data saved to {output_path}')
+    if output_path:
+        save_frame(df, output_path, f'Feature engineered data saved to {output_path}', csv_export, writer)
+    if state_path:
+        # What live events are cast to before their features are computed (see data.streaming)
+        state['input_dtypes'] = {c: str(df[c].dtype) for c in numeric_cols}
+        save_feature_state(state, state_path, writer)
     # Write metadata JSON for reproducibility/audit
     if feature_metadata_path:
         user = getpass.getuser() if hasattr(getpass, 'getuser') else 'unknown'
         auditmeta = {
-            "input_csv": input_path,
+            "input_csv": input_label,
             "output_features_csv": output_path,
             "engineered_features": feature_log,
+            "group_col": group_col,
+            "rolling_windows": list(rolling_windows),
             "generated_timestamp": datetime.now().isoformat(),
             "git_commit": get_git_commit(),
             "user": user,
             "num_rows": df.shape[0],
             "num_cols": df.shape[1]
         }
-        with open(feature_metadata_path, 'w') as f:
-            json.dump(auditmeta, f, indent=2)
-        secure_file_permissions(feature_metadata_path)
-        logging.info(f"Feature engineering metadata written to {feature_metadata_path}")
-    return output_path, list(df.columns), feature_log
+        save_json(auditmeta, feature_metadata_path,
+                  f"Feature engineering metadata written to {feature_metadata_path}", writer)
+    result = (output_path, list(df.columns), feature_log)
+    return result + ((df,) if return_df else ()) + ((plan,) if return_plan else ())
 
 def split_feature_target(df, target_col):
     feature_cols = [col for col in df.columns if col != target_col]
@@ -215,23 +634,48 @@ def select_top_features(
     num_features=20,
     feature_report_path=None,
     selection_log_path=None,
-    rationale_config=None
+    rationale_config=None,
+    n_jobs=-1,
+    mi_method='knn',
+    mi_sample_rows=None,
+    mi_bins=32,
+    redundancy_threshold=0.95,
+    writer=None
 ):
     """
     Selects top features by combined importance (tree+MI), logs artifact & rationale including per-feature detail.
+    mi_method picks the MI estimator (see data.feature_selection); redundancy_threshold prunes correlated
+    features first.
     """
+    if mi_method not in MI_METHODS:
+        raise ValueError(f"mi_method must be one of {MI_METHODS}, got '{mi_method}'.")
     # Guard: drop non-numeric columns (unless target)
     non_numeric = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c]) and c != target_col]
     if non_numeric:
         logging.warning(f"Non-numeric columns dropped from selection: {non_numeric}")
         df = df.drop(non_numeric, axis=1)
     X, y = split_feature_target(df, target_col)
-    if problem_type == 'classification':
-        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    pruning = None
+    if redundancy_threshold:
+        kept, clusters = prune_correlated(X, y, redundancy_threshold, discrete_target=problem_type == 'classification')
+        pruning = {'threshold': redundancy_threshold, 'candidates': X.shape[1], 'kept': len(kept),
+                   'clusters': clusters}
+        X = X[kept]
+    mi_rows = len(X)
+    if mi_method == 'histogram':
+        mi_frame = histogram_mutual_info(X, y, discrete_target=problem_type == 'classification', n_bins=mi_bins,
+                                         sample_rows=mi_sample_rows,
+                                         n_workers=os.cpu_count() if n_jobs == -1 else n_jobs)
+        mi = mi_frame['mutual_info'].to_numpy()
+        mi_rows = min(mi_rows, mi_sample_rows or mi_rows)
+    elif problem_type == 'classification':
         mi = mutual_info_classif(X, y, discrete_features='auto', random_state=42)
     else:
-        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
         mi = mutual_info_regression(X, y, discrete_features='auto', random_state=42)
+    if problem_type == 'classification':
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    else:
+        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
     model.fit(X, y)
     importances = model.feature_importances_
     importance_df = pd.DataFrame({
@@ -239,6 +683,8 @@ def select_top_features(
         'tree_importance': importances,
         'mutual_info': mi
     })
+    if mi_method == 'histogram':
+        importance_df['mi_std_error'] = mi_frame['mi_std_error'].to_numpy()
     # Combine scores (normalize MI to sum=1, weigh with tree importance)
     mi_norm = importance_df['mutual_info'] / np.nansum(importance_df['mutual_info']) if np.nansum(importance_df['mutual_info']) > 0 else importance_df['mutual_info']
     importance_df['combined_score'] = 0.5 * importance_df['tree_importance'] + 0.5 * mi_norm
@@ -246,49 +692,51 @@ def select_top_features(
     selected = importance_df['feature'].head(num_features).tolist()
     # Save full report
     if feature_report_path:
-        importance_df.to_csv(feature_report_path, index=False)
-        secure_file_permissions(feature_report_path)
-        logging.info(f'Feature importance report saved to {feature_report_path}')
+        save_frame(importance_df, feature_report_path, f'Feature importance report saved to {feature_report_path}',
+                   writer=writer, fmt='csv')
     # Log rationale with per-feature info or config rationale
     if selection_log_path:
         summary = {
             'timestamp': datetime.now().isoformat(),
             'problem_type': problem_type,
             'num_features_selected': num_features,
+            'rows_scored': int(len(X)),
+            'mutual_info_estimator': {'method': mi_method, 'rows': int(mi_rows),
+                                      **({'bins': mi_bins} if mi_method == 'histogram' else {})},
             'features_selected': selected,
             'feature_scores': importance_df.head(num_features).to_dict('records'),
             'rationale': f"Features selected using combined RandomForest {'classifier' if problem_type=='classification' else 'regressor'} importance and normalized mutual information. Top {num_features} features have both high nonlinear association (tree splits) and information gain with respect to target.",
-            'per_feature_domain_notes': rationale_config or {}
+            'per_feature_domain_notes': rationale_config or {},
+            'redundancy_pruning': pruning
         }
-        with open(selection_log_path, 'w') as f:
-            json.dump(summary, f, indent=2)
-        secure_file_permissions(selection_log_path)
-        logging.info(f'Feature selection rationale documented to {selection_log_path}')
+        save_json(summary, selection_log_path, f'Feature selection rationale documented to {selection_log_path}',
+                  writer)
     return selected, importance_df
 
-def generate_selected_feature_matrix(df, selected_features, output_path):
+def generate_selected_feature_matrix(df, selected_features, output_path, csv_export=False, writer=None):
     # Always include target columns if present
     target_cols = [col for col in df.columns if col.lower().startswith('target')]
     feat_matrix = df[selected_features + [col for col in target_cols if col not in selected_features]]
-    feat_matrix.to_csv(output_path, index=False)
-    secure_file_permissions(output_path)
-    logging.info(f'Selected feature matrix saved to {output_path}')
+    save_frame(feat_matrix, output_path, f'Selected feature matrix saved to {output_path}', csv_export, writer)
+    return feat_matrix
 
-def redact_sensitive_output_columns(df, sensitive_columns=None, output_path=None):
+def redact_sensitive_output_columns(df, sensitive_columns=None, output_path=None, csv_export=False):
     """
     Overwrite sensitive columns with 'REDACTED' marker, if required for privacy compliance.
+    (An ArtifactWriter redacts while writing, so nothing written unredacted needs rewriting.)
     """
     if sensitive_columns:
         for col in sensitive_columns:
             if col in df.columns:
-                df[col] = 'REDACTED'
+                df[col] = REDACTED
     if output_path:
-        df.to_csv(output_path, index=False)
+        write_frame(df, output_path, csv_export=csv_export)
         secure_file_permissions(output_path)
         logging.info(f'Sensitive columns were redacted in {output_path}')
     return df
 
-def write_artifact_metadata(feat_output, selection_matrix_path, report_path, selection_log_path, feature_meta_path):
+def write_artifact_metadata(feat_output, selection_matrix_path, report_path, selection_log_path, feature_meta_path,
+                            writer=None):
     """
     Writes audit trail for end-to-end feature artifact production as JSON metadata.
     """
@@ -304,19 +752,119 @@ def write_artifact_metadata(feat_output, selection_matrix_path, report_path, sel
         'script': os.path.basename(__file__)
     }
     outjson = os.path.splitext(selection_matrix_path)[0] + '_artifact_metadata.json'
-    with open(outjson, 'w') as f:
-        json.dump(meta, f, indent=2)
-    secure_file_permissions(outjson)
-    logging.info(f"Feature engineering artifact metadata written to {outjson}")
+    save_json(meta, outjson, f"Feature engineering artifact metadata written to {outjson}", writer)
     return outjson
 
+def run_feature_stage(
+    input_data,
+    output_path,
+    selection_output,
+    feature_importance_report,
+    selection_log,
+    feature_metadata,
+    target_col,
+    problem_type='classification',
+    num_features=20,
+    condition_thresholds=None,
+    exclude=None,
+    sensitive_cols=None,
+    rationale_config=None,
+    rolling_windows=[5, 15, 30],
+    agg_funcs=['mean', 'max', 'min', 'std'],
+    n_jobs=-1,
+    csv_export=False,
+    dtype_policy='compact',
+    n_workers=1,
+    parallel_backend='threads',
+    group_col=None,
+    state_path=None,
+    append=False,
+    selection_sample=None,
+    plan_path=None,
+    mi_method='knn',
+    mi_sample_rows=None,
+    redundancy_threshold=0.95
+):
+    """
+    Runs engineering, selection, matrix generation and artifact metadata for one dataset.
+    input_data is a data artifact path or DataFrame; returns the selected feature matrix as a DataFrame.
+    """
+    with ArtifactWriter(sensitive_cols) as writer:
+        selection_kwargs = dict(target_col=target_col, problem_type=problem_type, importance_method='tree',
+                                num_features=num_features, feature_report_path=feature_importance_report,
+                                selection_log_path=selection_log, rationale_config=rationale_config, n_jobs=n_jobs,
+                                mi_method=mi_method, mi_sample_rows=mi_sample_rows,
+                                redundancy_threshold=redundancy_threshold, writer=writer)
+        selected = None
+        if selection_sample:
+            input_data, _ = load_feature_input(input_data)  # loaded once for both passes
+            *_, sample = engineer_features(
+                input_data, None, rolling_windows=rolling_windows, agg_funcs=agg_funcs,
+                condition_thresholds=condition_thresholds, exclude=exclude, return_df=True,
+                dtype_policy=dtype_policy, target_col=target_col, n_workers=n_workers,
+                parallel_backend=parallel_backend, group_col=group_col, sample_rows=selection_sample)
+            if sensitive_cols:
+                redact_sensitive_output_columns(sample, sensitive_columns=sensitive_cols)
+            selected, _ = select_top_features(sample, **selection_kwargs)
+            logging.info(f"PROGRESS features: selection on {len(sample)} sampled rows done, "
+                         f"selected={len(selected)}")
+            del sample
+        # Feature engineering (with metadata and schema validation)
+        feat_out, all_feats, generated_feats, df, plan = engineer_features(
+            input_data,
+            output_path,
+            rolling_windows=rolling_windows,
+            agg_funcs=agg_funcs,
+            condition_thresholds=condition_thresholds,
+            exclude=exclude,
+            feature_metadata_path=feature_metadata,
+            return_df=True,
+            csv_export=csv_export,
+            dtype_policy=dtype_policy,
+            target_col=target_col,
+            n_workers=n_workers,
+            parallel_backend=parallel_backend,
+            group_col=group_col,
+            state_path=state_path,
+            append=append,
+            feature_names=selected,
+            return_plan=True,
+            writer=writer
+        )
+        logging.info(f"PROGRESS features: engineering done, rows={len(df)} features={len(generated_feats)}")
+        # Redact sensitive columns in memory too (the writer already redacts the output), so selection skips them
+        if sensitive_cols:
+            redact_sensitive_output_columns(df, sensitive_columns=sensitive_cols)
+
+        # Select features robustly
+        if selected is None:
+            selected, _ = select_top_features(df, **selection_kwargs)
+            logging.info(f"PROGRESS features: selection done, selected={len(selected)}")
+        if plan_path:
+            save_feature_plan(plan.select(selected), plan_path, writer)
+        # Generate selected feature matrix
+        featmat = generate_selected_feature_matrix(df, selected, selection_output, csv_export=csv_export,
+                                                   writer=writer)
+        logging.info(f"PROGRESS features: feature matrix queued, rows={len(featmat)}")
+        # Write artifact metadata for compliance/audit
+        write_artifact_metadata(
+            feat_output=output_path,
+            selection_matrix_path=selection_output,
+            report_path=feature_importance_report,
+            selection_log_path=selection_log,
+            feature_meta_path=feature_metadata,
+            writer=writer
+        )
+    logging.info("PROGRESS features: artifacts written")
+    return featmat
+
 # === Main CLI ===
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Engineer features from manufacturing sensor data and perform robust selection/audit.')
-    parser.add_argument('--input', required=True, help='Preprocessed CSV input file')
-    parser.add_argument('--output', required=True, help='Output CSV path for feature engineered data')
-    parser.add_argument('--selection_output', required=True, help='CSV for the selected feature matrix')
+    parser.add_argument('--input', required=True, help='Preprocessed input (CSV, .parquet, .feather or .npy directory)')
+    parser.add_argument('--output', required=True, help='Output path for feature engineered data; the extension picks the format')
+    parser.add_argument('--selection_output', required=True, help='Path for the selected feature matrix; the extension picks the format')
     parser.add_argument('--feature_importance_report', required=True, help='CSV for feature importance')
     parser.add_argument('--selection_log', required=True, help='File for rationale log (JSON)')
     parser.add_argument('--feature_metadata', required=True, help='Path to save feature engineering run metadata (JSON)')
@@ -327,6 +875,31 @@ if __name__ == "__main__":
     parser.add_argument('--exclude_cols', default='', help='Comma-separated list of columns to exclude from feature engineering')
     parser.add_argument('--sensitive_cols', default='', help='Comma-separated list for privacy redaction downstream')
     parser.add_argument('--rationale_config', default='', help='Optional JSON: domain rationale per feature')
+    parser.add_argument('--n_jobs', default=-1, type=int, help='Cores for the importance RandomForest (-1 = all cores)')
+    parser.add_argument('--csv_export', action='store_true', help='Also write human-facing CSV copies of binary outputs')
+    parser.add_argument('--dtype_policy', default='compact', choices=list(DTYPE_POLICIES),
+                        help='compact: float32 features, uint8 flags, category strings; float64: pandas defaults')
+    parser.add_argument('--n_workers', default=1, type=int, help='Workers generating per-column features in parallel column blocks')
+    parser.add_argument('--parallel_backend', default='threads', choices=list(PARALLEL_BACKENDS),
+                        help='Pool for --n_workers: threads, or processes sharing the data through /dev/shm')
+    parser.add_argument('--group_col', default=None,
+                        help='Compute rolling/expanding features within each group of this column (e.g. machine_id)')
+    parser.add_argument('--rolling_windows', default=DEFAULT_ROLLING_WINDOWS,
+                        help="Comma-separated rolling windows: row counts (5,15,30) and/or durations on 'timestamp' (5min,1h,24h)")
+    parser.add_argument('--feature_state', default=None,
+                        help='Path (joblib) for the window tails and accumulators that --append continues from')
+    parser.add_argument('--append', action='store_true',
+                        help='Featurize only the --input rows and append them to the table at --output (needs --feature_state)')
+    parser.add_argument('--selection_sample', default=0, type=int,
+                        help='Select features on a sample of this many rows, then compute only the selected ones (0 = off)')
+    parser.add_argument('--feature_plan', default=None,
+                        help='Path (JSON) for the feature plan recording the selected features')
+    parser.add_argument('--mi_method', default='knn', choices=list(MI_METHODS),
+                        help='Mutual information estimator: sklearn kNN, or joint histograms of quantile-binned features')
+    parser.add_argument('--mi_sample_rows', default=None, type=int,
+                        help='Estimate histogram mutual information on this many random rows (default: all)')
+    parser.add_argument('--redundancy_threshold', default=0.95, type=float,
+                        help='Prune features correlated at |r| >= this with a kept one before scoring (0 = off)')
     args = parser.parse_args()
 
     try:
@@ -340,44 +913,38 @@ if __name__ == "__main__":
         rationale_config = json.loads(args.rationale_config) if args.rationale_config else None
     except Exception:
         rationale_config = None
+    try:
+        rolling_windows = parse_rolling_windows(args.rolling_windows)
+    except ValueError as e:
+        logging.error(f"Invalid --rolling_windows: {e}")
+        sys.exit(1)
 
-    # Feature engineering (with metadata and schema validation)
-    feat_out, all_feats, generated_feats = engineer_features(
+    run_feature_stage(
         args.input,
         args.output,
-        rolling_windows=[5, 15, 30],
-        agg_funcs=['mean', 'max', 'min', 'std'],
-        condition_thresholds=condition_thresholds,
-        exclude=exclude,
-        feature_metadata_path=args.feature_metadata
-    )
-    df = pd.read_csv(feat_out)
-    # Optionally redact sensitive columns in full output
-    if sensitive_cols:
-        redact_sensitive_output_columns(df, sensitive_columns=sensitive_cols, output_path=args.output)
-
-    # Select features robustly
-    selected, _ = select_top_features(
-        df,
+        selection_output=args.selection_output,
+        feature_importance_report=args.feature_importance_report,
+        selection_log=args.selection_log,
+        feature_metadata=args.feature_metadata,
         target_col=args.target_col,
         problem_type=args.problem_type,
-        importance_method='tree',
         num_features=args.num_features,
-        feature_report_path=args.feature_importance_report,
-        selection_log_path=args.selection_log,
-        rationale_config=rationale_config
-    )
-    # Generate selected feature matrix
-    generate_selected_feature_matrix(df, selected, args.selection_output)
-    # Optionally redact sensitive columns in feature matrix (downstream privacy)
-    if sensitive_cols:
-        featmat = pd.read_csv(args.selection_output)
-        redact_sensitive_output_columns(featmat, sensitive_columns=sensitive_cols, output_path=args.selection_output)
-    # Write artifact metadata for compliance/audit
-    write_artifact_metadata(
-        feat_output=args.output,
-        selection_matrix_path=args.selection_output,
-        report_path=args.feature_importance_report,
-        selection_log_path=args.selection_log,
-        feature_meta_path=args.feature_metadata
+        condition_thresholds=condition_thresholds,
+        exclude=exclude,
+        sensitive_cols=sensitive_cols,
+        rationale_config=rationale_config,
+        rolling_windows=rolling_windows,
+        n_jobs=args.n_jobs,
+        csv_export=args.csv_export,
+        dtype_policy=args.dtype_policy,
+        n_workers=args.n_workers,
+        parallel_backend=args.parallel_backend,
+        group_col=args.group_col,
+        state_path=args.feature_state,
+        append=args.append,
+        selection_sample=args.selection_sample,
+        plan_path=args.feature_plan,
+        mi_method=args.mi_method,
+        mi_sample_rows=args.mi_sample_rows,
+        redundancy_threshold=args.redundancy_threshold
     )
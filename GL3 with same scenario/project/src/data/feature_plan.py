@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.rolling import ROLLING_FUNCS
+
+STAT_FUNCS = ('mean', 'max', 'min', 'std')
+SPEC_KINDS = ('input', 'rolling', 'stat', 'flag')
+
+# --- Feature plan ---
+# Every engineered column is a named spec (input column, rolling window, expanding statistic or condition flag)
+# derived from the feature configuration, so a plan can list the features before any is computed and map a
+# selected name such as 'temp_roll15_std' back to what computes it (see feature_engineering.materialize_features).
+
+
+class FeatureSpec(NamedTuple):
+    """One feature: kind (see SPEC_KINDS), its input column and, by kind, the window, function or flag side."""
+    kind: str
+    column: str
+    window: object = None
+    func: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        if self.kind == 'rolling':
+            return f'{self.column}_roll{self.window}_{self.func}'
+        if self.kind in ('stat', 'flag'):
+            return f'{self.column}_{self.func}'
+        return self.column
+
+
+class FeaturePlan:
+    """
+    The features a configuration generates, in the order engineer_features adds them: rolling windows per
+    column (window, then function), expanding statistics, then high/low flags of the thresholded columns.
+    A name already taken by an input column or an earlier spec is skipped, as in the engineered table.
+    `selected` optionally narrows the plan to the names a model uses (inputs included).
+    """
+
+    def __init__(self, columns: Sequence[str], windows: Sequence, agg_funcs: Sequence[str],
+                 condition_thresholds: Dict[str, float] = None, input_columns: Sequence[str] = (),
+                 selected: Sequence[str] = None):
+        self.columns = list(columns)
+        self.windows = list(windows)
+        self.agg_funcs = list(agg_funcs)
+        self.condition_thresholds = dict(condition_thresholds or {})
+        self.input_columns = list(input_columns)
+        funcs = [f for f in self.agg_funcs if f in ROLLING_FUNCS]
+        generated = [FeatureSpec('rolling', col, w, func) for col in self.columns for w in self.windows for func in funcs]
+        generated += [FeatureSpec('stat', col, None, stat) for col in self.columns for stat in STAT_FUNCS]
+        generated += [FeatureSpec('flag', col, None, side) for col in self.condition_thresholds for side in ('high', 'low')]
+        self.by_name = {col: FeatureSpec('input', col) for col in self.input_columns}
+        self.specs = []
+        for spec in generated:
+            if spec.name not in self.by_name:
+                self.by_name[spec.name] = spec
+                self.specs.append(spec)
+        self.selected = None if selected is None else [s.name for s in self.resolve(selected)]
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the generated features (input columns not included)."""
+        return [s.name for s in self.specs]
+
+    def resolve(self, names: Sequence[str]) -> List[FeatureSpec]:
+        """Specs of names (generated features or input columns); raises ValueError naming any unknown ones."""
+        unknown = [n for n in names if n not in self.by_name]
+        if unknown:
+            raise ValueError(f"Features not produced by this feature plan: {unknown}")
+        return [self.by_name[n] for n in names]
+
+    def select(self, names: Sequence[str]) -> 'FeaturePlan':
+        """The same plan narrowed to names."""
+        return FeaturePlan(self.columns, self.windows, self.agg_funcs, self.condition_thresholds, self.input_columns,
+                           selected=names)
+
+    def to_dict(self) -> Dict:
+        return {'columns': self.columns, 'windows': self.windows, 'agg_funcs': self.agg_funcs,
+                'condition_thresholds': self.condition_thresholds, 'input_columns': self.input_columns,
+                'selected': self.selected}
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeaturePlan':
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config['columns'], config['windows'], config['agg_funcs'], config['condition_thresholds'],
+                   config['input_columns'], config['selected'])
+
+
+def rolling_groups(specs: Sequence[FeatureSpec]) -> List[Tuple[List[str], List, List[str]]]:
+    """
+    (columns, windows, funcs) batches covering the rolling specs: columns needing the same windows and
+    functions share a batch, whose cross product may include a few unneeded features next to the wanted ones.
+    """
+    needed = {}
+    for spec in specs:
+        if spec.kind == 'rolling':
+            windows, funcs = needed.setdefault(spec.column, ([], []))
+            if spec.window not in windows:
+                windows.append(spec.window)
+            if spec.func not in funcs:
+                funcs.append(spec.func)
+    groups = {}
+    for col, (windows, funcs) in needed.items():
+        groups.setdefault((tuple(map(str, windows)), tuple(funcs)), (windows, funcs, []))[2].append(col)
+    return [(cols, windows, funcs) for windows, funcs, cols in groups.values()]
@@ -0,0 +1,186 @@
+import os
+import sys
+import logging
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.parallel import ColumnBlockExecutor
+
+MI_METHODS = ('knn', 'histogram')
+# Elements of the joint-histogram index built at once (bounds the int64 temporaries of a column block)
+_INDEX_CHUNK = 1 << 24
+# Observed values the bin edges are taken from (evenly strided beyond that)
+_EDGE_ROWS = 100_000
+
+
+def quantile_codes(values: np.ndarray, n_bins: int = 32) -> np.ndarray:
+    """
+    uint8 bin codes of values in up to n_bins quantile bins of their observed values (tied quantiles merge,
+    so a flag keeps two bins); NaN gets the code n_bins of its own. The quantiles come from at most
+    _EDGE_ROWS evenly spaced observed values.
+    """
+    if not 1 < n_bins < 256:
+        raise ValueError(f"n_bins must be between 2 and 255, got {n_bins}.")
+    missing = np.isnan(values)
+    observed = values[~missing]
+    observed = observed[::max(1, len(observed) // _EDGE_ROWS)]
+    edges = np.unique(np.quantile(observed, np.linspace(0, 1, n_bins + 1)[1:-1])) if observed.size else observed
+    if len(edges) > 64:
+        codes = np.searchsorted(edges, values, side='right').astype(np.uint8)
+    else:
+        # Counting the edges at or below each value is searchsorted(side='right') in a few vectorized passes
+        codes = np.zeros(len(values), dtype=np.uint8)
+        for edge in edges:
+            codes += values >= edge
+    codes[missing] = n_bins
+    return codes
+
+
+def _joint_histograms(codes: np.ndarray, cell: np.ndarray, n_cells: int) -> np.ndarray:
+    """
+    (n_columns, n_cells) counts of every code column jointly with the per-row target cell (target code, and
+    row split if any, folded into one index below n_cells), one bincount per chunk of columns.
+    """
+    n_rows, n_columns = codes.shape
+    chunk = max(1, _INDEX_CHUNK // max(n_rows, 1))
+    joint = np.empty((n_columns, (int(codes.max(initial=0)) + 1) * n_cells))
+    for start in range(0, n_columns, chunk):
+        part = codes[:, start:start + chunk]
+        index = part.astype(np.int64) * n_cells + cell[:, None] + np.arange(part.shape[1]) * joint.shape[1]
+        joint[start:start + part.shape[1]] = np.bincount(index.ravel(), minlength=joint.size // n_columns
+                                                         * part.shape[1]).reshape(part.shape[1], -1)
+    return joint
+
+
+def _histogram_mi(joint: np.ndarray) -> np.ndarray:
+    """
+    Mutual information (nats) from (n_columns, n_x, n_y) joint counts, with the Miller-Madow correction of
+    the plug-in estimate's bias (clipped at 0 like sklearn's estimators).
+    """
+    n_rows = max(joint[0].sum(), 1) if len(joint) else 1
+    p_xy = joint / n_rows
+    p_x, p_y = p_xy.sum(axis=2, keepdims=True), p_xy.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(p_xy > 0, p_xy * np.log(p_xy / (p_x * p_y)), 0.0)
+    occupied = lambda p: (p > 0).sum(axis=(1, 2))
+    bias = (occupied(p_x) + occupied(p_y) - occupied(p_xy) - 1) / (2.0 * n_rows)
+    return np.maximum(terms.sum(axis=(1, 2)) + bias, 0.0)
+
+
+def _block_mutual_info(block: np.ndarray, columns: slice, target: np.ndarray, n_y: int, n_bins: int,
+                       split: np.ndarray, n_splits: int) -> np.ndarray:
+    """
+    (n_columns, 1 + n_splits) MI of a column block: over all rows, then over each row split. The histograms
+    are counted per split in one pass; the all-row histogram is their sum.
+    """
+    codes = np.empty(block.shape, dtype=np.uint8, order='F')
+    for j in range(block.shape[1]):
+        codes[:, j] = quantile_codes(block[:, j], n_bins)
+    joint = _joint_histograms(codes, split * n_y + target, n_splits * n_y)
+    parts = joint.reshape(block.shape[1], -1, n_splits, n_y).transpose(2, 0, 1, 3)
+    estimates = [_histogram_mi(parts.sum(axis=0))]
+    if n_splits > 1:
+        estimates += [_histogram_mi(part) for part in parts]
+    return np.column_stack(estimates)
+
+
+def histogram_mutual_info(X: pd.DataFrame, y, discrete_target: bool = True, n_bins: int = 32,
+                          sample_rows: int = None, n_splits: int = 4, n_workers: int = 1, seed: int = 42
+                          ) -> pd.DataFrame:
+    """
+    Mutual information of every (numeric) column of X with y from joint histograms: each column is binned
+    once into uint8 quantile codes (see quantile_codes), y by its classes (discrete_target) or quantile bins,
+    and the columns are spread over n_workers threads in column blocks. Linear in the rows, unlike the kNN
+    estimators of sklearn. sample_rows estimates on a random subset of that many rows instead.
+    Returns a frame indexed by column with 'mutual_info' and 'mi_std_error', the latter spread of the
+    estimates over n_splits disjoint parts of the rows used divided by sqrt(n_splits) (a rough standard
+    error that grows as the sample shrinks).
+    """
+    rows = None
+    if sample_rows and sample_rows < len(X):
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), sample_rows, replace=False))
+    y = np.asarray(y)[rows] if rows is not None else np.asarray(y)
+    if discrete_target:
+        target, classes = pd.factorize(pd.Series(y))
+        target = np.where(target < 0, len(classes), target)
+        n_y = len(classes) + 1
+    else:
+        target, n_y = quantile_codes(y.astype(np.float64), n_bins), n_bins + 1
+    target = target.astype(np.int64)
+    n_splits = max(1, n_splits)
+    split = np.random.default_rng(seed + 1).permutation(len(target)) % n_splits
+    with ColumnBlockExecutor(n_workers) as executor:
+        matrix = executor.matrix(X, X.columns, rows=rows)
+        blocks = executor.map(_block_mutual_info, matrix, target=target, n_y=n_y, n_bins=n_bins, split=split,
+                              n_splits=n_splits)
+    estimates = np.vstack(blocks) if blocks else np.empty((0, 1 + n_splits))
+    std_error = (estimates[:, 1:].std(axis=1, ddof=1) / np.sqrt(n_splits) if n_splits > 1
+                 else np.full(len(estimates), np.nan))
+    logging.info(f"Histogram mutual information of {X.shape[1]} columns on {len(target)} of {len(X)} rows "
+                 f"({n_bins} bins), median standard error {np.nanmedian(std_error) if len(std_error) else np.nan:.4g}")
+    return pd.DataFrame({'mutual_info': estimates[:, 0], 'mi_std_error': std_error}, index=list(X.columns))
+
+
+def correlation_matrix(X: pd.DataFrame, extra: np.ndarray = None, chunk_elements: int = 1 << 22) -> np.ndarray:
+    """
+    Pearson correlations among the columns of X (followed by the columns of the optional (n_rows, k) array
+    extra), a missing value counting as its column's mean. The centred Gram matrix is accumulated over row
+    blocks of about chunk_elements values with one BLAS matrix product each, so no standardized copy of X is
+    made. A constant column correlates 0 with everything but itself.
+    """
+    extra = np.empty((len(X), 0)) if extra is None else np.asarray(extra, dtype=np.float64).reshape(len(X), -1)
+    mean = np.concatenate([X.mean().to_numpy(dtype=np.float64), extra.mean(axis=0)])
+    n_columns = len(mean)
+    gram = np.zeros((n_columns, n_columns))
+    step = max(1, chunk_elements // max(n_columns, 1))
+    for start in range(0, len(X), step):
+        block = np.hstack([X.iloc[start:start + step].to_numpy(dtype=np.float64, na_value=np.nan),
+                           extra[start:start + step]]) - mean
+        block[np.isnan(block)] = 0.0
+        gram += block.T @ block
+    scale = np.sqrt(np.diag(gram))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = gram / np.outer(scale, scale)
+    corr[~np.isfinite(corr)] = 0.0
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def prune_correlated(X: pd.DataFrame, y=None, threshold: float = 0.95, discrete_target: bool = True):
+    """
+    Drops near-duplicate columns of X before they are scored. Columns whose absolute correlation reaches
+    threshold form clusters around a representative, taken greedily in order of absolute correlation with y
+    (the strongest of its class indicators for a discrete target; column order without y): each column not
+    yet clustered becomes a representative and takes every unclustered column correlated with it, so every
+    dropped column is within threshold of its own representative. Returns (kept columns in X's order,
+    clusters), clusters listing every representative that dropped columns with its target correlation and
+    the dropped columns with their correlation to it.
+    """
+    columns = list(X.columns)
+    target = None
+    if y is not None:
+        target = pd.get_dummies(pd.Series(np.asarray(y))).to_numpy(dtype=np.float64) if discrete_target \
+            else np.asarray(y, dtype=np.float64)
+    corr = correlation_matrix(X, target)
+    n = len(columns)
+    relevance = np.abs(corr[:n, n:]).max(axis=1, initial=0.0)
+    order = np.argsort(-relevance, kind='stable')
+    linked = np.abs(corr[:n, :n]) >= threshold
+    clustered = np.zeros(n, dtype=bool)
+    clusters = []
+    for i in order:
+        if clustered[i]:
+            continue
+        members = np.flatnonzero(linked[i] & ~clustered)
+        clustered[members] = True
+        dropped = [j for j in members if j != i]
+        if dropped:
+            clusters.append({'representative': columns[i], 'target_correlation': float(relevance[i]),
+                             'dropped': [{'feature': columns[j], 'correlation': float(corr[i, j])} for j in dropped]})
+    removed = {d['feature'] for c in clusters for d in c['dropped']}
+    kept = [c for c in columns if c not in removed]
+    logging.info(f"Correlation pruning at |r| >= {threshold}: kept {len(kept)} of {n} features "
+                 f"({len(clusters)} clusters of near-duplicates)")
+    return kept, clusters
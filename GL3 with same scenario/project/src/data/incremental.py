@@ -0,0 +1,87 @@
+import os
+import sys
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.rolling import expanding_carry, first_observed, longest_window, time_window_starts, window_block
+
+# --- Incremental window features ---
+# The rolling engine only looks backwards (see rolling.rolling_aggregate), so appended rows can be featurized
+# from a short tail of every partition plus a few accumulators, and the stored rows stay exactly what a full
+# recompute would give. PartitionTail is that state for one partition (one machine, or the whole table).
+
+
+class FullRecomputeRequired(Exception):
+    """The appended rows would change stored feature values too (or cannot be placed after them)."""
+
+
+def tail_start(n_rows: int, row_windows: Sequence[int], block: int = None) -> int:
+    """
+    First partition row the rows after n_rows still need: each row-count window reaches back into the
+    block before its own (blocks of `window` rows), a start window into the block before its own (blocks
+    of `block` rows).
+    """
+    start = n_rows
+    for size in list(row_windows) + ([block] if block else []):
+        start = min(start, max(0, (n_rows // size - 1) * size))
+    return start
+
+
+class PartitionTail:
+    """
+    What the next run needs of one partition: its row count, the trailing rows of every column (as the
+    float64 values the engine saw) and their timestamps, the per-column shift the sums are centred on (NaN
+    until a value is observed), the expanding accumulators after the last row, and the longest time window
+    seen so far (which fixes the restart block of the time-window sums).
+    """
+
+    def __init__(self, n_columns: int, time_based: bool = False):
+        self.n_rows = 0
+        self.values = np.empty((0, n_columns))
+        self.times = np.empty(0, dtype='datetime64[ns]') if time_based else None
+        self.shift = np.full(n_columns, np.nan)
+        self.carry = [None] * n_columns
+        self.longest = 0
+
+    def context(self, values: np.ndarray, times: np.ndarray, windows: List) -> Dict:
+        """
+        Engine inputs for the rolling features of the new rows: the tail followed by the new rows, their
+        windows (time windows resolved to start rows), per-column shift, the tail's offset in the partition
+        and the time-window block. Rows up to tail_rows of the results belong to the tail and are dropped.
+        """
+        matrix = np.vstack([self.values, values])
+        shift = np.array([s if not np.isnan(s) else first_observed(values[:, j]) for j, s in enumerate(self.shift)])
+        offset, tail_rows = self.n_rows - len(self.values), len(self.values)
+        resolved, longest = [], self.longest
+        if self.times is not None:
+            all_times = np.concatenate([self.times, times])
+        for window in windows:
+            if isinstance(window, int):
+                resolved.append(window)
+                continue
+            starts = time_window_starts(all_times, window)
+            if offset and (starts[tail_rows:] == 0).any():
+                raise FullRecomputeRequired(f"a {window} window reaches back past the stored tail")
+            longest = max(longest, longest_window(starts, tail_rows))
+            resolved.append(starts)
+        block = window_block(longest) if self.times is not None else None
+        if self.n_rows and block is not None and block != window_block(self.longest):
+            raise FullRecomputeRequired("the longest time window outgrew the block the stored rows were summed in")
+        return {'matrix': matrix, 'windows': resolved, 'shift': shift, 'offset': offset, 'window_block': block,
+                'tail_rows': tail_rows, 'longest': longest}
+
+    def advance(self, values: np.ndarray, times: np.ndarray, windows: List, context: Dict = None):
+        """Takes the new rows in: row count, accumulators, the longest time window and the trimmed tail."""
+        context = context or self.context(values, times, windows)
+        shift = context['shift']
+        self.carry = [expanding_carry(values[:, j], shift[j], self.carry[j]) for j in range(values.shape[1])]
+        self.shift = np.where(np.isnan(self.shift) & ~np.isnan(values).all(axis=0), shift, self.shift)
+        self.n_rows += len(values)
+        self.longest = context['longest']
+        start = tail_start(self.n_rows, [w for w in windows if isinstance(w, int)], context['window_block'])
+        keep = start - context['offset']
+        self.values = context['matrix'][keep:].copy()
+        if self.times is not None:
+            self.times = np.concatenate([self.times, times])[keep:]
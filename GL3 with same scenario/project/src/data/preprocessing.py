@@ -2,15 +2,25 @@ import os
 import sys
 import getpass
 import logging
-import hashlib
 import json
+from collections import Counter
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import OneHotEncoder, LabelEncoder, StandardScaler, MinMaxScaler
+from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from pandas.api.types import is_numeric_dtype, is_object_dtype, is_categorical_dtype
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.artifact_io import (read_frame, write_frame, is_supported_artifact, infer_format, FrameWriter,
+                               secure_file_permissions)
+from utils.hashing import artifact_checksum
+from utils.dtypes import compact_dtypes, DTYPE_POLICIES
+from data.encoding import CategoricalEncoder
+from data.compiled import CompiledPreprocessor
+from data.column_stats import ColumnStats
+from utils.parallel import ColumnBlockExecutor, PARALLEL_BACKENDS
+
 # Try to import mlflow and dvc for versioning (optional and robust to environment)
 try:
     import mlflow
@@ -33,30 +43,18 @@ logging.basicConfig(
 
 # --- Utility Functions for Reproducibility & Security ---
 def validate_file(filepath: str) -> bool:
-    """Checks if file exists and is a CSV."""
-    if not os.path.isfile(filepath):
+    """Checks if the artifact exists and is a CSV or a supported binary format (parquet/feather/npy)."""
+    if not os.path.exists(filepath):
         logging.error(f"File '{filepath}' does not exist.")
         return False
-    if not filepath.lower().endswith('.csv'):
-        logging.error(f"File '{filepath}' is not a CSV file.")
+    if not is_supported_artifact(filepath):
+        logging.error(f"File '{filepath}' is not a CSV file or supported binary artifact.")
         return False
     return True
 
 def get_file_checksum(filepath: str, algo: str = 'sha256') -> str:
-    """Computes hash/checksum (SHA256 by default) of the file for provenance."""
-    hash_func = hashlib.new(algo)
-    with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_func.update(chunk)
-    return hash_func.hexdigest()
-
-def secure_file_permissions(filepath: str):
-    """Set output file to owner read/write only (POSIX) and log exception otherwise."""
-    try:
-        os.chmod(filepath, 0o600)
-        logging.info(f"Restricted permissions for {filepath} to owner only.")
-    except Exception as e:
-        logging.warning(f"Could not set secure permissions for {filepath}: {e}")
+    """Computes hash/checksum (SHA256 by default) of the file (or directory artifact) for provenance; unchanged files are served from the shared hash cache."""
+    return artifact_checksum(filepath, algo)
 
 # --- Versioning/Audit Trail Functions ---
 def get_git_commit() -> str:
@@ -76,10 +74,12 @@ def save_run_metadata(
     scaler_path: str,
     pipeline_config: dict,
     user: str,
-    run_id: str
+    run_id: str,
+    data_profile: dict = None
 ):
     """
-    Saves a JSON metadata containing audit trail and pipeline info.
+    Saves a JSON metadata containing audit trail and pipeline info, plus the per-column data profile
+    (count, nulls, mean, std, skew, min, max of the raw numeric columns) when given.
     """
     metadata = {
         "input_path": input_path,
@@ -94,6 +94,8 @@ def save_run_metadata(
         "run_id": run_id,
         "script": os.path.basename(__file__)
     }
+    if data_profile is not None:
+        metadata["data_profile"] = data_profile
     meta_path = os.path.splitext(output_path)[0] + f"_metadata_{run_id}.json"
     with open(meta_path, 'w') as f:
         json.dump(metadata, f, indent=2)
@@ -110,61 +112,92 @@ def detect_target_leakage(df: pd.DataFrame, target: str = 'target'):
 
 # --- Main Preprocessing Pipeline Functions ---
 def load_data(input_path: str) -> pd.DataFrame:
-    """Loads CSV and logs size/info with error handling."""
+    """Loads CSV (or binary artifact) and logs size/info with error handling."""
     if not validate_file(input_path):
-        raise FileNotFoundError(f"{input_path} does not exist or is not a CSV.")
+        raise FileNotFoundError(f"{input_path} does not exist or is not a supported data file.")
     try:
-        df = pd.read_csv(input_path)
+        df = read_frame(input_path)
         logging.info(f"Loaded data from {input_path} with shape {df.shape}")
     except Exception as e:
         logging.error(f"Failed to load input data: {e}")
         raise
     return df
 
-def save_data(df: pd.DataFrame, output_path: str):
-    """Saves cleaned DataFrame to CSV & sets file permissions."""
-    df.to_csv(output_path, index=False)
+def split_passthrough(df: pd.DataFrame, passthrough_cols) -> pd.DataFrame:
+    """
+    Removes the passthrough columns (identifiers such as the machine id that later stages group by) from df
+    in place and returns them, untouched, as a frame of their own.
+    """
+    passthrough_cols = list(passthrough_cols or [])
+    missing = [c for c in passthrough_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Passthrough columns not in the input: {missing}")
+    kept = df[passthrough_cols]
+    df.drop(columns=passthrough_cols, inplace=True)
+    return kept
+
+def save_data(df: pd.DataFrame, output_path: str, csv_export: bool = False):
+    """Saves cleaned DataFrame in the format implied by output_path (CSV/parquet/feather/npy) & sets file permissions."""
+    write_frame(df, output_path, csv_export=csv_export)
     secure_file_permissions(output_path)
     logging.info(f"Cleaned data saved to {output_path}")
 
-def impute_missing_values(df: pd.DataFrame) -> pd.DataFrame:
-    """Impute numeric as mean and categorical as most_frequent with explicit metadata."""
+def _with_columns(df: pd.DataFrame, columns: list, values: np.ndarray) -> pd.DataFrame:
+    """
+    df with `columns` replaced by the (n_rows, len(columns)) array values, joined to the other columns by one
+    concat (as FeatureBlocks does) and kept in df's column order.
+    """
+    block = pd.DataFrame(values, columns=columns, index=df.index, copy=False)
+    if len(columns) == df.shape[1]:
+        return block[list(df.columns)]
+    return pd.concat([df.drop(columns=columns), block], axis=1)[list(df.columns)]
+
+def _fill_block(block: np.ndarray, out: np.ndarray, columns: slice, fill: np.ndarray):
+    out[:] = block
+    np.copyto(out, fill[columns], where=np.isnan(block))
+
+def impute_missing_values(df: pd.DataFrame, return_fill_values: bool = False, stats: ColumnStats = None,
+                          executor: ColumnBlockExecutor = None):
+    """
+    Impute numeric as mean and categorical as most_frequent with explicit metadata.
+    Numeric means come from the column statistics kernel (computed here unless `stats` is given).
+    With return_fill_values=True also returns {column: fill value} for reuse at scoring time.
+    A parallel executor fills the numeric columns block by block.
+    """
     num_cols = [c for c in df.columns if is_numeric_dtype(df[c])]
     cat_cols = [c for c in df.columns if is_object_dtype(df[c]) or is_categorical_dtype(df[c])]
+    fill_values = {}
     if num_cols:
-        num_imputer = SimpleImputer(strategy='mean')
-        df[num_cols] = num_imputer.fit_transform(df[num_cols])
+        stats = ColumnStats.from_frame(df, num_cols) if stats is None else stats.select(num_cols)
+        empty = [c for c, n in zip(num_cols, stats.count) if n == 0]
+        if empty:
+            raise ValueError(f"Numeric columns have no observed values to impute from: {empty}")
+        if executor is not None and executor.parallel:
+            filled = executor.transform(_fill_block, executor.matrix(df, num_cols, np.float64), fill=stats.mean)
+        else:
+            filled = df[num_cols].to_numpy(np.float64, copy=True)
+            np.copyto(filled, stats.mean, where=np.isnan(filled))
+        df = _with_columns(df, num_cols, filled)
+        fill_values.update(zip(num_cols, stats.mean))
         logging.info(f"Imputed missing values for numeric columns: {num_cols}")
     if cat_cols:
         cat_imputer = SimpleImputer(strategy='most_frequent')
         df[cat_cols] = cat_imputer.fit_transform(df[cat_cols])
+        fill_values.update(zip(cat_cols, cat_imputer.statistics_))
         logging.info(f"Imputed missing values for categorical columns: {cat_cols}")
-    return df
+    return (df, fill_values) if return_fill_values else df
 
-def encode_categorical(df: pd.DataFrame):
+def encode_categorical(df: pd.DataFrame, max_onehot: int = 50, high_cardinality: str = 'frequency',
+                       n_hash_features: int = 32):
     """
-    Encode object dtypes as one-hot or label encoded. Returns: transformed df, encoder objects as dict.
-    Persists encoder objects for reproducibility.
+    Encode object dtypes by cardinality: label codes for <=2 categories, one-hot up to max_onehot, then
+    frequency or hashed encoding. All columns are fitted in one pass and one-hot/hash blocks are appended
+    with a single concat. Returns: transformed df and the fitted CategoricalEncoder (persisted for reuse).
     """
     object_cols = [c for c in df.columns if is_object_dtype(df[c])]
-    encoders = {}
-    for col in object_cols:
-        n_unique = df[col].nunique()
-        if n_unique > 2:
-            ohe = OneHotEncoder(sparse=False, handle_unknown='ignore')
-            vals = ohe.fit_transform(df[[col]])
-            feature_labels = [f"{col}__{cat}" for cat in ohe.categories_[0]]
-            df_ohe = pd.DataFrame(vals, columns=feature_labels, index=df.index)
-            df = df.drop(col, axis=1)
-            df = pd.concat([df, df_ohe], axis=1)
-            encoders[col] = ('ohe', ohe)
-            logging.info(f"Applied OneHotEncoding to column {col}")
-        else:
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col])
-            encoders[col] = ('le', le)
-            logging.info(f"Applied LabelEncoding to column {col}")
-    return df, encoders
+    encoder = CategoricalEncoder(max_onehot=max_onehot, high_cardinality=high_cardinality,
+                                 n_hash_features=n_hash_features).fit(df, object_cols)
+    return encoder.transform(df), encoder
 
 def save_encoders(encoders: dict, path: str):
     """
@@ -175,56 +208,342 @@ def save_encoders(encoders: dict, path: str):
     secure_file_permissions(path)
     logging.info(f"Encoder/scaler objects saved to {path}")
 
-def scale_features(df: pd.DataFrame):
+def save_compiled_preprocessor(numeric_cols, object_cols, fill_values, encoder, scaler, output_cols,
+                               target: str, path: str) -> CompiledPreprocessor:
+    """
+    Folds the fitted imputation values, encoder and scaler into a CompiledPreprocessor for scoring (target
+    excluded) and persists it with joblib next to the encoders.
+    """
+    compiled = CompiledPreprocessor.from_fitted(numeric_cols, object_cols, fill_values, encoder, scaler,
+                                                output_cols, exclude=[target])
+    save_encoders(compiled, path)
+    return compiled
+
+def _nonzero_scale(scale: np.ndarray) -> np.ndarray:
+    """Replaces (near) zero scales by 1, as sklearn's scalers do for constant features."""
+    scale = scale.copy()
+    scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+    return scale
+
+def build_scaler(stats: ColumnStats):
+    """
+    Chooses and parameterizes the scaler from column statistics alone: MinMaxScaler if any column has
+    |skew| > 1, otherwise StandardScaler, with the attributes sklearn's fit would set.
+    """
+    if (np.abs(stats.skew()) > 1).any():
+        scaler = MinMaxScaler()
+        scaler.data_min_, scaler.data_max_ = stats.min.copy(), stats.max.copy()
+        scaler.data_range_ = scaler.data_max_ - scaler.data_min_
+        scaler.scale_ = 1.0 / _nonzero_scale(scaler.data_range_)
+        scaler.min_ = 0.0 - scaler.data_min_ * scaler.scale_
+    else:
+        scaler = StandardScaler()
+        scaler.mean_ = stats.mean.copy()
+        scaler.var_ = stats.variance()
+        scaler.scale_ = _nonzero_scale(np.sqrt(scaler.var_))
+    scaler.n_samples_seen_ = int(stats.count.max()) if len(stats.count) else 0
+    scaler.n_features_in_ = len(stats.columns)
+    scaler.feature_names_in_ = np.asarray(stats.columns, dtype=object)
+    logging.info(f"Used {scaler.__class__.__name__} for columns: {stats.columns}")
+    return scaler
+
+def _scale_block(block: np.ndarray, out: np.ndarray, columns: slice, scaler):
+    # The same operations, in the same order, as the scaler's own transform
+    out[:] = block
+    if isinstance(scaler, MinMaxScaler):
+        out *= scaler.scale_[columns]
+        out += scaler.min_[columns]
+    else:
+        out -= scaler.mean_[columns]
+        out /= scaler.scale_[columns]
+
+def scale_features(df: pd.DataFrame, stats: ColumnStats = None, executor: ColumnBlockExecutor = None):
     """
     Scale numeric features. Returns transformed df and scaler instance.
+    The skewness rule and scaler parameters read `stats` (covering the numeric columns) when given,
+    otherwise the statistics kernel runs over the numeric columns here. A parallel executor scales column
+    blocks concurrently.
     """
     numeric_cols = [c for c in df.columns if is_numeric_dtype(df[c])]
     if not numeric_cols:
         return df, None
-    values = df[numeric_cols].values
-    skewness = np.abs(pd.DataFrame(values, columns=numeric_cols).skew())
-    if (skewness > 1).any():
-        scaler = MinMaxScaler()
-        logging.info(f"Used MinMaxScaler for columns: {numeric_cols}")
+    stats = ColumnStats.from_frame(df, numeric_cols, executor) if stats is None else stats.select(numeric_cols)
+    scaler = build_scaler(stats)
+    if executor is not None and executor.parallel:
+        scaled = executor.transform(_scale_block, executor.matrix(df, numeric_cols, np.float64), scaler=scaler)
     else:
-        scaler = StandardScaler()
-        logging.info(f"Used StandardScaler for columns: {numeric_cols}")
-    scaled_values = scaler.fit_transform(df[numeric_cols])
-    df[numeric_cols] = scaled_values
-    return df, scaler
+        scaled = scaler.transform(df[numeric_cols])
+    return _with_columns(df, numeric_cols, scaled), scaler
+
+# --- Out-of-core (chunked) preprocessing ---
+# Pass 1 streams the CSV once to collect everything the in-memory path fits on the full frame (imputation
+# values, category vocabularies, column statistics); pass 2 transforms and writes one chunk at a time.
+# Peak memory is bounded by the chunk size plus the category vocabularies.
+def scan_statistics(input_path: str, chunksize: int) -> dict:
+    """
+    Pass 1: streams the CSV and returns row count, column order, the global kind of every column
+    (numeric unless any chunk parses it as text, mirroring a full read_csv), merged ColumnStats of the
+    numeric columns and the value counts (plus missing counts) of text columns.
+    """
+    n_rows, columns = 0, None
+    object_cols, seen_numeric = set(), set()
+    numeric_stats, counts, missing = ColumnStats.empty(), {}, {}
+    for chunk in pd.read_csv(input_path, chunksize=chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+        n_rows += len(chunk)
+        numeric_now = []
+        for col in columns:
+            series = chunk[col]
+            if col in object_cols or not is_numeric_dtype(series):
+                object_cols.add(col)
+                missing[col] = missing.get(col, 0) + int(series.isna().sum())
+                counts.setdefault(col, Counter()).update(series.value_counts(dropna=True).to_dict())
+            else:
+                numeric_now.append(col)
+        seen_numeric.update(numeric_now)
+        numeric_stats = numeric_stats.merge(ColumnStats.from_frame(chunk, numeric_now))
+    if columns is None:
+        raise ValueError(f"{input_path} contains no rows.")
+    # A column parsed as numbers in some chunks but text in others is text for a full read, which keeps
+    # the raw strings; re-count just those columns read as text.
+    rescan = [c for c in columns if c in object_cols and c in seen_numeric]
+    if rescan:
+        logging.info(f"Re-scanning mixed-type columns as text: {rescan}")
+        for col in rescan:
+            counts[col], missing[col] = Counter(), 0
+        for chunk in pd.read_csv(input_path, chunksize=chunksize, usecols=rescan, dtype={c: object for c in rescan}):
+            for col in rescan:
+                missing[col] += int(chunk[col].isna().sum())
+                counts[col].update(chunk[col].value_counts(dropna=True).to_dict())
+    numeric_cols = [c for c in columns if c not in object_cols]
+    return {
+        'n_rows': n_rows,
+        'columns': columns,
+        'object_cols': [c for c in columns if c in object_cols],
+        'numeric_cols': numeric_cols,
+        'numeric_stats': numeric_stats.select(numeric_cols),
+        'counts': {c: counts[c] for c in columns if c in object_cols},
+        'missing': missing,
+    }
+
+def fit_from_statistics(stats: dict, encoder: CategoricalEncoder = None) -> dict:
+    """
+    Builds the transformers the in-memory path would fit on the full frame from pass-1 statistics:
+    mean / most-frequent fill values, the categorical encoder over the global value counts and the scaler
+    chosen by the same skewness rule, with its parameters derived from exact statistics of every output column.
+    """
+    encoder = encoder or CategoricalEncoder()
+    n_rows = stats['n_rows']
+    numeric_stats = stats['numeric_stats']
+    empty = [c for c, n in zip(numeric_stats.columns, numeric_stats.count) if n == 0]
+    if empty:
+        raise ValueError(f"Numeric columns have no observed values to impute from: {empty}")
+    fill_values = dict(zip(numeric_stats.columns, numeric_stats.mean))
+    imputed_counts = {}
+    for col in stats['object_cols']:
+        counts = Counter(stats['counts'][col])
+        if not counts:
+            raise ValueError(f"Categorical column '{col}' has no observed values to impute from.")
+        top = max(counts.values())
+        # Same tie-break as SimpleImputer(strategy='most_frequent'): the smallest of the most frequent values
+        fill_values[col] = min(v for v, c in counts.items() if c == top)
+        counts[fill_values[col]] += stats['missing'][col]
+        imputed_counts[col] = counts
+    encoder.fit_counts(imputed_counts, n_rows)
+    appended = [name for col in stats['object_cols'] if encoder.plans_[col]['kind'] in ('onehot', 'hash')
+                for name in encoder.output_columns(col)]
+    output_cols = [c for c in stats['columns'] if c not in appended and
+                   (c not in encoder.plans_ or encoder.plans_[c]['kind'] in ('label', 'frequency'))] + appended
+    # Mean imputation adds rows at the mean: central sums are unchanged, the count becomes n_rows
+    output_stats = ColumnStats.concat([numeric_stats.imputed(), ColumnStats.from_counts(encoder.output_distributions())])
+    scaler = build_scaler(output_stats.select(output_cols))
+    return {'fill_values': fill_values, 'encoder': encoder, 'scaler': scaler, 'output_cols': output_cols}
+
+def exclude_passthrough(stats: dict, passthrough_cols) -> tuple:
+    """
+    Drops the passthrough columns from pass-1 statistics. Returns (stats, passthrough) where passthrough maps
+    each column to its sorted global categories (None for numeric columns), so that every chunk writes a text
+    identifier with the same categories a full read would give it.
+    """
+    passthrough_cols = list(passthrough_cols or [])
+    missing = [c for c in passthrough_cols if c not in stats['columns']]
+    if missing:
+        raise ValueError(f"Passthrough columns not in the input: {missing}")
+    passthrough = {c: sorted(stats['counts'][c]) if c in stats['object_cols'] else None for c in passthrough_cols}
+    numeric_cols = [c for c in stats['numeric_cols'] if c not in passthrough]
+    stats = dict(stats,
+                 columns=[c for c in stats['columns'] if c not in passthrough],
+                 object_cols=[c for c in stats['object_cols'] if c not in passthrough],
+                 numeric_cols=numeric_cols,
+                 numeric_stats=stats['numeric_stats'].select(numeric_cols),
+                 counts={c: v for c, v in stats['counts'].items() if c not in passthrough})
+    return stats, passthrough
+
+def transform_chunk(chunk: pd.DataFrame, stats: dict, fitted: dict) -> pd.DataFrame:
+    """
+    Pass 2: imputes, encodes and scales one chunk with the globally fitted transformers. Passthrough columns
+    are set aside and put back in front, text ones as categoricals over their global categories.
+    """
+    passthrough = fitted.get('passthrough', {})
+    kept = pd.DataFrame({col: chunk.pop(col) if categories is None else pd.Categorical(chunk.pop(col), categories=categories)
+                         for col, categories in passthrough.items()}, index=chunk.index)
+    numeric_cols = stats['numeric_cols']
+    if numeric_cols:
+        filled = chunk[numeric_cols].to_numpy(np.float64, copy=True)
+        np.copyto(filled, np.array([fitted['fill_values'][col] for col in numeric_cols]), where=np.isnan(filled))
+        chunk = _with_columns(chunk, numeric_cols, filled)
+    for col in stats['object_cols']:
+        chunk[col] = chunk[col].fillna(fitted['fill_values'][col])
+    chunk = fitted['encoder'].transform(chunk)
+    cols = fitted['output_cols']
+    chunk = _with_columns(chunk, cols, fitted['scaler'].transform(chunk[cols]))
+    return pd.concat([kept, chunk], axis=1) if passthrough else chunk
+
+def preprocess_chunked(input_path: str, output_path: str, chunksize: int, csv_export: bool = False,
+                       encoder: CategoricalEncoder = None, dtype_policy: str = 'float64', target: str = None,
+                       passthrough_cols=None):
+    """
+    Two-pass out-of-core preprocessing of a CSV; writes the same frame as the in-memory path (up to
+    floating-point summation order). encoder carries the encoding options (fitted here); dtype_policy is
+    applied to each written chunk (target excluded); passthrough_cols are written unchanged in front.
+    Returns (n_rows, encoder, scaler, fitted) where fitted also holds the fill values, output columns and
+    the raw numeric ColumnStats.
+    """
+    stats = scan_statistics(input_path, chunksize)
+    logging.info(f"PROGRESS preprocess: scanned rows={stats['n_rows']} in chunks of {chunksize}")
+    dtypes = {c: object for c in stats['object_cols']}
+    stats, passthrough = exclude_passthrough(stats, passthrough_cols)
+    fitted = fit_from_statistics(stats, encoder)
+    fitted['passthrough'] = passthrough
+    with FrameWriter(output_path, n_rows=stats['n_rows'], csv_export=csv_export) as writer:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize, dtype=dtypes):
+            writer.write(compact_dtypes(transform_chunk(chunk, stats, fitted), exclude=[target], policy=dtype_policy))
+            logging.info(f"PROGRESS preprocess: wrote rows={writer.rows_written}/{stats['n_rows']}")
+    fitted.update(numeric_cols=stats['numeric_cols'], object_cols=stats['object_cols'],
+                  numeric_stats=stats['numeric_stats'])
+    return stats['n_rows'], fitted['encoder'], fitted['scaler'], fitted
+
+def _log_to_mlflow(output_path: str, encoders_path: str, scaler_path: str):
+    if os.path.isdir(output_path):
+        mlflow.log_artifacts(output_path, artifact_path=os.path.basename(output_path))
+    else:
+        mlflow.log_artifact(output_path)
+    mlflow.log_artifact(encoders_path)
+    if scaler_path: mlflow.log_artifact(scaler_path)
+    logging.info("Logged artifacts to MLflow.")
+
+def _encoding_description(encoding: dict) -> str:
+    return (f"label<=2 categories; onehot<={encoding['max_onehot']}; above: {encoding['high_cardinality']}"
+            + (f" ({encoding['n_hash_features']} buckets)" if encoding['high_cardinality'] == 'hash' else ''))
+
+def _run_pipeline_chunked(input_path, output_path, encoders_path, scaler_path, target, csv_export, chunksize,
+                          encoding, compiled_path, dtype_policy, input_checksum, user, run_id,
+                          passthrough_cols=None) -> str:
+    if not validate_file(input_path):
+        raise FileNotFoundError(f"{input_path} does not exist or is not a supported data file.")
+    detect_target_leakage(pd.read_csv(input_path, nrows=0), target=target)
+    n_rows, encoder, scaler, fitted = preprocess_chunked(input_path, output_path, chunksize, csv_export=csv_export,
+                                                         encoder=CategoricalEncoder(**encoding),
+                                                         dtype_policy=dtype_policy, target=target,
+                                                         passthrough_cols=passthrough_cols)
+    save_encoders(encoder, encoders_path)
+    save_encoders(scaler, scaler_path)
+    save_compiled_preprocessor(fitted['numeric_cols'], fitted['object_cols'], fitted['fill_values'], encoder, scaler,
+                               fitted['output_cols'], target, compiled_path)
+    secure_file_permissions(output_path)
+    logging.info(f"Cleaned data saved to {output_path}")
+    pipeline_config = {
+        'imputation': 'numeric=mean; categorical=most_frequent',
+        'categorical_encoding': _encoding_description(encoding),
+        'scaling': scaler.__class__.__name__,
+        'chunksize': chunksize,
+        'dtype_policy': dtype_policy,
+        'passthrough_cols': list(passthrough_cols or []),
+    }
+    save_run_metadata(output_path=output_path, input_path=input_path, input_checksum=input_checksum,
+                      encoders_path=encoders_path, scaler_path=scaler_path, pipeline_config=pipeline_config,
+                      user=user, run_id=run_id, data_profile=fitted['numeric_stats'].to_profile())
+    if MLFLOW_AVAILABLE:
+        _log_to_mlflow(output_path, encoders_path, scaler_path)
+    logging.info(f"Preprocessing pipeline completed successfully ({n_rows} rows, out of core).")
+    return output_path
 
 def run_pipeline(
     input_path: str,
     output_path: str,
     encoders_path: str,
     scaler_path: str,
-    target: str = 'target'
+    target: str = 'target',
+    csv_export: bool = False,
+    chunksize: int = None,
+    max_onehot: int = 50,
+    high_cardinality: str = 'frequency',
+    n_hash_features: int = 32,
+    compiled_path: str = None,
+    dtype_policy: str = 'compact',
+    n_workers: int = 1,
+    parallel_backend: str = 'threads',
+    passthrough_cols=None
 ):
     """
     Complete preprocessing pipeline with reproducibility, provenance, audit, leakage check, and error handling.
+    Returns the preprocessed DataFrame so in-process callers can hand it to the next stage without re-reading CSV.
+    With chunksize set (CSV input), runs out of core in two passes and returns output_path instead of a frame.
+    Categorical columns above max_onehot categories get high_cardinality ('frequency' or 'hash') encoding.
+    The fitted steps are also saved as a CompiledPreprocessor at compiled_path (default: next to the encoders).
+    The output frame follows dtype_policy ('compact': float32 features, see utils.dtypes; target untouched).
+    n_workers spreads the per-column statistics, imputation and scaling over column blocks on a pool of
+    parallel_backend ('threads' or 'processes') workers (in-memory path only).
+    passthrough_cols (e.g. the machine id the feature stage partitions by) skip imputation, encoding and
+    scaling and lead the output unchanged.
     """
+    compiled_path = compiled_path or os.path.join(os.path.dirname(encoders_path), 'preprocessor_compiled.joblib')
+    encoding = {'max_onehot': max_onehot, 'high_cardinality': high_cardinality, 'n_hash_features': n_hash_features}
     run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
     user = getpass.getuser() if hasattr(getpass, 'getuser') else 'unknown'
     input_checksum = get_file_checksum(input_path)
+    if chunksize and validate_file(input_path) and infer_format(input_path) != 'csv':
+        logging.warning(f"Chunked preprocessing reads CSV input only; loading {input_path} in memory.")
+        chunksize = None
+    executor = ColumnBlockExecutor(n_workers, parallel_backend)
     try:
+        if chunksize:
+            return _run_pipeline_chunked(input_path, output_path, encoders_path, scaler_path, target, csv_export,
+                                         chunksize, encoding, compiled_path, dtype_policy,
+                                         input_checksum, user, run_id, passthrough_cols)
         df = load_data(input_path)
+        logging.info(f"PROGRESS preprocess: loaded rows={len(df)}")
         detect_target_leakage(df, target=target)
-        pipeline_config = {}
+        kept = split_passthrough(df, passthrough_cols)
+        pipeline_config = {'passthrough_cols': list(kept.columns)}
+        # --- Column statistics: one sweep feeds imputation, the skewness rule, scaling and the data profile ---
+        profile = ColumnStats.from_frame(df, [c for c in df.columns if is_numeric_dtype(df[c])], executor)
         # --- Impute missing ---
-        df = impute_missing_values(df)
+        df, fill_values = impute_missing_values(df, return_fill_values=True, stats=profile, executor=executor)
         pipeline_config['imputation'] = 'numeric=mean; categorical=most_frequent'
+        logging.info(f"PROGRESS preprocess: imputed rows={len(df)}")
         # --- Encode categorical ---
-        df, encoders = encode_categorical(df)
-        save_encoders(encoders, encoders_path)
-        pipeline_config['categorical_encoding'] = 'Label/OneHot per unique count'
+        df, encoder = encode_categorical(df, **encoding)
+        save_encoders(encoder, encoders_path)
+        pipeline_config['categorical_encoding'] = _encoding_description(encoding)
+        logging.info(f"PROGRESS preprocess: encoded rows={len(df)} columns={df.shape[1]}")
         # --- Scale numeric ---
-        df, scaler = scale_features(df)
+        df, scaler = scale_features(df, stats=ColumnStats.concat(
+            [profile.imputed(), ColumnStats.from_counts(encoder.output_distributions())]), executor=executor)
         if scaler is not None:
             save_encoders(scaler, scaler_path)
         pipeline_config['scaling'] = scaler.__class__.__name__ if scaler else None
+        logging.info(f"PROGRESS preprocess: scaled rows={len(df)}")
+        save_compiled_preprocessor([c for c in fill_values if c not in encoder.plans_], list(encoder.plans_), fill_values,
+                                   encoder, scaler, list(df.columns), target, compiled_path)
         # --- Save output ---
-        save_data(df, output_path)
+        if kept.shape[1]:
+            df = pd.concat([kept, df], axis=1)
+        df = compact_dtypes(df, exclude=[target], policy=dtype_policy)
+        pipeline_config['dtype_policy'] = dtype_policy
+        save_data(df, output_path, csv_export=csv_export)
+        logging.info(f"PROGRESS preprocess: wrote rows={len(df)} to {output_path}")
         # --- Run metadata ---
         save_run_metadata(
             output_path=output_path,
@@ -234,17 +553,18 @@ def run_pipeline(
             scaler_path=scaler_path,
             pipeline_config=pipeline_config,
             user=user,
-            run_id=run_id
+            run_id=run_id,
+            data_profile=profile.to_profile()
         )
         if MLFLOW_AVAILABLE:
-            mlflow.log_artifact(output_path)
-            mlflow.log_artifact(encoders_path)
-            if scaler_path: mlflow.log_artifact(scaler_path)
-            logging.info("Logged artifacts to MLflow.")
+            _log_to_mlflow(output_path, encoders_path, scaler_path)
         logging.info("Preprocessing pipeline completed successfully.")
+        return df
     except Exception as e:
         logging.error(f"Critical failure during preprocessing: {e}")
         sys.exit(2)
+    finally:
+        executor.close()
 
 def main():
     """
@@ -253,12 +573,34 @@ def main():
     import argparse
     parser = argparse.ArgumentParser(description="Data Preprocessing Pipeline with Audit Trail and Versioning")
     parser.add_argument('--input', required=True, help='Path to raw CSV data file')
-    parser.add_argument('--output', required=True, help='Path to save cleaned CSV data file')
+    parser.add_argument('--output', required=True, help='Path to save cleaned data; the extension picks the format (.csv, .parquet, .feather, .npy directory)')
     parser.add_argument('--encoders', required=False, default='encoders.joblib', help='Path to save encoder objects (joblib)')
     parser.add_argument('--scaler', required=False, default='scaler.joblib', help='Path to save scaler object (joblib)')
     parser.add_argument('--target', required=False, default='target', help='Name of target column to check for leakage')
+    parser.add_argument('--csv_export', action='store_true', help='Also write a human-facing CSV copy of a binary output')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Rows per chunk: preprocess a CSV out of core in two streaming passes (default: in memory)')
+    parser.add_argument('--compiled', required=False, default=None,
+                        help='Path to save the CompiledPreprocessor for scoring (default: next to --encoders)')
+    parser.add_argument('--dtype_policy', default='compact', choices=list(DTYPE_POLICIES),
+                        help='compact: float32 features, uint8 flags, category strings; float64: pandas defaults')
+    parser.add_argument('--max_onehot', type=int, default=50,
+                        help='Most categories a column may have to be one-hot encoded')
+    parser.add_argument('--high_cardinality', default='frequency', choices=['frequency', 'hash'],
+                        help='Encoding for columns above --max_onehot categories')
+    parser.add_argument('--n_hash_features', type=int, default=32, help='Hash buckets per column for --high_cardinality hash')
+    parser.add_argument('--n_workers', type=int, default=1,
+                        help='Workers for the per-column statistics, imputation and scaling (parallel column blocks)')
+    parser.add_argument('--passthrough_cols', default='',
+                        help='Comma-separated identifier columns (e.g. machine_id) written through unprocessed')
+    parser.add_argument('--parallel_backend', default='threads', choices=list(PARALLEL_BACKENDS),
+                        help='Pool for --n_workers: threads, or processes sharing the data through /dev/shm')
     args = parser.parse_args()
-    run_pipeline(args.input, args.output, args.encoders, args.scaler, args.target)
+    run_pipeline(args.input, args.output, args.encoders, args.scaler, args.target, csv_export=args.csv_export,
+                 chunksize=args.chunksize, max_onehot=args.max_onehot, high_cardinality=args.high_cardinality,
+                 n_hash_features=args.n_hash_features, compiled_path=args.compiled,
+                 dtype_policy=args.dtype_policy, n_workers=args.n_workers, parallel_backend=args.parallel_backend,
+                 passthrough_cols=[c.strip() for c in args.passthrough_cols.split(',') if c.strip()])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,431 @@
+from typing import Sequence, Union
+
+import numpy as np
+
+ROLLING_FUNCS = ('mean', 'std', 'min', 'max')
+_EXTREMES = (('min', np.fmin), ('max', np.fmax))
+
+
+def row_window_starts(n_rows: int, window: int) -> np.ndarray:
+    """First row of the trailing `window`-row window ending at every row (pandas rolling(window))."""
+    return np.maximum(np.arange(n_rows, dtype=np.int64) - (window - 1), 0)
+
+
+def time_window_starts(times: np.ndarray, duration: np.timedelta64) -> np.ndarray:
+    """
+    First row of the window (t - duration, t] ending at every row of the ascending datetime64 `times`
+    (pandas rolling('5min') on a time index). One vectorized binary search per row, computed once and shared
+    by every column.
+    """
+    return np.searchsorted(times, times - duration, side='right').astype(np.int64)
+
+
+def first_observed(values: np.ndarray) -> float:
+    """The value the expanding sums of a column are centred on: its first non-missing value (0.0 if none)."""
+    observed = np.flatnonzero(~np.isnan(values))
+    return float(values[observed[0]]) if observed.size else 0.0
+
+
+def longest_window(starts: np.ndarray, first_row: int = 0) -> int:
+    """Rows in the longest window ending at or after first_row, for a start array."""
+    return int((np.arange(first_row, len(starts)) - starts[first_row:]).max(initial=-1)) + 1
+
+
+def window_block(longest: int) -> int:
+    """Restart interval of the start-window sums: the power of two >= the longest window (so it rarely changes)."""
+    return 1 << max(int(longest) - 1, 0).bit_length()
+
+
+def window_blocks(starts: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    window_block of the longest window ending at or before every row, over the start arrays of one partition:
+    the block each row's sums use, so no row depends on later ones (as in a streaming pass, see data.streaming).
+    """
+    rows = np.arange(len(starts[0]), dtype=np.int64)
+    longest = np.maximum.accumulate(np.max([rows - s for s in starts], axis=0)) + 1 if len(rows) else rows
+    return np.left_shift(1, np.frexp(np.maximum(longest - 1, 0))[1].astype(np.int64))
+
+
+def expanding_carry(values: np.ndarray, shift: float, carry: dict = None) -> dict:
+    """
+    Expanding accumulators (count, centred sum and sum of squares, min, max) after the last row of values,
+    continuing `carry` (the accumulators after the preceding rows). Same operations as expanding_aggregate,
+    so feeding them back in reproduces a single pass over all rows exactly.
+    """
+    column = _Column(values, shift=shift, carry=carry)
+    stats = column.stats(None, {'mean', 'std', 'min', 'max'})
+    if not column.n:
+        return dict(column.carry)
+    return {name: float(stats[name][-1]) for name in ('count', 'sum', 'sumsq', 'min', 'max')}
+
+
+def _with_carry(first: float, values: np.ndarray) -> np.ndarray:
+    return np.concatenate(([first], values))
+
+
+def _blocked(values: np.ndarray, block: int, fill: float) -> np.ndarray:
+    """values padded with `fill` to a multiple of block and reshaped to (n_blocks, block)."""
+    padded = np.full(-(-len(values) // block) * block, fill)
+    padded[:len(values)] = values
+    return padded.reshape(-1, block)
+
+
+def _edge_observed(blocks: np.ndarray, valid: np.ndarray, last: bool = False) -> np.ndarray:
+    """First (or last) non-missing value of every row of blocks, 0.0 for rows without one."""
+    rows = np.arange(len(blocks))
+    index = blocks.shape[1] - 1 - valid[:, ::-1].argmax(axis=1) if last else valid.argmax(axis=1)
+    return np.where(valid.any(axis=1), blocks[rows, index], 0.0)
+
+
+# --- Window sums: values centred on the column's first observed value (`shift`) in prefix sums restarting every
+# block (a row-count window, or a power of two covering the longest start window so far; see window_blocks)
+# counted from the partition start, so every window sum is a few short partial sums. Where that centring cancels in the std
+# (a window far from shift relative to its spread, e.g. after a level shift), finish_window re-sums the window
+# from its parts in its own and the previous block, each centred on its own block (_block_parts).
+
+def _local_prefix(values: np.ndarray, block: int, pad: int) -> np.ndarray:
+    """Prefix sums restarting every block rows, the first block starting pad rows before values[0]."""
+    padded = np.empty(-(-(pad + len(values)) // block) * block)
+    padded[:pad] = 0.0
+    padded[pad:pad + len(values)] = values
+    padded[pad + len(values):] = 0.0
+    return np.cumsum(padded.reshape(-1, block), axis=1)
+
+
+def _row_sums(values: np.ndarray, window: int, pad: int, scale: bool = False):
+    """
+    Trailing window sums (row k of block b: its own prefix plus the tail of block b - 1 after row k) and, with
+    scale, the magnitude of the partial sums they come from (own prefix plus the previous block's total).
+    """
+    local = _local_prefix(values, window, pad)
+    rows = slice(pad, pad + len(values))
+    magnitude = None
+    if scale:
+        magnitude = local.copy()
+        magnitude[1:] += local[:-1, -1:]
+        magnitude = magnitude.ravel()[rows]
+    local[1:] += local[:-1, -1:] - local[:-1]
+    return local.ravel()[rows], magnitude
+
+
+class _StartIndex:
+    """Where the windows given by their first rows meet the blocks: shared by the sums of every term."""
+
+    def __init__(self, starts: np.ndarray, block: int, pad: int):
+        self.block, self.pad = block, pad
+        first = starts + pad
+        self.start_block = first // block
+        self.before = np.maximum(first - 1, 0)
+        self.has_before = first % block != 0
+        self.crosses = self.start_block != np.arange(pad, pad + len(starts)) // block
+
+    def sums(self, values: np.ndarray, scale: bool = False):
+        """Window sums of values (own prefix minus the prefix before the first row, plus the previous block's total
+        when the window starts there) and, with scale, the magnitude of the partial sums they come from."""
+        local = _local_prefix(values, self.block, self.pad)
+        totals = np.where(self.crosses, local[:, -1][self.start_block], 0.0)
+        local = local.ravel()
+        own = local[self.pad:self.pad + len(values)]
+        sums = (own - np.where(self.has_before, local[self.before], 0.0)) + totals
+        return sums, (own + totals if scale else None)
+
+
+def _block_parts(values: np.ndarray, block: int, pad: int, blocks: np.ndarray) -> dict:
+    """
+    For the given blocks (rows of block values, the first starting pad rows before values[0]): prefix
+    count/sum/sumsq centred on each block's first observed value ('ref') and suffix sum/sumsq centred on its last
+    ('ref_a'), as (len(blocks), block) arrays.
+    """
+    rows = blocks[:, None] * block + (np.arange(block) - pad)
+    inside = (rows >= 0) & (rows < len(values))
+    x = np.where(inside, values[np.clip(rows, 0, max(len(values) - 1, 0))], np.nan)
+    valid = ~np.isnan(x)
+    first, last = _edge_observed(x, valid), _edge_observed(x, valid, last=True)
+    ahead = np.where(valid, x - first[:, None], 0.0)
+    behind = np.where(valid, x - last[:, None], 0.0)
+    return {'count': np.cumsum(valid, axis=1, dtype=np.float64), 'ref': first, 'ref_a': last,
+            'sum': np.cumsum(ahead, axis=1), 'sumsq': np.cumsum(ahead * ahead, axis=1),
+            'sum_a': np.cumsum(behind[:, ::-1], axis=1)[:, ::-1], 'sumsq_a': np.cumsum((behind * behind)[:, ::-1], axis=1)[:, ::-1]}
+
+
+def _merged_spread(parts: dict) -> np.ndarray:
+    """Sum of squared deviations of windows from their parts in two blocks (Chan et al.'s pairwise update)."""
+    count, count_a = parts['count'], parts['count_a']
+    count_b = count - count_a
+    mean_a = np.divide(parts['sum_a'], count_a, out=np.zeros(count.shape), where=count_a > 0)
+    mean_b = np.divide(parts['sum'], count_b, out=np.zeros(count.shape), where=count_b > 0)
+    gap = (mean_a - mean_b) + (parts['ref_a'] - parts['ref'])
+    spread = (parts['sumsq'] - parts['sum'] * mean_b) + (parts['sumsq_a'] - parts['sum_a'] * mean_a)
+    return spread + gap * gap * (count_a * count_b / count)
+
+
+def _shifted(values: np.ndarray, shift: int, ufunc) -> np.ndarray:
+    """ufunc(values[i], values[i - shift]), values[i] where i < shift."""
+    if not shift:
+        return values
+    result = np.empty_like(values)
+    result[:shift] = values[:shift]
+    ufunc(values[shift:], values[:-shift], out=result[shift:])
+    return result
+
+
+def _row_extremes(values: np.ndarray, windows: Sequence[int], ufunc) -> dict:
+    """
+    {window: ufunc over the trailing window} for NaN-ignoring fmin/fmax: extremes over 1, 2, 4, ... rows
+    are built by doubling once, then each window combines two overlapping power-of-two windows.
+    """
+    powers = {1: values}
+    while powers and max(powers) * 2 <= max(windows):
+        span = max(powers)
+        powers[span * 2] = _shifted(powers[span], span, ufunc)
+    result = {}
+    for window in windows:
+        span = 1 << (window.bit_length() - 1)
+        result[window] = _shifted(powers[span], window - span, ufunc)
+    return result
+
+
+def _sparse_table(values: np.ndarray, ufunc, max_length: int) -> np.ndarray:
+    """Level j holds ufunc over values[i:i + 2**j] (NaN-ignoring fmin/fmax), for 2**j <= max_length."""
+    levels = [values]
+    span = 1
+    while span * 2 <= max_length:
+        prev = levels[-1]
+        level = prev.copy()
+        level[:len(values) - span] = ufunc(prev[:len(values) - span], prev[span:])
+        levels.append(level)
+        span *= 2
+    return np.concatenate(levels)
+
+
+def _start_extreme(table: np.ndarray, starts: np.ndarray, ufunc, log2: np.ndarray) -> np.ndarray:
+    """ufunc over values[starts[i]:i + 1] from two overlapping power-of-two blocks of the flat sparse table."""
+    n = len(starts)
+    ends = np.arange(n)
+    level = log2[ends - starts + 1]
+    offset = level * n
+    return ufunc(table[offset + starts], table[offset + ends - (1 << level) + 1])
+
+
+class _Column:
+    """
+    One column prepared for a set of windows: values centred on `shift` (default: the first observed value,
+    which later rows never change), the prefix count of non-missing values, and the min/max structures shared
+    by the windows (power-of-two extremes for row-count windows, a sparse table for start-array windows).
+    values may be the tail of a partition: offset counts the partition rows before it, and carry holds the
+    expanding accumulators after them (see expanding_carry).
+    """
+
+    def __init__(self, values: np.ndarray, windows: Sequence = (), shift: float = None, offset: int = 0,
+                 block: int = None, carry: dict = None):
+        self.values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(self.values)
+        self.shift = first_observed(self.values) if shift is None else float(shift)
+        self.offset = offset
+        self.carry = carry or {'count': 0.0, 'sum': 0.0, 'sumsq': 0.0, 'min': np.nan, 'max': np.nan}
+        # Counts are whole numbers, exact in float64
+        self.valid_prefix = np.concatenate(([0.0], np.cumsum(valid, dtype=np.float64)))
+        self.centred = np.where(valid, self.values - self.shift, 0.0)
+        self.squares = self.centred * self.centred
+        self.n = len(self.values)
+        rows = [int(w) for w in windows if isinstance(w, (int, np.integer))]
+        starts = [w for w in windows if not isinstance(w, (int, np.integer))]
+        self.row_extremes = {name: _row_extremes(self.values, rows, ufunc) for name, ufunc in _EXTREMES} if rows else {}
+        self.tables = {}
+        if starts:
+            longest = max(longest_window(s) for s in starts)
+            self.segments = self._segments(window_blocks(starts) if block is None else block)
+            self.tables = {name: _sparse_table(self.values, ufunc, longest) for name, ufunc in _EXTREMES}
+            self.log2 = np.zeros(longest + 1, dtype=np.int64)
+            self.log2[2:] = np.floor(np.log2(np.arange(2, longest + 1))).astype(np.int64)
+
+    def stats(self, window, need: set) -> dict:
+        """
+        count/sum/sumsq of the centred values (and the magnitude of the partial sums behind sumsq), min/max
+        and the column's shift over each window (int rows, start array or None for expanding).
+        """
+        result = {'count': self.valid_prefix[1:].copy(), 'shift': self.shift}
+        count = result['count']
+        if window is None:
+            # Running sums continue the carried accumulators: one sequential pass, however the rows are split
+            count += self.carry['count']
+            if need & {'mean', 'std'}:
+                result['sum'] = np.cumsum(_with_carry(self.carry['sum'], self.centred))[1:]
+            if 'std' in need:
+                result['sumsq'] = np.cumsum(_with_carry(self.carry['sumsq'], self.squares))[1:]
+            result.update({name: ufunc.accumulate(_with_carry(self.carry[name], self.values))[1:]
+                           for name, ufunc in _EXTREMES if name in need})
+            return result
+        if isinstance(window, (int, np.integer)):
+            window = int(window)
+            if window < self.n:
+                count[window:] -= self.valid_prefix[1:self.n - window + 1]
+            pad = self.offset % window
+
+            def sums(values, scale=False):
+                return _row_sums(values, window, pad, scale)
+
+            def parts(rows):
+                return self._row_parts(window, rows, count)
+            result.update({name: self.row_extremes[name][window] for name, _ in _EXTREMES if name in need})
+        else:
+            count -= self.valid_prefix[window]
+
+            def sums(values, scale=False, starts=window):
+                return self._start_sums(starts, values, scale)
+
+            def parts(rows):
+                return self._start_parts(window, rows, count)
+            result.update({name: _start_extreme(self.tables[name], window, ufunc, self.log2)
+                           for name, ufunc in _EXTREMES if name in need})
+        if need & {'mean', 'std'}:
+            result['sum'] = sums(self.centred)[0]
+        if 'std' in need:
+            result['sumsq'], result['scale'] = sums(self.squares, scale=True)
+            result['parts'] = parts
+        return result
+
+    def _row_parts(self, window: int, rows: np.ndarray, count: np.ndarray) -> dict:
+        """_merged_spread parts of the row-count windows ending at rows: a prefix of their block, a suffix of the previous."""
+        pad = self.offset % window
+        block, k = np.divmod(rows + pad, window)
+        crosses = (k < window - 1) & (block > 0)
+        blocks = np.union1d(block, block[crosses] - 1)
+        parts = _block_parts(self.values, window, pad, blocks)
+        own = np.searchsorted(blocks, block)
+        previous, after = np.searchsorted(blocks, np.where(crosses, block - 1, block)), np.minimum(k + 1, window - 1)
+        return self._parts(parts, own, k, crosses, previous, after, count[rows])
+
+    def _segments(self, block) -> list:
+        """
+        Runs (first, start, stop, block) of rows sharing a block (one int, or one per row): rows [start, stop)
+        are summed from row first, the beginning of the block before start's, where a streaming pass re-sums.
+        """
+        if np.ndim(block):
+            bounds = np.concatenate(([0], np.flatnonzero(np.diff(block)) + 1, [self.n])) if self.n else [0, 0]
+            sizes = [int(block[start]) if self.n else 1 for start in bounds[:-1]]
+        else:
+            bounds, sizes = [0, self.n], [int(block)]
+        return [(max(0, ((start + self.offset) // size - 1) * size - self.offset), start, stop, size)
+                for start, stop, size in zip(bounds[:-1], bounds[1:], sizes)]
+
+    def _start_sums(self, starts: np.ndarray, values: np.ndarray, scale: bool = False):
+        """_StartIndex.sums over the runs of rows sharing a block."""
+        if len(self.segments) == 1:
+            first, _, _, block = self.segments[0]
+            return _StartIndex(starts, block, (first + self.offset) % block).sums(values, scale)
+        sums, magnitude = np.empty(self.n), np.empty(self.n) if scale else None
+        for first, start, stop, block in self.segments:
+            index = _StartIndex(np.maximum(starts[first:stop] - first, 0), block, (first + self.offset) % block)
+            run, run_scale = index.sums(values[first:stop], scale)
+            sums[start:stop] = run[start - first:]
+            if scale:
+                magnitude[start:stop] = run_scale[start - first:]
+        return sums, magnitude
+
+    def _start_parts(self, starts: np.ndarray, rows: np.ndarray, count: np.ndarray) -> dict:
+        """_merged_spread parts of the start-array windows ending at rows (see _row_parts), run by run."""
+        results = []
+        for first, start, stop, block in self.segments:
+            inside = rows[(rows >= start) & (rows < stop)]
+            if inside.size:
+                results.append(self._run_parts(starts, inside, count, first, block))
+        return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+    def _run_parts(self, starts: np.ndarray, rows: np.ndarray, count: np.ndarray, first_row: int, size: int) -> dict:
+        pad = (first_row + self.offset) % size
+        block, k = np.divmod(rows - first_row + pad, size)
+        start_block, first = np.divmod(np.maximum(starts[rows] - first_row, 0) + pad, size)
+        crosses = start_block != block
+        blocks = np.union1d(block, start_block[crosses])
+        parts = _block_parts(self.values[first_row:], size, pad, blocks)
+        own = np.searchsorted(blocks, block)
+        result = self._parts(parts, own, k, crosses, np.searchsorted(blocks, np.where(crosses, start_block, block)),
+                             first, count[rows])
+        # A window inside one block is the difference of two of its prefixes
+        before = ~crosses & (first != 0)
+        for name in ('sum', 'sumsq'):
+            result[name] = result[name] - np.where(before, parts[name][own, np.maximum(first - 1, 0)], 0.0)
+        return result
+
+    @staticmethod
+    def _parts(parts: dict, own, k, crosses, previous, after, count) -> dict:
+        result = {'count': count, 'count_a': np.where(crosses, count - parts['count'][own, k], 0.0),
+                  'ref': parts['ref'][own], 'ref_a': np.where(crosses, parts['ref_a'][previous], 0.0)}
+        for name in ('sum', 'sumsq'):
+            result[name] = parts[name][own, k]
+            result[name + '_a'] = np.where(crosses, parts[name + '_a'][previous, after], 0.0)
+        return result
+
+    def finish(self, stats: dict, func: str, out: np.ndarray):
+        """Writes func over the windows described by stats into the 1-D float64 array out."""
+        finish_window(stats, func, out)
+
+
+# Fraction of the magnitude of its partial sums ('scale') below which a window's spread is re-summed from its
+# block parts: rounding costs the spread about eps * scale, so a larger one keeps ~10 significant digits
+_CANCELLATION = 1e-6
+
+
+def finish_window(stats: dict, func: str, out: np.ndarray):
+    """
+    func from the window statistics of _Column.stats, written into the float64 array out. The one place the
+    statistics are finished, shared with the streaming engine (data.streaming) so both produce the same bits.
+    """
+    if func in ('min', 'max'):
+        out[:] = stats[func]
+        return
+    count = stats['count']
+    if 'constant' not in stats:
+        # A window holding one repeated value has exactly that mean and zero spread, as in pandas
+        stats['constant'] = stats['min'] == stats['max']  # False for empty windows (NaN != NaN)
+    constant = stats['constant']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if func == 'mean':
+            np.divide(stats['sum'], count, out=out)  # NaN for empty windows (0 / 0)
+            out += stats['shift']
+            np.copyto(out, stats['min'], where=constant)
+            return
+        np.multiply(stats['sum'], stats['sum'], out=out)
+        out /= count
+        np.subtract(stats['sumsq'], out, out=out)
+        if 'scale' in stats:
+            # Windows left with a tiny fraction of the sums they came from (far from the column's first value,
+            # e.g. after a level shift) lost their spread to cancellation: re-summed from their block parts
+            rows = np.flatnonzero(out < _CANCELLATION * stats['scale'])
+            rows = rows[(count.ravel()[rows] > 1) & ~constant.ravel()[rows]]
+            if rows.size:
+                out.flat[rows] = _merged_spread(stats['parts'](rows))
+        out /= count - 1
+    np.maximum(out, 0.0, out=out)
+    out[constant] = 0.0
+    out[count < 2] = np.nan
+    np.sqrt(out, out=out)
+
+
+def rolling_aggregate(values: np.ndarray, windows: Sequence[Union[int, np.ndarray]], funcs: Sequence[str],
+                      out: np.ndarray, shift: float = None, offset: int = 0, block: int = None):
+    """
+    Rolling funcs (pandas rolling(min_periods=1) semantics, std with ddof=1) of one column over all windows
+    (row counts or arrays of window start rows) into out[:, w * len(funcs) + f]. A partition is continued
+    from its tail with offset, shift and block (see window_block); block may also give every row's block
+    (see window_blocks, the default).
+    """
+    column = _Column(values, windows, shift=shift, offset=offset, block=block)
+    need = set(funcs) | {'min', 'max'}  # min/max identify constant windows
+    for w, window in enumerate(windows):
+        stats = column.stats(window, need)
+        for f, func in enumerate(funcs):
+            column.finish(stats, func, out[:, w * len(funcs) + f])
+
+
+def expanding_aggregate(values: np.ndarray, funcs: Sequence[str], out: np.ndarray, shift: float = None,
+                        carry: dict = None):
+    """
+    Expanding `funcs` of one column (pandas expanding() semantics) into out[:, f]; with carry (and the
+    partition's shift) the rows continue a partition whose earlier rows were summed into carry.
+    """
+    column = _Column(values, shift=shift, carry=carry)
+    stats = column.stats(None, set(funcs) | {'min', 'max'})
+    for f, func in enumerate(funcs):
+        column.finish(stats, func, out[:, f])
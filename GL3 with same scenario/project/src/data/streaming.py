@@ -0,0 +1,433 @@
+import os
+import sys
+from collections import deque
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.feature_engineering import STAT_FUNCS, window_spec
+from data.incremental import FullRecomputeRequired, PartitionTail
+from data.rolling import ROLLING_FUNCS, finish_window, window_block
+from utils.dtypes import feature_dtype, flag_dtype
+
+# --- Streaming window features ---
+# One event at a time, the same block sums as the batch engine (data.rolling) finished by rolling.finish_window,
+# so every event gets the bits of the batch feature row, at O(1) amortized cost per event and window. The block
+# parts finish_window re-sums cancelling windows from are kept alongside the centred sums.
+
+_TERMS = ('sum', 'sumsq')
+# Rows kept for duration windows: enough to re-sum them in a block this many times larger when the longest
+# window outgrows the current one
+_BLOCK_GROWTH = 4
+
+
+def _suffix_sums(values: np.ndarray) -> dict:
+    """Suffix sums of a finished block's rows centred on each column's last observed value, and that value."""
+    valid = ~np.isnan(values)
+    has = valid.any(axis=0)
+    last = np.where(has, values[len(values) - 1 - valid[::-1].argmax(axis=0), np.arange(values.shape[1])], 0.0)
+    behind = np.where(valid, values - last, 0.0)
+    return {'sum': np.cumsum(behind[::-1], axis=0)[::-1], 'sumsq': np.cumsum((behind * behind)[::-1], axis=0)[::-1],
+            'ref': last}
+
+
+class _Extremes:
+    """Min and max of the non-missing values in a sliding window: monotonic deques of (row, value) per column."""
+
+    def __init__(self, n_columns: int):
+        self.lows = [deque() for _ in range(n_columns)]
+        self.highs = [deque() for _ in range(n_columns)]
+
+    def push(self, row: int, values: np.ndarray, valid: np.ndarray, first_row: int) -> Dict[str, np.ndarray]:
+        """Adds row, drops rows before first_row and returns the window's min and max (NaN when empty)."""
+        for j in np.flatnonzero(valid):
+            value = values[j]
+            low, high = self.lows[j], self.highs[j]
+            while low and low[-1][1] >= value:
+                low.pop()
+            low.append((row, value))
+            while high and high[-1][1] <= value:
+                high.pop()
+            high.append((row, value))
+        result = {}
+        for name, queues in (('min', self.lows), ('max', self.highs)):
+            for queue in queues:
+                while queue and queue[0][0] < first_row:
+                    queue.popleft()
+            result[name] = np.array([queue[0][1] if queue else np.nan for queue in queues])
+        return result
+
+
+class _BlockPrefix:
+    """Running prefix count and sums of the current block, centred on its first observed value per column."""
+
+    def __init__(self, n_columns: int):
+        self.ref = np.zeros(n_columns)
+        self.seen = np.zeros(n_columns, dtype=bool)
+        self.count = np.zeros(n_columns)
+        self.sums = {name: np.zeros(n_columns) for name in _TERMS}
+
+    def push(self, values: np.ndarray, valid: np.ndarray) -> Dict[str, np.ndarray]:
+        """Takes the next row (valid: its non-missing mask as 0/1) in; returns the block's prefix sums."""
+        observed = valid > 0
+        self.ref = np.where(observed & ~self.seen, values, self.ref)
+        self.seen |= observed
+        ahead = np.where(observed, values - self.ref, 0.0)
+        self.count = self.count + valid
+        self.sums = {'sum': self.sums['sum'] + ahead, 'sumsq': self.sums['sumsq'] + ahead * ahead}
+        return self.sums
+
+
+def _parts(count: np.ndarray, prefix: _BlockPrefix, sums: dict, previous: dict, crosses: bool) -> dict:
+    """rolling._merged_spread parts: the window's prefix of its block and (when it crosses) suffix of the previous one."""
+    zeros = np.zeros(len(count))
+    parts = {'count_a': count - prefix.count if crosses else zeros, 'ref': prefix.ref.copy(),
+             'ref_a': previous['ref'] if crosses else zeros}
+    for name in _TERMS:
+        parts[name] = sums[name]
+        parts[name + '_a'] = previous[name] if crosses else zeros
+    return parts
+
+
+class _RowWindow:
+    """
+    A row-count window: sums restart every `window` rows (rolling._row_sums), so a window is its block's
+    prefix plus the tail of the previous block; both blocks' prefix sums live in (window, n_columns) buffers.
+    """
+
+    def __init__(self, window: int, n_columns: int):
+        self.window = window
+        self.valid = np.zeros((window, n_columns))
+        self.count = np.zeros(n_columns)
+        self.prefix = {name: np.zeros((window, n_columns)) for name in _TERMS}
+        self.previous = {name: np.zeros((window, n_columns)) for name in _TERMS}
+        self.values = np.full((window, n_columns), np.nan)
+        self.block = _BlockPrefix(n_columns)
+        self.suffix = None
+        self.extremes = _Extremes(n_columns)
+
+    def push(self, row: int, values: np.ndarray, valid: np.ndarray, terms: Dict[str, np.ndarray]) -> dict:
+        window, i = self.window, row % self.window
+        # Counts are whole numbers, exact in any order
+        self.count += valid - self.valid[i]
+        self.valid[i] = valid
+        if i == 0 and row:
+            self.prefix, self.previous = self.previous, self.prefix
+            self.suffix = _suffix_sums(self.values)
+            self.values = np.full_like(self.values, np.nan)
+            self.block = _BlockPrefix(len(values))
+        self.values[i] = values
+        stats = {'count': self.count.copy()}
+        for name, term in terms.items():
+            prefix, previous = self.prefix[name], self.previous[name]
+            prefix[i] = prefix[i - 1] + term if i else term
+            stats[name] = prefix[i].copy() if row < window else prefix[i] + (previous[-1] - previous[i])
+        stats['scale'] = self.prefix['sumsq'][i] + (self.previous['sumsq'][-1] if row >= window else 0.0)
+        sums = self.block.push(values, valid)
+        crosses = self.suffix is not None and i < window - 1
+        previous = {name: part[i + 1] for name, part in self.suffix.items() if name != 'ref'} if crosses else {}
+        previous['ref'] = self.suffix['ref'] if crosses else None
+        stats['parts'] = _parts(stats['count'], self.block, sums, previous, crosses)
+        stats.update(self.extremes.push(row, values, valid, row - window + 1))
+        return stats
+
+
+class _TimeWindows:
+    """
+    The duration windows of a partition, sharing one block (see rolling.window_block). The rows since a few
+    blocks back are kept and re-summed in a larger block when the longest window outgrows it.
+    """
+
+    def __init__(self, durations: Sequence[np.timedelta64], n_columns: int):
+        self.durations = list(durations)
+        self.extremes = [_Extremes(n_columns) for _ in self.durations]
+        self.valid_total = np.zeros(n_columns)
+        self.totals = {name: np.zeros(n_columns) for name in _TERMS}
+        self.times = np.empty(64, dtype='datetime64[ns]')
+        self.values = np.empty((64, n_columns))
+        self.valid_before = np.empty((64, n_columns))
+        self.local = {name: np.empty((64, n_columns)) for name in _TERMS}
+        self.block_local = {name: np.empty((64, n_columns)) for name in _TERMS}
+        self.suffix = {name: np.empty((64, n_columns)) for name in _TERMS}
+        self.restart(0, 0)
+
+    def restart(self, first_row: int, longest: int):
+        """Empty history starting at partition row first_row, with the longest window seen before it."""
+        self.base, self.size = first_row, 0
+        self.starts = [first_row] * len(self.durations)
+        self.longest = longest
+        self.block = window_block(longest)
+        self.prefix = _BlockPrefix(self.values.shape[1])
+        self.previous_ref = np.zeros(self.values.shape[1])
+
+    def _append(self, row: int, time: np.datetime64, values: np.ndarray):
+        if self.size == len(self.times):
+            keep = min([row - 1] + [start - 1 for start in self.starts])
+            keep = max(self.base, min(keep, (row // (_BLOCK_GROWTH * self.block) - 1) * _BLOCK_GROWTH * self.block))
+            drop = keep - self.base
+            capacity = len(self.times) * (2 if self.size - drop > len(self.times) // 2 else 1)
+            for name in ('times', 'values', 'valid_before'):
+                setattr(self, name, self._moved(getattr(self, name), drop, capacity))
+            for name in ('local', 'block_local', 'suffix'):
+                setattr(self, name, {term: self._moved(array, drop, capacity)
+                                     for term, array in getattr(self, name).items()})
+            self.base, self.size = keep, self.size - drop
+        i = self.size
+        self.times[i], self.values[i], self.valid_before[i] = time, values, self.valid_total
+        self.size += 1
+
+    def _moved(self, array: np.ndarray, drop: int, capacity: int) -> np.ndarray:
+        out = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        out[:self.size - drop] = array[drop:self.size]
+        return out
+
+    def _end_block(self, first: int, stop: int):
+        """Suffix sums of the finished block's kept rows [first, stop)."""
+        first = max(first, self.base)
+        suffix = _suffix_sums(self.values[first - self.base:stop - self.base])
+        for name in _TERMS:
+            self.suffix[name][first - self.base:stop - self.base] = suffix[name]
+        self.previous_ref = suffix['ref']
+
+    def _reblock(self, row: int, block: int, shift: np.ndarray):
+        """Re-sums the kept rows from the block before row's in the larger block."""
+        first = max(0, (row // block - 1) * block)
+        if first < self.base:
+            raise FullRecomputeRequired(f"a window of {self.longest} rows outgrew the {self.block}-row block "
+                                        f"beyond the rows kept")
+        values = self.values[first - self.base:row - self.base]
+        centred = np.where(~np.isnan(values), values - shift, 0.0)
+        for name, term in (('sum', centred), ('sumsq', centred * centred)):
+            for start in range(first, row, block):
+                stop = min(start + block, row)
+                self.local[name][start - self.base:stop - self.base] = np.cumsum(term[start - first:stop - first], axis=0)
+            if row % block and row >= block:
+                self.totals[name] = self.local[name][row - row % block - 1 - self.base].copy()
+        self.block = block
+        current = row - row % block
+        if current > first:
+            self._end_block(first, current)
+        self.prefix = _BlockPrefix(self.values.shape[1])
+        for k in range(current, row):
+            values = self.values[k - self.base]
+            sums = self.prefix.push(values, (~np.isnan(values)).astype(np.float64))
+            for name in _TERMS:
+                self.block_local[name][k - self.base] = sums[name]
+
+    def push(self, row: int, time: np.datetime64, values: np.ndarray, valid: np.ndarray,
+             terms: Dict[str, np.ndarray], shift: np.ndarray) -> List[dict]:
+        self._append(row, time, values)
+        self.valid_total = self.valid_total + valid
+        for w, duration in enumerate(self.durations):
+            start = self.starts[w]
+            while start < row and self.times[start - self.base] <= time - duration:
+                start += 1
+            self.starts[w] = start
+            self.longest = max(self.longest, row - start + 1)
+        if window_block(self.longest) != self.block:
+            self._reblock(row, window_block(self.longest), shift)
+        block, i = self.block, row - self.base
+        for name, term in terms.items():
+            local = self.local[name]
+            if row % block == 0:
+                if row and i:
+                    self.totals[name] = local[i - 1].copy()
+                local[i] = term
+            else:
+                local[i] = local[i - 1] + term if i else term
+        if row % block == 0 and i:
+            self._end_block(row - block, row)
+            self.prefix = _BlockPrefix(len(values))
+        sums = self.prefix.push(values, valid)
+        for name in _TERMS:
+            self.block_local[name][i] = sums[name]
+        results = []
+        for w, start in enumerate(self.starts):
+            stats = {'count': self.valid_total - self.valid_before[start - self.base]}
+            crosses = start // block != row // block
+            carried = self.totals['sumsq'] if crosses else 0.0
+            for name in terms:
+                before = self.local[name][start - 1 - self.base] if start % block and start > self.base else 0.0
+                stats[name] = (self.local[name][i] - before) + (self.totals[name] if crosses else 0.0)
+            stats['scale'] = self.local['sumsq'][i] + carried
+            # The window's part in its own block is the difference of two of that block's prefixes
+            own = {}
+            for name in _TERMS:
+                before = self.block_local[name][start - 1 - self.base] \
+                    if not crosses and start % block and start > self.base else 0.0
+                own[name] = self.block_local[name][i] - before
+            previous = {name: self.suffix[name][start - self.base] for name in _TERMS} if crosses else {}
+            previous['ref'] = self.previous_ref if crosses else None
+            stats['parts'] = _parts(stats['count'], self.prefix, own, previous, crosses)
+            stats.update(self.extremes[w].push(row, values, valid, start))
+            results.append(stats)
+        return results
+
+
+class FeatureState:
+    """
+    Live feature engine for one partition: update(event) returns the event's feature row with the bits
+    engineer_features gives it, O(1) amortized per event. feature_names limits it to a plan's selection.
+    """
+
+    def __init__(self, columns: Sequence[str], windows: Sequence, agg_funcs: Sequence[str] = STAT_FUNCS,
+                 condition_thresholds: Mapping[str, float] = None, dtype_policy: str = 'compact',
+                 input_dtypes: Mapping[str, str] = None, input_columns: Sequence[str] = (),
+                 feature_names: Sequence[str] = None):
+        self.columns = list(columns)
+        n = len(self.columns)
+        funcs = [f for f in agg_funcs if f in ROLLING_FUNCS]
+        self.thresholds = dict(condition_thresholds or {})
+        unknown = [c for c in self.thresholds if c not in self.columns]
+        if unknown:
+            raise ValueError(f"Condition thresholds for non-feature columns: {unknown}")
+        input_dtypes = input_dtypes or {}
+        self.input_dtypes = [np.dtype(input_dtypes.get(c, 'float64')) for c in self.columns]
+        self.feature_dtype, self.flag_dtype = feature_dtype(dtype_policy), flag_dtype(dtype_policy)
+        # Output layout of engineer_features: rolling features, expanding statistics, then condition flags,
+        # skipping names that are input columns and, with a selection, the names not selected
+        taken = set(input_columns) | set(self.columns)
+        wanted = (lambda name: name not in taken) if feature_names is None else \
+            (lambda name, selected=set(feature_names): name in selected and name not in taken)
+        self.rolling_layout = [(f'{col}_roll{window}_{func}', w, func, j) for j, col in enumerate(self.columns)
+                               for w, window in enumerate(windows) for func in funcs]
+        self.stat_layout = [(f'{col}_{stat}', stat, j) for j, col in enumerate(self.columns) for stat in STAT_FUNCS]
+        self.rolling_layout = [item for item in self.rolling_layout if wanted(item[0])]
+        self.stat_layout = [item for item in self.stat_layout if wanted(item[0])]
+        self.flag_layout = [(f'{col}_{side}', col, side) for col in self.thresholds for side in ('high', 'low')
+                            if wanted(f'{col}_{side}')]
+        self.funcs = funcs
+        self.names = ([name for name, *_ in self.rolling_layout] + [name for name, *_ in self.stat_layout]
+                      + [name for name, *_ in self.flag_layout])
+        # Only the windows and statistics some feature uses are kept up to date; the duration windows share
+        # their restart block, sized by all of them (as in the batch engine), so they are kept together
+        specs = [window_spec(w) for w in windows]
+        used = {w for _, w, _, _ in self.rolling_layout}
+        if any(not isinstance(specs[w], int) for w in used):
+            used |= {w for w, spec in enumerate(specs) if not isinstance(spec, int)}
+        self.window_slot = {w: k for k, w in enumerate(sorted(used))}
+        self.finished_funcs = [f for f in STAT_FUNCS if any(func == f for _, _, func, _ in self.rolling_layout)
+                               or any(stat == f for _, stat, _ in self.stat_layout)]
+        self.row_windows = {w: _RowWindow(specs[w], n) for w in sorted(used) if isinstance(specs[w], int)}
+        durations = [(w, specs[w]) for w in sorted(used) if not isinstance(specs[w], int)]
+        self.duration_index = [w for w, _ in durations]
+        self.time_windows = _TimeWindows([spec for _, spec in durations], n) if durations else None
+        self.shift = np.full(n, np.nan)
+        self.carry = {'count': np.zeros(n), 'sum': np.zeros(n), 'sumsq': np.zeros(n),
+                      'min': np.full(n, np.nan), 'max': np.full(n, np.nan)}
+        self.n_rows = 0
+        self.last_time = None
+
+    @classmethod
+    def from_tail(cls, tail: PartitionTail, **kwargs) -> 'FeatureState':
+        """The state continuing a partition a batch run left as tail (see data.incremental)."""
+        state = cls(**kwargs)
+        first_row = tail.n_rows - len(tail.values)
+        state.n_rows, state.shift = first_row, tail.shift.copy()
+        if state.time_windows is not None:
+            state.time_windows.restart(first_row, tail.longest)
+        for k, values in enumerate(tail.values):
+            state._push(values, None if tail.times is None else tail.times[k], expanding=False)
+        for name in state.carry:
+            state.carry[name] = np.array([(carry or {}).get(name, state.carry[name][j])
+                                          for j, carry in enumerate(tail.carry)], dtype=np.float64)
+        if tail.times is not None and len(tail.times):
+            state.last_time = tail.times[-1]
+        return state
+
+    def _push(self, values: np.ndarray, time, expanding: bool = True):
+        """Takes one row of float64 values in; returns the window statistics by window index and the expanding ones."""
+        row, valid = self.n_rows, ~np.isnan(values)
+        self.shift = np.where(np.isnan(self.shift) & valid, values, self.shift)
+        centred = np.where(valid, values - self.shift, 0.0)
+        terms = {'sum': centred, 'sumsq': centred * centred}
+        counts = valid.astype(np.float64)
+        windows = {w: window.push(row, values, counts, terms) for w, window in self.row_windows.items()}
+        if self.time_windows is not None:
+            windows.update(zip(self.duration_index,
+                               self.time_windows.push(row, time, values, counts, terms, self.shift)))
+            self.last_time = time
+        self.n_rows += 1
+        if not expanding:
+            return windows, None
+        carry = self.carry
+        carry['count'] = carry['count'] + counts
+        carry['sum'] = carry['sum'] + centred
+        carry['sumsq'] = carry['sumsq'] + terms['sumsq']
+        carry['min'] = np.fmin(carry['min'], values)
+        carry['max'] = np.fmax(carry['max'], values)
+        return windows, dict(carry)
+
+    def update(self, event: Mapping) -> Dict:
+        """
+        Feature row (name -> NumPy scalar in the batch column's dtype) of the next event (column -> value), in row
+        order; raises FullRecomputeRequired when a duration window outgrows the state.
+        """
+        typed = [dtype.type(event[col]) for col, dtype in zip(self.columns, self.input_dtypes)]
+        values = np.array(typed, dtype=np.float64)
+        time = None
+        if self.time_windows is not None:
+            time = np.datetime64(pd.Timestamp(event['timestamp']), 'ns')
+            if self.last_time is not None and time < self.last_time:
+                raise ValueError(f"Event at {time} arrives after one at {self.last_time}; "
+                                 f"duration windows need events in time order.")
+        windows, expanding = self._push(values, time)
+        # Every window and the expanding statistics finished together: one (n_windows + 1, n_columns) array per
+        # name; the expanding statistics have no block parts (a NaN scale never asks for them)
+        stacked = [windows[w] for w in self.window_slot] + [dict(expanding, scale=np.full(len(self.columns), np.nan))]
+        stats = {name: np.stack([s[name] for s in stacked]) for name in ('count', 'sum', 'sumsq', 'scale', 'min', 'max')}
+        stats['shift'] = np.nan_to_num(self.shift)
+        if self.window_slot:
+            parts = {name: np.stack([windows[w]['parts'][name] for w in self.window_slot]
+                                    + [np.zeros(len(self.columns))]) for name in windows[next(iter(windows))]['parts']}
+            stats['parts'] = lambda rows: dict({name: part.ravel()[rows] for name, part in parts.items()},
+                                               count=stats['count'].ravel()[rows])
+        finished = {func: self._finish(stats, func) for func in self.finished_funcs}
+        row = dict(zip(self.columns, typed))
+        for name, w, func, j in self.rolling_layout:
+            row[name] = finished[func][self.window_slot[w], j]
+        for name, stat, j in self.stat_layout:
+            row[name] = finished[stat][-1, j]
+        for name, col, side in self.flag_layout:
+            value = np.array([typed[self.columns.index(col)]])
+            flag = value > self.thresholds[col] if side == 'high' else value < self.thresholds[col]
+            row[name] = flag.astype(self.flag_dtype)[0]
+        return row
+
+    def _finish(self, stats: dict, func: str) -> np.ndarray:
+        out = np.empty(stats['count'].shape)
+        finish_window(stats, func, out)
+        if func == 'std':
+            np.nan_to_num(out, copy=False, nan=0.0)
+        return out.astype(self.feature_dtype)
+
+
+class FeatureStream:
+    """
+    Live features for every machine, continuing the feature state a batch run saved (engineer_features with
+    state_path): one FeatureState per group value, created empty for machines the batch never saw.
+    """
+
+    def __init__(self, state: dict):
+        config = state['config']
+        self.group_col = config['group_col']
+        self.kwargs = dict(columns=config['numeric_cols'], windows=config['rolling_windows'],
+                           agg_funcs=config['agg_funcs'], condition_thresholds=config['condition_thresholds'],
+                           dtype_policy=config['dtype_policy'], input_dtypes=state.get('input_dtypes'),
+                           input_columns=state['input_columns'], feature_names=config.get('feature_names'))
+        self.states = {key: FeatureState.from_tail(tail, **self.kwargs) for key, tail in state['partitions'].items()}
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureStream':
+        import joblib
+        return cls(joblib.load(path))
+
+    def update(self, event: Mapping) -> Dict:
+        """Feature row of the next event of its machine (see FeatureState.update)."""
+        key = event[self.group_col] if self.group_col else None
+        key = None if pd.isna(key) else key
+        if key not in self.states:
+            self.states[key] = FeatureState(**self.kwargs)
+        return self.states[key].update(event)
@@ -1,13 +1,33 @@
 import os
+import re
 import sys
+import csv
+import glob
 import subprocess
 import logging
 import getpass
 import shutil
 import json
+import time
+import signal
+import threading
+import collections
 from datetime import datetime
 import traceback
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from pipeline.dag import Stage, run_dag, prefix_stages, PipelineFailure
+from pipeline.cache import StageCache
+from pipeline.checkpoint import StageCheckpoints
+from pipeline.perf import PerfRecorder, process_tree_usage
+from utils.artifact_io import artifact_path, read_frame, SUPPORTED_FORMATS
+from utils.hashing import artifact_checksum, artifact_checksums
+from utils.dtypes import DTYPE_POLICIES
+from utils.parallel import PARALLEL_BACKENDS
+from data.feature_selection import MI_METHODS
+
+RUN_CONFIG_NAME = 'run_config.json'
+
 
 def setup_logging(logfile='pipeline_execution.log'):
     logging.basicConfig(
@@ -20,40 +40,84 @@ def setup_logging(logfile='pipeline_execution.log'):
     )
 
 
-def run_cli(cmd, label=None):
-    if label:
-        logging.info(f"--- Executing: {label} ---")
+def _kill_process_group(proc, grace=5.0):
+    """Terminates the stage's whole process group (shell, interpreter, joblib workers), then kills stragglers."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+def run_cli(cmd, label=None, timeout=None, max_memory_mb=None, tail_lines=200):
+    """
+    Runs a stage command, streaming its stdout/stderr line by line into the driver log while keeping only
+    the last `tail_lines` lines for the error report. `timeout` (seconds) and `max_memory_mb` (resident
+    memory of the stage's process tree) are enforced by killing the stage's process group.
+    """
+    label = label or cmd
+    logging.info(f"--- Executing: {label} ---")
     logging.info(f"Running command: {cmd}")
+    tail = collections.deque(maxlen=tail_lines)
+    last_progress = [None]
+
+    def pump(stream, level):
+        for line in iter(stream.readline, ''):
+            line = line.rstrip('\n')
+            tail.append(line)
+            if 'PROGRESS ' in line:
+                last_progress[0] = line
+            logging.log(level, f"[{label}] {line}")
+        stream.close()
+
     try:
-        result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
-        logging.info(f"Output for '{label}':
-{result.stdout}")
-        if result.stderr:
-            logging.warning(f"Stderr for '{label}':
-{result.stderr}")
-    except subprocess.CalledProcessError as e:
-        # Log traceback for debugging (fix: capture/print full stack--review feedback)
-        logging.error(f"Pipeline step '{label}' failed with code {e.returncode}.
-Stdout: {e.stdout}
-Stderr: {e.stderr}")
-        logging.error("Exception Traceback:
-" + traceback.format_exc())
-        sys.exit(1)
+        # Unbuffered child output so lines arrive as they are printed; own session so the group can be killed
+        proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                bufsize=1, start_new_session=True, env=dict(os.environ, PYTHONUNBUFFERED='1'))
+        readers = [threading.Thread(target=pump, args=(proc.stdout, logging.INFO), daemon=True),
+                   threading.Thread(target=pump, args=(proc.stderr, logging.WARNING), daemon=True)]
+        for reader in readers:
+            reader.start()
+        started = time.monotonic()
+        violation = None
+        while proc.poll() is None:
+            try:
+                proc.wait(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if timeout and time.monotonic() - started > timeout:
+                violation = f"exceeded its timeout of {timeout}s"
+            elif max_memory_mb:
+                _, rss = process_tree_usage(proc.pid)
+                if rss > max_memory_mb * 1024 * 1024:
+                    violation = f"exceeded its memory limit of {max_memory_mb} MB (resident {rss // (1024 * 1024)} MB)"
+            if violation:
+                logging.error(f"Pipeline step '{label}' {violation}; terminating it.")
+                _kill_process_group(proc)
+                break
+        for reader in readers:
+            reader.join()
+        if violation or proc.returncode != 0:
+            reason = violation or f"failed with code {proc.returncode}"
+            logging.error(f"Pipeline step '{label}' {reason}.\nLast progress: {last_progress[0]}\n"
+                          f"Last {len(tail)} output lines:\n" + "\n".join(tail))
+            sys.exit(1)
+    except SystemExit:
+        raise
     except Exception as e:
         # Catch other exceptions and log
         logging.error(f"Unexpected error during '{label}': {e}")
-        logging.error("Exception Traceback:
-" + traceback.format_exc())
+        logging.error("Exception Traceback:\n" + traceback.format_exc())
         sys.exit(1)
 
 
 def file_checksum(path, algo='sha256'):
-    import hashlib
-    hash_func = hashlib.new(algo)
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_func.update(chunk)
-    return hash_func.hexdigest()
+    # Shared hashing service: large reads, parallel member hashing, digests cached by (path, inode, size, mtime)
+    return artifact_checksum(path, algo)
 
 
 def check_artifacts(paths):
@@ -65,113 +129,528 @@ def check_artifacts(paths):
         sys.exit(2)
     for p in paths:
         logging.info(f"Verified artifact present: {p}")
-        # Optionally, print checksum for each artifact (enhanced auditing)
-        try:
-            checksum = file_checksum(p)
-            logging.info(f"Artifact checksum (sha256) for {p}: {checksum}")
-        except Exception as e:
-            logging.warning(f"Unable to compute checksum for {p}: {e}")
+    # Print checksum for each artifact (enhanced auditing); all artifacts are hashed in one parallel batch
+    try:
+        checksums = artifact_checksums(paths)
+    except Exception as e:
+        logging.warning(f"Unable to compute artifact checksums in one batch ({e}); hashing individually.")
+        checksums = {}
+        for p in paths:
+            try:
+                checksums[p] = file_checksum(p)
+            except Exception as e:
+                logging.warning(f"Unable to compute checksum for {p}: {e}")
+    for p, checksum in checksums.items():
+        logging.info(f"Artifact checksum (sha256) for {p}: {checksum}")
 
 
-def main():
-    setup_logging()
-    logging.info("Starting end-to-end CLI pipeline execution.")
+def log_artifacts_to_mlflow(paths):
+    """
+    Logs finished artifacts to the active MLflow run; a no-op when MLflow is not installed.
+    """
+    try:
+        import mlflow
+    except ImportError:
+        logging.info("MLflow not available; skipping artifact logging.")
+        return []
+    logged = []
+    for p in paths:
+        if p and os.path.exists(p):
+            try:
+                mlflow.log_artifact(p)
+                logged.append(p)
+            except Exception as e:
+                logging.warning(f"MLflow log_artifact failed for {p}: {e}")
+    logging.info(f"Logged {len(logged)} artifacts to MLflow.")
+    return logged
 
-    # Directories
-    user = getpass.getuser()
-    timestamp = datetime.now().strftime('%Y%m%dT%H%M%S')
-    base_output_dir = f"run_{user}_{timestamp}"
-    os.makedirs(base_output_dir, exist_ok=True)
-
-    # --- Step 1: Data Ingestion and Inspection ---
-    raw_csv = os.environ.get("RAW_DATA_PATH", "data/input_sensor_data.csv")
-    ingestion_dir = os.path.join(base_output_dir, "ingestion")
-    os.makedirs(ingestion_dir, exist_ok=True)
-    ingestion_cmd = f"python src/data/preprocessing.py --input_csv '{raw_csv}' --output_dir '{ingestion_dir}'"
-    run_cli(ingestion_cmd, label="Data Ingestion Pipeline")
-
-    # Retrieve latest cleaned CSV file from ingestion_dir
-    cleaned_files = [f for f in os.listdir(ingestion_dir) if f.endswith('.csv') and f.startswith('summary_statistics')]
-    if not cleaned_files:
-        logging.error(f"No summary_statistics CSV found in {ingestion_dir} after ingestion.")
-        sys.exit(3)
-    # Choose the latest summary statistics CSV (by timestamp in filename; assuming unique_suffix includes timestamp)
-    latest_cleaned_csv = sorted(
-        cleaned_files,
-        key=lambda x: x,  # filenames are unique with timestamp; a simple sort works
-        reverse=True
-    )[0]
-    cleaned_csv_path = os.path.join(ingestion_dir, latest_cleaned_csv)
-    # For lineage, propagate the cleaned CSV as next input
-    preproc_input_path = cleaned_csv_path
-
-    # --- Step 1b: Propagate anonymized/cleaned for next stage (fixes review feedback on incorrect data flow) ---
+
+def report_training_results(train_log_path):
+    """
+    Logs the key RF/XGBoost metrics from the training log for user verification.
+    """
+    try:
+        with open(train_log_path) as f:
+            training_report = json.load(f)
+        logging.info(f"Key Model Training Results: \n"
+                     f"Random Forest: {json.dumps(training_report.get('rf_metrics', {}), indent=2)}\n"
+                     f"XGBoost: {json.dumps(training_report.get('xgb_metrics', {}), indent=2)}")
+        return training_report
+    except Exception as e:
+        logging.warning(f"Could not read model_training_log.json: {e}")
+        return None
+
+
+def get_git_commit():
+    """
+    Attempts to obtain git commit SHA for provenance and stage cache keys.
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL)
+        return commit.decode('ascii').strip()
+    except Exception:
+        return "N/A"
+
+
+def load_stage_modules():
+    """
+    Imports the stage modules once for in-process execution (heavy pandas/sklearn/xgboost imports happen here).
+    """
+    from data import preprocessing, feature_engineering
+    from training import train
+    return preprocessing, feature_engineering, train
+
+
+def build_stages(raw_csv, base_output_dir, target_col='target', num_features=20, thresholds='{}', exclude_cols='',
+                 train_params=None, modules=None, cpu_budget=1, artifact_format='csv', csv_exports=False,
+                 chunksize=None, encoding=None, dtype_policy='compact', n_workers=1, parallel_backend='threads',
+                 group_col=None, rolling_windows='5,15,30', selection_sample=0, mi_method='knn', mi_sample_rows=None,
+                 redundancy_threshold=0.95, feature_state=False):
+    """
+    Declares the pipeline DAG: every stage has an in-process callable and the equivalent CLI command, plus the
+    inputs/params of its cache key. The options mirror the command-line flags of main(). Returns (stages, paths).
+    """
+    train_params = train_params or {}
+    encoding = encoding or {}
+    src_dir = os.path.dirname(os.path.abspath(__file__))
     preproc_dir = os.path.join(base_output_dir, "preproc")
-    os.makedirs(preproc_dir, exist_ok=True)
-    preproc_output = os.path.join(preproc_dir, "preprocessed.csv")
-    encoders_path = os.path.join(preproc_dir, "encoders.joblib")
-    scaler_path = os.path.join(preproc_dir, "scaler.joblib")
-    preproc_cmd = f"python src/data/preprocessing.py --input '{preproc_input_path}' --output '{preproc_output}' --encoders '{encoders_path}' --scaler '{scaler_path}' --target 'target'"
-    run_cli(preproc_cmd, label="Preprocessing Pipeline")
+    fe_dir = os.path.join(base_output_dir, "features")
+    train_dir = os.path.join(base_output_dir, "train")
+    for d in (preproc_dir, fe_dir, train_dir):
+        os.makedirs(d, exist_ok=True)
+    paths = {
+        'preproc_output': artifact_path(os.path.join(preproc_dir, "preprocessed.csv"), artifact_format),
+        'encoders': os.path.join(preproc_dir, "encoders.joblib"),
+        'scaler': os.path.join(preproc_dir, "scaler.joblib"),
+        'compiled_preprocessor': os.path.join(preproc_dir, "preprocessor_compiled.joblib"),
+        'feature_engineered': artifact_path(os.path.join(fe_dir, "feature_engineered.csv"), artifact_format),
+        'feature_metadata': os.path.join(fe_dir, "feature_metadata.json"),
+        'feature_state': os.path.join(fe_dir, "feature_state.joblib") if feature_state else None,
+        'feature_plan': os.path.join(fe_dir, "feature_plan.json"),
+        'selection_matrix': artifact_path(os.path.join(fe_dir, "selected_features.csv"), artifact_format),
+        'feature_importance_report': os.path.join(fe_dir, "feature_importance.csv"),
+        'selection_log': os.path.join(fe_dir, "selection_rationale.json"),
+        'train_dir': train_dir,
+    }
+    preprocessing, feature_engineering, train = modules if modules else (None, None, None)
+    windows = [w.strip() for w in rolling_windows.split(',') if w.strip()]
+    passthrough_cols = ([group_col] if group_col else []) + (['timestamp'] if any(not w.isdigit() for w in windows) else [])
+
+    # --- Step 1: Ingestion + preprocessing (raw CSV -> imputed/encoded/scaled frame) ---
+    preproc_cmd = (
+        f"python src/data/preprocessing.py --input '{raw_csv}' --output '{paths['preproc_output']}' "
+        f"--encoders '{paths['encoders']}' --scaler '{paths['scaler']}' --compiled '{paths['compiled_preprocessor']}' "
+        f"--target '{target_col}' --dtype_policy {dtype_policy}"
+        f"{' --csv_export' if csv_exports else ''}{f' --chunksize {chunksize}' if chunksize else ''}"
+        f" --n_workers {n_workers} --parallel_backend {parallel_backend}"
+    )
+    for opt, value in encoding.items():
+        preproc_cmd += f" --{opt} '{value}'"
+    if passthrough_cols:
+        preproc_cmd += f" --passthrough_cols '{','.join(passthrough_cols)}'"
+
+    def run_preprocess(inputs):
+        return preprocessing.run_pipeline(raw_csv, paths['preproc_output'], paths['encoders'], paths['scaler'], target_col,
+                                          csv_export=csv_exports, chunksize=chunksize,
+                                          compiled_path=paths['compiled_preprocessor'], dtype_policy=dtype_policy,
+                                          n_workers=n_workers, parallel_backend=parallel_backend,
+                                          passthrough_cols=passthrough_cols, **encoding)
 
     # --- Step 2: Feature Engineering and Selection ---
-    fe_dir = os.path.join(base_output_dir, "features")
-    os.makedirs(fe_dir, exist_ok=True)
-    feature_engineered_path = os.path.join(fe_dir, "feature_engineered.csv")
-    feature_metadata_path = os.path.join(fe_dir, "feature_metadata.json")
-    selection_matrix_path = os.path.join(fe_dir, "selected_features.csv")
-    feature_importance_report = os.path.join(fe_dir, "feature_importance.csv")
-    selection_log = os.path.join(fe_dir, "selection_rationale.json")
-    thresholds = '{}'  # If real thresholds needed, set as JSON str
-    exclude_cols = ''  # If any columns to exclude, pass as comma string
     # Note: add sensitive_cols as needed
     fe_cmd = (
-        f"python src/data/feature_engineering.py --input '{preproc_output}' --output '{feature_engineered_path}' "
-        f"--selection_output '{selection_matrix_path}' --feature_importance_report '{feature_importance_report}' "
-        f"--selection_log '{selection_log}' --feature_metadata '{feature_metadata_path}' --target_col 'target' --problem_type 'classification' "
-        f"--num_features 20 --condition_thresholds '{thresholds}' --exclude_cols '{exclude_cols}'"
+        f"python src/data/feature_engineering.py --input '{paths['preproc_output']}' --output '{paths['feature_engineered']}' "
+        f"--selection_output '{paths['selection_matrix']}' --feature_importance_report '{paths['feature_importance_report']}' "
+        f"--selection_log '{paths['selection_log']}' --feature_metadata '{paths['feature_metadata']}' --feature_plan '{paths['feature_plan']}' --target_col '{target_col}' --problem_type 'classification' "
+        f"--num_features {num_features} --condition_thresholds '{thresholds}' --exclude_cols '{exclude_cols}' "
+        f"--n_jobs {cpu_budget} --dtype_policy {dtype_policy}{' --csv_export' if csv_exports else ''}"
+        f" --n_workers {n_workers} --parallel_backend {parallel_backend} --rolling_windows '{rolling_windows}'"
     )
-    run_cli(fe_cmd, label="Feature Engineering Pipeline")
+    if group_col:
+        fe_cmd += f" --group_col '{group_col}'"
+    if selection_sample:
+        fe_cmd += f" --selection_sample {selection_sample}"
+    if feature_state:
+        fe_cmd += f" --feature_state '{paths['feature_state']}'"
+    fe_cmd += f" --mi_method {mi_method}{f' --mi_sample_rows {mi_sample_rows}' if mi_sample_rows else ''}"
+    fe_cmd += f" --redundancy_threshold {redundancy_threshold}"
+
+    def run_features(inputs):
+        return feature_engineering.run_feature_stage(
+            inputs['preprocess'],
+            paths['feature_engineered'],
+            selection_output=paths['selection_matrix'],
+            feature_importance_report=paths['feature_importance_report'],
+            selection_log=paths['selection_log'],
+            feature_metadata=paths['feature_metadata'],
+            target_col=target_col,
+            problem_type='classification',
+            num_features=num_features,
+            condition_thresholds=json.loads(thresholds) if thresholds else {},
+            exclude=[x.strip() for x in exclude_cols.split(',') if x.strip()],
+            rolling_windows=feature_engineering.parse_rolling_windows(rolling_windows),
+            n_jobs=cpu_budget,
+            csv_export=csv_exports,
+            dtype_policy=dtype_policy,
+            n_workers=n_workers,
+            parallel_backend=parallel_backend,
+            group_col=group_col,
+            state_path=paths['feature_state'],
+            selection_sample=selection_sample,
+            plan_path=paths['feature_plan'],
+            mi_method=mi_method,
+            mi_sample_rows=mi_sample_rows,
+            redundancy_threshold=redundancy_threshold
+        )
 
     # --- Step 3: Model Training ---
-    train_dir = os.path.join(base_output_dir, "train")
-    os.makedirs(train_dir, exist_ok=True)
     train_cmd = (
-        f"python src/training/train.py --feature_matrix '{selection_matrix_path}' --target_col 'target' "
-        f"--artifacts_dir '{train_dir}'"
+        f"python src/training/train.py --feature_matrix '{paths['selection_matrix']}' --target_col '{target_col}' "
+        f"--artifacts_dir '{train_dir}' --n_jobs {cpu_budget} --dtype_policy {dtype_policy} --no_mlflow"
     )
-    run_cli(train_cmd, label="Model Training Pipeline")
-
-    # --- Step 4: Results Verification ---
-    expected_artifacts = [
-        preproc_output,
-        encoders_path,
-        scaler_path,
-        feature_engineered_path,
-        selection_matrix_path,
-        feature_importance_report,
-        selection_log,
-        feature_metadata_path,
+    for opt, value in train_params.items():
+        train_cmd += f" --{opt} '{value}'"
+
+    def run_train(inputs):
+        featmat = inputs['features']
+        X = featmat.drop(columns=[target_col])
+        y = featmat[target_col]
+        return train.train_models(
+            X, y, featmat,
+            artifacts_dir=train_dir,
+            target_col=target_col,
+            feature_matrix_path=paths['selection_matrix'],
+            cli_command=train_cmd,
+            n_jobs=cpu_budget,
+            log_to_mlflow=False,
+            dtype_policy=dtype_policy,
+            **train_params
+        )
+
+    # --- Step 4: Results verification, MLflow logging and reporting (independent of each other) ---
+    paths['expected_artifacts'] = [
+        paths['preproc_output'],
+        paths['encoders'],
+        paths['scaler'],
+        paths['compiled_preprocessor'],
+        paths['feature_engineered'],
+        paths['selection_matrix'],
+        paths['feature_importance_report'],
+        paths['selection_log'],
+        paths['feature_metadata'],
         os.path.join(train_dir, 'random_forest_best.joblib'),
         os.path.join(train_dir, 'xgboost_best.joblib'),
         os.path.join(train_dir, 'model_training_log.json')
     ]
-    check_artifacts(expected_artifacts)
-    logging.info("All designated output artifacts present. Pipeline execution completed successfully.")
+    mlflow_artifacts = [
+        os.path.join(train_dir, 'model_training_log.json'),
+        os.path.join(train_dir, 'random_forest_feature_importance.csv'),
+        os.path.join(train_dir, 'random_forest_best.joblib'),
+        os.path.join(train_dir, 'xgboost_feature_importance.csv'),
+        os.path.join(train_dir, 'xgboost_best.joblib')
+    ]
 
-    # Optionally, print report summaries for user verification
-    train_log_path = os.path.join(train_dir, 'model_training_log.json')
-    try:
-        with open(train_log_path) as f:
-            training_report = json.load(f)
-        logging.info(f"Key Model Training Results: 
-"
-                     f"Random Forest: {json.dumps(training_report.get('rf_metrics', {}), indent=2)}
-"
-                     f"XGBoost: {json.dumps(training_report.get('xgb_metrics', {}), indent=2)}")
-    except Exception as e:
-        logging.warning(f"Could not read model_training_log.json: {e}")
+    # --- Cache rehydration: rebuild a skipped stage's in-memory result from its artifacts ---
+    def load_preprocessed():
+        return read_frame(paths['preproc_output'])
+
+    def load_selected():
+        return read_frame(paths['selection_matrix'])
+
+    def load_training_log():
+        with open(os.path.join(train_dir, 'model_training_log.json')) as f:
+            return json.load(f)
+
+    stages = [
+        Stage('preprocess', run_preprocess, [], preproc_cmd, label="Preprocessing Pipeline",
+              inputs=[raw_csv], params={'target_col': target_col, 'artifact_format': artifact_format,
+                                        'csv_exports': csv_exports, 'chunksize': chunksize,
+                                        'dtype_policy': dtype_policy, 'passthrough_cols': passthrough_cols, **encoding},
+              output_dir=preproc_dir,
+              code=os.path.join(src_dir, 'data', 'preprocessing.py'), load=load_preprocessed, cpus=n_workers,
+              reads=[raw_csv], writes=[paths['preproc_output'], paths['encoders'], paths['scaler'],
+                                      paths['compiled_preprocessor']]),
+        Stage('features', run_features, ['preprocess'], fe_cmd, label="Feature Engineering Pipeline",
+              params={'target_col': target_col, 'num_features': num_features, 'condition_thresholds': thresholds,
+                      'exclude_cols': exclude_cols, 'artifact_format': artifact_format, 'csv_exports': csv_exports,
+                      'dtype_policy': dtype_policy, 'group_col': group_col, 'rolling_windows': rolling_windows,
+                      'selection_sample': selection_sample, 'mi_method': mi_method,
+                      'mi_sample_rows': mi_sample_rows, 'redundancy_threshold': redundancy_threshold,
+                      'feature_state': feature_state},
+              output_dir=fe_dir, code=os.path.join(src_dir, 'data', 'feature_engineering.py'), load=load_selected,
+              cpus=cpu_budget, reads=[paths['preproc_output']],
+              writes=[paths['selection_matrix'], paths['feature_engineered'], paths['feature_metadata'],
+                      paths['feature_plan']] + ([paths['feature_state']] if feature_state else [])),
+        Stage('train', run_train, ['features'], train_cmd, label="Model Training Pipeline",
+              params={'target_col': target_col, 'dtype_policy': dtype_policy, **train_params}, output_dir=train_dir,
+              code=os.path.join(src_dir, 'training', 'train.py'), load=load_training_log, cpus=cpu_budget,
+              reads=[paths['selection_matrix']], writes=[train_dir]),
+        Stage('verify', lambda inputs: check_artifacts(paths['expected_artifacts']), ['train'],
+              label="Artifact Verification"),
+        Stage('mlflow', lambda inputs: log_artifacts_to_mlflow(mlflow_artifacts), ['train'],
+              label="MLflow Artifact Logging"),
+        Stage('report', lambda inputs: report_training_results(os.path.join(train_dir, 'model_training_log.json')),
+              ['train'], label="Training Report"),
+    ]
+    return stages, paths
 
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="End-to-end predictive maintenance pipeline driver")
+    parser.add_argument('--executor', default='inprocess', choices=['inprocess', 'subprocess'],
+                        help='Run stages inside this interpreter (default) or as separate CLI subprocesses (fallback)')
+    parser.add_argument('--raw_data', default=os.environ.get("RAW_DATA_PATH", "data/input_sensor_data.csv"),
+                        help='Raw sensor CSV (defaults to $RAW_DATA_PATH)')
+    parser.add_argument('--batch', default=None, metavar='GLOB',
+                        help='Batch mode: run the pipeline for every dataset matching GLOB on one shared core budget')
+    parser.add_argument('--manifest', default=None,
+                        help='Batch mode: file listing datasets (one path per line, or JSON list of paths / {name, path})')
+    parser.add_argument('--dataset_cpus', type=int, default=None,
+                        help='Batch mode: cores per compute stage of each dataset (default: cpu_budget / datasets, at least 1)')
+    parser.add_argument('--target_col', default='target', help='Target/label column name')
+    parser.add_argument('--num_features', type=int, default=20, help='Number of top features to select')
+    parser.add_argument('--n_iter', type=int, default=None, help='Randomized search iterations per model (train.py default if unset)')
+    parser.add_argument('--cv_folds', type=int, default=None, help='Cross-validation folds for tuning (train.py default if unset)')
+    parser.add_argument('--rf_param_dist', default='', help='JSON: param grid for RandomForest')
+    parser.add_argument('--xgb_param_dist', default='', help='JSON: param grid for XGBoost')
+    parser.add_argument('--random_state', type=int, default=None, help='Random seed for training')
+    parser.add_argument('--cache_dir', default='.stage_cache', help='Content-addressed stage cache directory')
+    parser.add_argument('--no_cache', action='store_true', help='Recompute every stage and do not populate the cache')
+    parser.add_argument('--artifact_format', default='npy', choices=list(SUPPORTED_FORMATS),
+                        help='Format of intermediate frames between stages (npy = per-column .npy files + schema sidecar)')
+    parser.add_argument('--csv_exports', action='store_true', help='Also write human-facing CSV copies of binary frames')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Preprocess the raw CSV out of core, this many rows at a time (default: in memory)')
+    parser.add_argument('--dtype_policy', default='compact', choices=list(DTYPE_POLICIES),
+                        help='Column dtypes in every stage: compact (float32 features, uint8 flags, category strings) or float64')
+    parser.add_argument('--n_workers', type=int, default=1,
+                        help='Workers for per-column preprocessing and feature generation (parallel column blocks)')
+    parser.add_argument('--parallel_backend', default='threads', choices=list(PARALLEL_BACKENDS),
+                        help='Pool for --n_workers: threads, or processes sharing the data through /dev/shm')
+    parser.add_argument('--group_col', default=None,
+                        help='Compute rolling/expanding features within each group of this column (e.g. machine_id)')
+    parser.add_argument('--rolling_windows', default='5,15,30',
+                        help="Comma-separated rolling windows: row counts (5,15,30) and/or durations on 'timestamp' (5min,1h,24h)")
+    parser.add_argument('--selection_sample', type=int, default=0,
+                        help='Select features on a sample of this many rows, then engineer only the selected ones (0 = off)')
+    parser.add_argument('--mi_method', default='knn', choices=list(MI_METHODS),
+                        help='Mutual information estimator of feature selection: sklearn kNN or quantile-binned histograms')
+    parser.add_argument('--mi_sample_rows', type=int, default=None,
+                        help='Rows sampled for the histogram mutual information (default: all rows)')
+    parser.add_argument('--redundancy_threshold', type=float, default=0.95,
+                        help='Prune features correlated at |r| >= this with a kept one before scoring them (0 = off)')
+    parser.add_argument('--feature_state', action='store_true',
+                        help='Save the per-machine feature state for appends and live streaming (data.streaming)')
+    parser.add_argument('--max_onehot', type=int, default=None,
+                        help='Most categories a column may have to be one-hot encoded (preprocessing.py default if unset)')
+    parser.add_argument('--high_cardinality', default=None, choices=['frequency', 'hash'],
+                        help='Encoding for categorical columns above --max_onehot categories')
+    parser.add_argument('--n_hash_features', type=int, default=None, help='Hash buckets per column for --high_cardinality hash')
+    parser.add_argument('--cpu_budget', type=int, default=os.cpu_count() or 1,
+                        help='Total cores shared by concurrently running stages and their n_jobs (default: all cores)')
+    parser.add_argument('--stage_timeout', type=float, default=None,
+                        help='Kill a subprocess stage that runs longer than this many seconds')
+    parser.add_argument('--stage_max_memory_mb', type=int, default=None,
+                        help='Kill a subprocess stage whose process tree exceeds this resident memory (MB)')
+    parser.add_argument('--stage_limits', default='',
+                        help='JSON: per-stage overrides, e.g. {"train": {"timeout": 7200, "max_memory_mb": 16000}}')
+    parser.add_argument('--resume', default=None, metavar='RUN_DIR',
+                        help='Continue an interrupted run in RUN_DIR from its first incomplete stage '
+                             '(its saved arguments are reused unless overridden on the command line)')
+    parser.add_argument('--perf_history', default='perf_history.jsonl',
+                        help='Per-project JSONL file the per-stage performance records are appended to')
+    parser.add_argument('--perf_window', type=int, default=5,
+                        help='Number of previous successful runs whose median forms the perf baseline')
+    parser.add_argument('--perf_tolerance', type=float, default=0.25,
+                        help='Allowed relative slowdown/memory growth over the baseline (0.25 = +25%%)')
+    parser.add_argument('--perf_gate', action='store_true',
+                        help='Fail the run (exit code 4) when a stage regresses beyond --perf_tolerance')
+    args = parser.parse_args(argv)
+    if args.resume:
+        config_path = os.path.join(args.resume, RUN_CONFIG_NAME)
+        if not os.path.isfile(config_path):
+            parser.error(f"--resume: {args.resume} is not a pipeline run directory (no {RUN_CONFIG_NAME}).")
+        with open(config_path) as f:
+            saved = json.load(f)
+        saved.pop('resume', None)
+        # Saved arguments become the defaults, so anything given explicitly on this command line still wins
+        parser.set_defaults(**saved)
+        args = parser.parse_args(argv)
+    return args
+
+
+def collect_datasets(batch_glob=None, manifest=None):
+    """
+    Resolves batch inputs into (name, path) pairs. `batch_glob` is a shell glob; `manifest` is a text file
+    with one path per line (# comments allowed) or a JSON list of paths / {"name": ..., "path": ...} objects.
+    Names default to the file stem and are made unique, since each one becomes a run sub-directory.
+    """
+    entries = []
+    if batch_glob:
+        entries.extend((None, p) for p in sorted(glob.glob(batch_glob)))
+    if manifest:
+        with open(manifest) as f:
+            text = f.read()
+        if manifest.endswith('.json'):
+            for item in json.loads(text):
+                entries.append((item.get('name'), item['path']) if isinstance(item, dict) else (None, item))
+        else:
+            entries.extend((None, line.strip()) for line in text.splitlines()
+                           if line.strip() and not line.strip().startswith('#'))
+    datasets, seen = [], set()
+    for name, path in entries:
+        base = re.sub(r'[^A-Za-z0-9_-]+', '_', name or os.path.splitext(os.path.basename(path))[0]) or 'dataset'
+        unique, n = base, 2
+        while unique in seen:
+            unique, n = f"{base}_{n}", n + 1
+        seen.add(unique)
+        datasets.append((unique, path))
+    return datasets
+
+
+def write_batch_summary(batch_dir, datasets, perf_records, failures=None, skipped=None):
+    """
+    Consolidates per-dataset status, test metrics of both models and stage timings into
+    <batch_dir>/batch_summary.json and batch_summary.csv. Returns the summary rows.
+    """
+    failures, skipped = failures or {}, set(skipped or [])
+    rows = []
+    for name, path in datasets:
+        records = [r for r in perf_records if r['stage'].startswith(f"{name}.")]
+        failed = sorted(s for s in failures if s.startswith(f"{name}."))
+        row = {
+            'dataset': name,
+            'input': path,
+            'run_dir': os.path.join(batch_dir, name),
+            'status': 'failed' if failed else ('incomplete' if any(s.startswith(f"{name}.") for s in skipped) else 'ok'),
+            'failed_stages': ';'.join(failed),
+            'stage_time_s': round(sum(r.get('wall_time_s') or 0.0 for r in records), 3),
+        }
+        for r in records:
+            row[f"{r['stage'][len(name) + 1:]}_wall_s"] = r.get('wall_time_s')
+        train_log = os.path.join(batch_dir, name, 'train', 'model_training_log.json')
+        if os.path.isfile(train_log):
+            with open(train_log) as f:
+                training = json.load(f)
+            for prefix in ('rf', 'xgb'):
+                for metric in ('test_accuracy', 'test_f1', 'test_roc_auc'):
+                    row[f"{prefix}_{metric}"] = training.get(f'{prefix}_metrics', {}).get(metric)
+        rows.append(row)
+    with open(os.path.join(batch_dir, 'batch_summary.json'), 'w') as f:
+        json.dump(rows, f, indent=2)
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    with open(os.path.join(batch_dir, 'batch_summary.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    ok = sum(row['status'] == 'ok' for row in rows)
+    logging.info(f"Batch summary: {ok}/{len(rows)} datasets succeeded; see {os.path.join(batch_dir, 'batch_summary.csv')}")
+    return rows
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    batch = bool(args.batch or args.manifest)
+    logging.info(f"Starting end-to-end CLI pipeline execution (executor: {args.executor}{', batch mode' if batch else ''}).")
+
+    # Directories
+    if args.resume:
+        base_output_dir = args.resume.rstrip(os.sep)
+        logging.info(f"Resuming run in {base_output_dir} from its first incomplete stage.")
+    else:
+        user = getpass.getuser()
+        timestamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+        base_output_dir = f"{'batch' if batch else 'run'}_{user}_{timestamp}"
+        os.makedirs(base_output_dir, exist_ok=True)
+    with open(os.path.join(base_output_dir, RUN_CONFIG_NAME), 'w') as f:
+        json.dump({k: v for k, v in vars(args).items() if k != 'resume'}, f, indent=2)
+
+    if batch:
+        datasets = collect_datasets(args.batch, args.manifest)
+        if not datasets:
+            logging.error("Batch mode: no input datasets matched --batch/--manifest.")
+            sys.exit(2)
+        # Every dataset's compute stages get an equal slice of the shared budget
+        stage_cpus = args.dataset_cpus or max(1, args.cpu_budget // min(len(datasets), args.cpu_budget))
+        logging.info(f"Batch of {len(datasets)} datasets sharing {args.cpu_budget} cores ({stage_cpus} per compute stage).")
+    else:
+        datasets = [(None, args.raw_data)]
+        stage_cpus = args.cpu_budget
+
+    modules = load_stage_modules() if args.executor == 'inprocess' else None
+    train_params = {
+        'n_iter': args.n_iter,
+        'cv_folds': args.cv_folds,
+        'rf_param_dist': args.rf_param_dist,
+        'xgb_param_dist': args.xgb_param_dist,
+        'random_state': args.random_state,
+    }
+    train_params = {k: v for k, v in train_params.items() if v not in (None, '')}
+    encoding = {k: getattr(args, k) for k in ('max_onehot', 'high_cardinality', 'n_hash_features')
+                if getattr(args, k) is not None}
+    stage_limits = json.loads(args.stage_limits) if args.stage_limits else {}
+    stages = []
+    for name, raw_data in datasets:
+        run_dir = os.path.join(base_output_dir, name) if name else base_output_dir
+        dataset_stages, paths = build_stages(raw_data, run_dir, target_col=args.target_col,
+                                             num_features=args.num_features, train_params=train_params,
+                                             modules=modules, cpu_budget=stage_cpus,
+                                             artifact_format=args.artifact_format, csv_exports=args.csv_exports,
+                                             chunksize=args.chunksize, encoding=encoding,
+                                             dtype_policy=args.dtype_policy, n_workers=args.n_workers,
+                                             parallel_backend=args.parallel_backend, group_col=args.group_col,
+                                             rolling_windows=args.rolling_windows,
+                                             selection_sample=args.selection_sample, mi_method=args.mi_method,
+                                             mi_sample_rows=args.mi_sample_rows,
+                                             redundancy_threshold=args.redundancy_threshold,
+                                             feature_state=args.feature_state)
+        for stage in dataset_stages:
+            overrides = stage_limits.get(stage.name, {})
+            stage.timeout = overrides.get('timeout', args.stage_timeout)
+            stage.max_memory_mb = overrides.get('max_memory_mb', args.stage_max_memory_mb)
+        stages.extend(prefix_stages(dataset_stages, name) if name else dataset_stages)
+    if args.executor == 'inprocess' and any(s.timeout or s.max_memory_mb for s in stages):
+        logging.warning("Stage timeouts and memory limits are enforced by the subprocess executor only; "
+                        "use --executor subprocess to have the driver kill runaway stages.")
+    git_commit = get_git_commit()
+    # One persistent digest cache for the driver and every stage subprocess
+    os.environ.setdefault('ARTIFACT_HASH_CACHE', os.path.join(args.cache_dir, 'hash_cache.json'))
+    cache = None if args.no_cache else StageCache(args.cache_dir, code_version=git_commit)
+    perf = PerfRecorder(args.perf_history, run_id=base_output_dir, executor=args.executor, git_commit=git_commit,
+                        window=args.perf_window, tolerance=args.perf_tolerance)
+    failure = None
+    try:
+        # In batch mode one dataset's failure must not stop the others, and finished frames are freed early
+        run_dag(stages, mode=args.executor, runner=run_cli, cache=cache, run_dir=base_output_dir,
+                cpu_budget=args.cpu_budget, perf=perf, checkpoints=StageCheckpoints(base_output_dir),
+                keep_going=batch, release_results=batch)
+    except PipelineFailure as e:
+        failure = e
+    except SystemExit:
+        perf.save(base_output_dir)
+        raise
+    except Exception:
+        logging.exception("Pipeline driver failed")
+        perf.save(base_output_dir)
+        sys.exit(1)
+    if batch:
+        write_batch_summary(base_output_dir, datasets, perf.records,
+                            failures=failure.failures if failure else None,
+                            skipped=failure.skipped if failure else None)
+    if failure is not None:
+        perf.save(base_output_dir)
+        logging.error(f"Pipeline finished with failures: {failure}")
+        sys.exit(1)
+    # Compare before appending so this run is judged only against earlier ones
+    regressions = perf.compare()
+    perf.save(base_output_dir)
+    if regressions and args.perf_gate:
+        logging.error(f"Performance gate failed: {len(regressions)} regression(s) beyond "
+                      f"{args.perf_tolerance:.0%} of the rolling baseline.")
+        sys.exit(4)
+    logging.info("All designated output artifacts present. Pipeline execution completed successfully.")
     logging.info(f"Pipeline finished: All workflow stages executed and validated.")
 
 
@@ -180,6 +659,5 @@ if __name__ == "__main__":
         main()
     except Exception as e:
         logging.error(f"Fatal pipeline error: {e}")
-        logging.error("Exception Traceback:
-" + traceback.format_exc())
+        logging.error("Exception Traceback:\n" + traceback.format_exc())
         sys.exit(99)
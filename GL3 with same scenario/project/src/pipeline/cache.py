@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.hashing import default_cache, file_digest
+
+MANIFEST_NAME = 'cache_manifest.json'
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _file_sha256(path: str) -> str:
+    return file_digest(path, 'sha256')
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """
+    Hard-links src to dst (no data copied), falling back to a metadata-preserving copy across devices.
+    Returns 'link' or 'copy'.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return 'link'
+    except OSError:
+        shutil.copy2(src, dst)
+        return 'copy'
+
+
+def unshare_files(directory: str) -> int:
+    """
+    Gives every hard-linked file under directory an inode of its own (copy, then rename over it), so a
+    stage re-running there cannot rewrite a cache entry through a shared inode. Returns the files copied.
+    """
+    copied = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.isfile(path) and os.stat(path).st_nlink > 1:
+                tmp_path = f"{path}.unshare-{os.getpid()}"
+                shutil.copy2(path, tmp_path)
+                os.replace(tmp_path, path)
+                copied += 1
+    return copied
+
+
+def source_digest(source_dir: str = SOURCE_DIR) -> str:
+    """SHA-256 over the relative paths and digests of every .py file under source_dir."""
+    files = sorted(os.path.join(root, f) for root, dirs, names in os.walk(source_dir)
+                   if '__pycache__' not in root for f in names if f.endswith('.py'))
+    blob = json.dumps([[os.path.relpath(p, source_dir), file_digest(p, 'sha256', persist=False)] for p in files])
+    default_cache().save()
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def _file_stat(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class StageCache:
+    """
+    Content-addressed store of stage output directories.
+
+    A stage's key hashes its external input checksums, its parameters, the code version (git commit, the
+    stage script checksum and the digest of every module under source_dir, committed or not) and the keys
+    of its upstream stages, so a change anywhere upstream invalidates everything downstream. Entries live
+    in <cache_dir>/<stage>/<key>/ and are restored into a new run directory by hard link (or copy); the
+    executor unshares a stage's outputs before re-running it (see unshare_files), and lookup rejects an
+    entry whose files changed size or mtime since it was stored.
+    """
+
+    def __init__(self, cache_dir: str, code_version: str = 'N/A', source_dir: str = SOURCE_DIR):
+        self.cache_dir = cache_dir
+        self.code_version = code_version
+        self.source_digest = source_digest(source_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def unshare(output_dir: str):
+        """Called before a stage (re-)runs in output_dir; see unshare_files."""
+        if os.path.isdir(output_dir) and unshare_files(output_dir):
+            logging.info(f"Unshared cached artifacts in {output_dir} before re-running the stage")
+
+    def key_payload(self, stage, upstream_keys: Dict[str, str]) -> Dict[str, Any]:
+        inputs = {}
+        for path in stage.inputs:
+            inputs[os.path.basename(path)] = _file_sha256(path) if os.path.isfile(path) else None
+        return {
+            'stage': stage.name,
+            'params': stage.params,
+            'inputs': inputs,
+            'upstream': {dep: upstream_keys.get(dep) for dep in stage.deps},
+            'git_commit': self.code_version,
+            'code_checksum': _file_sha256(stage.code) if stage.code and os.path.isfile(stage.code) else None,
+            'source_digest': self.source_digest,
+        }
+
+    def stage_key(self, stage, upstream_keys: Dict[str, str]):
+        """
+        Returns (key, payload): the SHA-256 of the canonical JSON payload, and the payload itself for the manifest.
+        """
+        payload = self.key_payload(stage, upstream_keys)
+        blob = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(blob).hexdigest(), payload
+
+    def _entry_dir(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, key)
+
+    def lookup(self, stage_name: str, key: str) -> Optional[Dict[str, Any]]:
+        manifest_path = os.path.join(self._entry_dir(stage_name, key), MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable cache manifest {manifest_path}: {e}")
+            return None
+        entry = self._entry_dir(stage_name, key)
+        if not all(os.path.isfile(os.path.join(entry, name)) for name in manifest.get('files', [])):
+            logging.warning(f"Cache entry {entry} is incomplete; recomputing stage '{stage_name}'.")
+            return None
+        changed = [name for name, stat in manifest.get('stats', {}).items()
+                   if _file_stat(os.path.join(entry, name)) != stat]
+        if changed:
+            logging.warning(f"Cache entry {entry} was modified after it was stored ({changed}); "
+                            f"recomputing stage '{stage_name}'.")
+            return None
+        return manifest
+
+    def restore(self, stage_name: str, key: str, output_dir: str) -> bool:
+        """
+        Materializes a cached stage output directory into output_dir. Returns False on a miss.
+        """
+        manifest = self.lookup(stage_name, key)
+        if manifest is None:
+            return False
+        entry = self._entry_dir(stage_name, key)
+        os.makedirs(output_dir, exist_ok=True)
+        modes = set()
+        for name in manifest['files']:
+            dst = os.path.join(output_dir, name)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            modes.add(link_or_copy(os.path.join(entry, name), dst))
+        logging.info(f"Stage cache hit for '{stage_name}' (key {key[:12]}): reused {len(manifest['files'])} "
+                     f"artifacts from run {manifest.get('run_dir')} via {'/'.join(sorted(modes)) or 'link'}")
+        return True
+
+    def store(self, stage_name: str, key: str, output_dir: str, payload: Dict[str, Any] = None, run_dir: str = None):
+        """
+        Snapshots the files in output_dir into the cache under key. The entry is staged in a temporary
+        directory and renamed into place, so readers never see a partially written entry.
+        """
+        entry = self._entry_dir(stage_name, key)
+        if os.path.isdir(entry):
+            if self.lookup(stage_name, key) is not None:
+                return entry
+            shutil.rmtree(entry, ignore_errors=True)  # incomplete or modified: replaced below
+        tmp_entry = f"{entry}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        # Relative paths, so directory artifacts (e.g. npy column stores) are captured file by file
+        files = sorted(
+            os.path.relpath(os.path.join(root, f), output_dir)
+            for root, _, names in os.walk(output_dir) for f in names
+        )
+        for name in files:
+            dst = os.path.join(tmp_entry, name)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            link_or_copy(os.path.join(output_dir, name), dst)
+        manifest = {
+            'stage': stage_name,
+            'key': key,
+            'key_payload': payload,
+            'files': files,
+            'stats': {name: _file_stat(os.path.join(tmp_entry, name)) for name in files},
+            'run_dir': run_dir,
+            'created': datetime.now().isoformat(),
+        }
+        with open(os.path.join(tmp_entry, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Another run stored the same key concurrently; keep theirs.
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        logging.info(f"Stored stage '{stage_name}' outputs in cache (key {key[:12]}, {len(files)} files)")
+        return entry
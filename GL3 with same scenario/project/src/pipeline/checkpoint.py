@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.hashing import artifact_checksums, file_digest
+from pipeline.cache import SOURCE_DIR, source_digest
+
+MARKER_DIR = '.stages'
+
+
+class StageCheckpoints:
+    """
+    Completion markers for the stages of one run directory, used by `main.py --resume`.
+
+    When a stage finishes, <run_dir>/.stages/<stage>.done.json records its fingerprint (params, checksums of
+    its input files and directories, its script and the digest of every module under source_dir, as
+    StageCache keys do) and the checksum of every file in its output directory. On resume a stage counts as
+    complete only if its marker exists, the fingerprint is unchanged and all recorded artifacts still hash
+    to the same value; the executor re-runs everything from the first stage that fails this check.
+    """
+
+    def __init__(self, run_dir: str, source_dir: str = SOURCE_DIR):
+        self.run_dir = run_dir
+        self.marker_dir = os.path.join(run_dir, MARKER_DIR)
+        self.source_digest = source_digest(source_dir)
+
+    def _marker_path(self, stage_name: str) -> str:
+        return os.path.join(self.marker_dir, f'{stage_name}.done.json')
+
+    def fingerprint(self, stage) -> Dict[str, Any]:
+        checksums = artifact_checksums([p for p in stage.inputs if os.path.exists(p)])
+        return {
+            'params': json.loads(json.dumps(stage.params, sort_keys=True, default=str)),
+            'inputs': {p: checksums.get(p) for p in stage.inputs},
+            'code': file_digest(stage.code) if stage.code and os.path.isfile(stage.code) else None,
+            'source_digest': self.source_digest,
+        }
+
+    @staticmethod
+    def _artifacts(stage) -> Dict[str, str]:
+        if not stage.output_dir or not os.path.isdir(stage.output_dir):
+            return {}
+        files = sorted(os.path.join(root, f) for root, _, names in os.walk(stage.output_dir) for f in names)
+        checksums = artifact_checksums(files)
+        return {os.path.relpath(p, stage.output_dir): checksums[p] for p in files}
+
+    def mark_complete(self, stage):
+        os.makedirs(self.marker_dir, exist_ok=True)
+        marker = {
+            'stage': stage.name,
+            'completed': datetime.now().isoformat(),
+            'fingerprint': self.fingerprint(stage),
+            'output_dir': stage.output_dir,
+            'artifacts': self._artifacts(stage),
+        }
+        tmp_path = self._marker_path(stage.name) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(marker, f, indent=2)
+        os.replace(tmp_path, self._marker_path(stage.name))
+
+    def is_complete(self, stage) -> bool:
+        path = self._marker_path(stage.name)
+        if not os.path.isfile(path):
+            return False
+        try:
+            with open(path) as f:
+                marker = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable completion marker {path}: {e}")
+            return False
+        if marker.get('fingerprint') != self.fingerprint(stage):
+            logging.info(f"Stage '{stage.name}' changed since it completed (params, inputs or code); re-running.")
+            return False
+        recorded = marker.get('artifacts', {})
+        if recorded:
+            paths = {rel: os.path.join(stage.output_dir, rel) for rel in recorded}
+            missing = [rel for rel, p in paths.items() if not os.path.isfile(p)]
+            if missing:
+                logging.info(f"Stage '{stage.name}' is missing artifacts {missing}; re-running.")
+                return False
+            current = artifact_checksums(list(paths.values()))
+            changed = [rel for rel, p in paths.items() if current[p] != recorded[rel]]
+            if changed:
+                logging.info(f"Stage '{stage.name}' artifacts changed since completion {changed}; re-running.")
+                return False
+        return True
+
+    def clear(self, stage_name: str):
+        if os.path.exists(self._marker_path(stage_name)):
+            os.remove(self._marker_path(stage_name))
@@ -0,0 +1,316 @@
+import logging
+import functools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage. `func` runs in-process and receives a dict of upstream stage results keyed by
+    stage name; `cmd` is the equivalent shell command used by the subprocess fallback executor.
+    `inputs`, `params` and `code` feed the stage cache key; `output_dir` holds everything the stage
+    writes, and `load` rebuilds the in-memory result from that directory after a cache hit.
+    `cpus` is the number of cores the stage is allowed to use; stages whose dependencies are met run
+    concurrently as long as their combined `cpus` fits the executor's budget.
+    `reads` / `writes` name the data artifacts the stage consumes and produces (first entry is the main
+    frame); they are only used for the rows and bytes columns of its performance record.
+    `timeout` (seconds) and `max_memory_mb` are handed to the subprocess runner, which kills the stage
+    when it exceeds them. `group` names the pipeline a stage belongs to when several share one run.
+    """
+    name: str
+    func: Optional[Callable[[Dict[str, Any]], Any]] = None
+    deps: List[str] = field(default_factory=list)
+    cmd: Optional[str] = None
+    label: Optional[str] = None
+    inputs: List[str] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+    output_dir: Optional[str] = None
+    code: Optional[str] = None
+    load: Optional[Callable[[], Any]] = None
+    cpus: int = 1
+    reads: List[str] = field(default_factory=list)
+    writes: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+    max_memory_mb: Optional[int] = None
+    group: Optional[str] = None
+
+    @property
+    def display_name(self) -> str:
+        return self.label or self.name
+
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    """
+    Orders stages so every stage follows its dependencies, keeping declaration order among peers.
+    Raises ValueError for unknown dependencies or cycles.
+    """
+    by_name = {s.name: s for s in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Duplicate stage names in pipeline definition.")
+    for s in stages:
+        unknown = [d for d in s.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"Stage '{s.name}' depends on unknown stages: {unknown}")
+    ordered, done, visiting = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Dependency cycle detected at stage '{stage.name}'")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for s in stages:
+        visit(s)
+    return ordered
+
+
+class LazyResult:
+    """
+    Defers rebuilding a cached stage's in-memory result until a downstream stage actually needs it.
+    """
+
+    def __init__(self, loader: Callable[[], Any]):
+        self._loader = loader
+        self._loaded = False
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if not self._loaded:
+                self._value = self._loader() if self._loader else None
+                self._loaded = True
+        return self._value
+
+
+def _resolve(value):
+    return value.get() if isinstance(value, LazyResult) else value
+
+
+class PipelineFailure(Exception):
+    """
+    Raised by keep_going runs once every runnable stage has finished: `failures` maps failed stage names
+    to their exception, `skipped` lists stages not run because a dependency failed, and `results` holds
+    the results of the stages that succeeded.
+    """
+
+    def __init__(self, failures: Dict[str, BaseException], skipped: List[str], results: Dict[str, Any]):
+        self.failures = failures
+        self.skipped = skipped
+        self.results = results
+        super().__init__(f"{len(failures)} stage(s) failed: {sorted(failures)}; {len(skipped)} skipped")
+
+
+def _call_unprefixed(func, prefix: str, inputs: Dict[str, Any]):
+    return func({(name[len(prefix):] if name.startswith(prefix) else name): value for name, value in inputs.items()})
+
+
+def prefix_stages(stages: List[Stage], prefix: str) -> List[Stage]:
+    """
+    Namespaces a pipeline's stages as '<prefix>.<name>' (dependencies included) and puts them in scheduling
+    group `prefix`, so several pipelines can share one DAG run (batch mode). Stage callables still see
+    their inputs under the original, unprefixed names.
+    """
+    for stage in stages:
+        if stage.func is not None:
+            stage.func = functools.partial(_call_unprefixed, stage.func, f"{prefix}.")
+        stage.label = f"[{prefix}] {stage.display_name}"
+        stage.name = f"{prefix}.{stage.name}"
+        stage.deps = [f"{prefix}.{dep}" for dep in stage.deps]
+        stage.group = prefix
+    return stages
+
+
+def _execute(stages: List[Stage], run_stage: Callable[[Stage, Dict[str, Any]], Any], cache=None, run_dir: str = None,
+             cpu_budget: int = 1, perf=None, checkpoints=None, keep_going: bool = False,
+             release_results: bool = False) -> Dict[str, Any]:
+    """
+    Scheduler shared by both executors. Ready stages (all dependencies finished) are started while their
+    `cpus` fit in `cpu_budget`; a stage asking for more than the budget is clamped and runs once everything
+    else has drained. With cpu_budget=1 this degenerates to sequential execution.
+    Ready stages are taken from the scheduling group (Stage.group) with the fewest running stages first,
+    then in declaration order: one pipeline runs in declaration order, while in a batch every dataset gets
+    a fair share of the cores and earlier datasets are finished before later ones are started.
+    When `perf` (a pipeline.perf.PerfRecorder) is given, every executed or cache-restored stage is recorded.
+    With `checkpoints` (a pipeline.checkpoint.StageCheckpoints) finished stages leave completion markers,
+    and a stage whose marker is still valid is skipped as long as all of its dependencies were skipped too.
+    With keep_going, a failing stage only stops its own dependants and PipelineFailure is raised at the
+    end; release_results drops a stage's in-memory result once all of its dependants have finished.
+    """
+    cpu_budget = max(1, cpu_budget)
+    pending = topological_order(stages)
+    order = {s.name: i for i, s in enumerate(pending)}
+    dependants = {s.name: 0 for s in pending}
+    for s in pending:
+        for dep in s.deps:
+            dependants[dep] += 1
+    results, keys, running = {}, {}, {}
+    failures, skipped = {}, []
+    resumed = set()
+    group_running = {}
+    used = 0
+
+    def release(stage):
+        if not release_results:
+            return
+        for dep in stage.deps:
+            dependants[dep] -= 1
+            if dependants[dep] == 0 and dep in results:
+                results[dep] = None
+
+    def skip_dependants_of(failed_name):
+        blocked = {failed_name}
+        for s in list(pending):
+            if any(dep in blocked for dep in s.deps):
+                pending.remove(s)
+                blocked.add(s.name)
+                skipped.append(s.name)
+                logging.warning(f"Skipping stage '{s.name}': upstream stage '{failed_name}' failed.")
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as pool:
+        try:
+            while pending or running:
+                ready = [s for s in pending if all(dep in results for dep in s.deps)]
+                while ready:
+                    # Re-rank after every launch so the next slot goes to the least busy group
+                    stage = min(ready, key=lambda s: (group_running.get(s.group, 0), order[s.name]))
+                    ready.remove(stage)
+                    need = min(max(1, stage.cpus), cpu_budget)
+                    if running and used + need > cpu_budget:
+                        continue
+                    pending.remove(stage)
+                    key = payload = None
+                    if cache is not None and stage.output_dir:
+                        key, payload = cache.stage_key(stage, keys)
+                        keys[stage.name] = key
+                    if checkpoints is not None:
+                        if all(dep in resumed for dep in stage.deps) and checkpoints.is_complete(stage):
+                            logging.info(f"Resuming: stage '{stage.name}' already completed in {run_dir}; skipping.")
+                            results[stage.name] = LazyResult(stage.load)
+                            resumed.add(stage.name)
+                            if perf is not None:
+                                perf.record_resumed(stage)
+                            release(stage)
+                            continue
+                        checkpoints.clear(stage.name)
+                    if key is not None and cache.restore(stage.name, key, stage.output_dir):
+                        results[stage.name] = LazyResult(stage.load)
+                        if perf is not None:
+                            perf.record_cache_hit(stage)
+                        if checkpoints is not None:
+                            checkpoints.mark_complete(stage)
+                        release(stage)
+                        continue
+                    if cache is not None and stage.output_dir:
+                        cache.unshare(stage.output_dir)
+                    dep_results = {dep: results[dep] for dep in stage.deps}
+                    if perf is not None:
+                        future = pool.submit(perf.measure, stage, run_stage, stage, dep_results)
+                    else:
+                        future = pool.submit(run_stage, stage, dep_results)
+                    running[future] = (stage, key, payload, need)
+                    group_running[stage.group] = group_running.get(stage.group, 0) + 1
+                    used += need
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key, payload, need = running.pop(future)
+                    used -= need
+                    group_running[stage.group] -= 1
+                    try:
+                        results[stage.name] = future.result()
+                    except (Exception, SystemExit) as e:
+                        if not keep_going:
+                            raise
+                        logging.error(f"Stage '{stage.name}' failed: {e!r}; continuing with independent stages.")
+                        failures[stage.name] = e
+                        skip_dependants_of(stage.name)
+                        continue
+                    if key is not None:
+                        cache.store(stage.name, key, stage.output_dir, payload=payload, run_dir=run_dir)
+                    if checkpoints is not None:
+                        checkpoints.mark_complete(stage)
+                    release(stage)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+    if failures:
+        raise PipelineFailure(failures, skipped, results)
+    return results
+
+
+def _run_stage_inprocess(stage: Stage, dep_results: Dict[str, Any]) -> Any:
+    if stage.func is None:
+        raise ValueError(f"Stage '{stage.name}' has no in-process callable.")
+    logging.info(f"--- Executing (in-process): {stage.display_name} ---")
+    inputs = {dep: _resolve(value) for dep, value in dep_results.items()}
+    try:
+        return stage.func(inputs)
+    except SystemExit as e:
+        logging.error(f"Pipeline step '{stage.display_name}' exited with code {e.code}.")
+        raise
+    except Exception as e:
+        logging.error(f"Pipeline step '{stage.display_name}' failed: {e}")
+        logging.error("Exception Traceback:\n" + traceback.format_exc())
+        raise
+
+
+def run_inprocess(stages: List[Stage], cache=None, run_dir: str = None, cpu_budget: int = 1,
+                  perf=None, checkpoints=None, **options) -> Dict[str, Any]:
+    """
+    Executes stages in dependency order inside the current interpreter, passing each stage's return
+    value (DataFrames, arrays, dicts) to its dependants in memory. Stages restored from the cache
+    are represented by LazyResult until something downstream needs them.
+    """
+    return _execute(stages, _run_stage_inprocess, cache=cache, run_dir=run_dir, cpu_budget=cpu_budget, perf=perf,
+                    checkpoints=checkpoints, **options)
+
+
+def run_subprocess(stages: List[Stage], runner: Callable[[str, str], Any], cache=None, run_dir: str = None,
+                   cpu_budget: int = 1, perf=None, checkpoints=None, **options) -> Dict[str, Any]:
+    """
+    Fallback executor: runs each stage's shell command via `runner(cmd, label)` in dependency order,
+    adding `timeout=` / `max_memory_mb=` keywords for stages that set them. Stages exchange data only
+    through the files named in their commands; driver-side stages without a command (hashing, reporting)
+    still run in-process.
+    """
+    def run_stage(stage, dep_results):
+        if stage.cmd is None:
+            if stage.func is None:
+                raise ValueError(f"Stage '{stage.name}' has no subprocess command.")
+            return _run_stage_inprocess(stage, dep_results)
+        limits = {k: v for k, v in (('timeout', stage.timeout), ('max_memory_mb', stage.max_memory_mb))
+                  if v is not None}
+        return runner(stage.cmd, stage.display_name, **limits)
+    return _execute(stages, run_stage, cache=cache, run_dir=run_dir, cpu_budget=cpu_budget, perf=perf,
+                    checkpoints=checkpoints, **options)
+
+
+def run_dag(stages: List[Stage], mode: str = 'inprocess', runner: Callable[[str, str], Any] = None, cache=None,
+            run_dir: str = None, cpu_budget: int = 1, perf=None, checkpoints=None, **options) -> Dict[str, Any]:
+    """
+    Dispatches to the in-process executor or the subprocess fallback, optionally skipping stages whose
+    cache key matches a previous run (see pipeline.cache.StageCache). Independent stages share `cpu_budget` cores.
+    `options` (keep_going, release_results) are passed to the scheduler.
+    """
+    if mode == 'inprocess':
+        return run_inprocess(stages, cache=cache, run_dir=run_dir, cpu_budget=cpu_budget, perf=perf,
+                             checkpoints=checkpoints, **options)
+    if mode == 'subprocess':
+        if runner is None:
+            raise ValueError("Subprocess mode requires a command runner.")
+        return run_subprocess(stages, runner, cache=cache, run_dir=run_dir, cpu_budget=cpu_budget, perf=perf,
+                              checkpoints=checkpoints, **options)
+    raise ValueError(f"Unknown executor mode: {mode}")
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import statistics
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PROC_AVAILABLE = os.path.isdir('/proc/self')
+
+# Metrics compared against the rolling baseline, with the smallest baseline value worth gating on
+# (sub-second stages and small footprints are too noisy to judge).
+GATED_METRICS = {
+    'wall_time_s': 1.0,
+    'cpu_time_s': 1.0,
+    'peak_rss_bytes': 64 * 1024 * 1024,
+}
+
+
+def _read_proc_stat(pid: int):
+    """
+    Returns (ppid, cpu_seconds, rss_bytes) for pid from /proc, where cpu_seconds includes reaped children.
+    """
+    with open(f'/proc/{pid}/stat') as f:
+        data = f.read()
+    # The command name may contain spaces; fields after the closing paren are positional
+    fields = data[data.rindex(')') + 2:].split()
+    ppid = int(fields[1])
+    utime, stime, cutime, cstime = (int(x) for x in fields[11:15])
+    rss_pages = int(fields[21])
+    return ppid, (utime + stime + cutime + cstime) / CLOCK_TICKS, rss_pages * PAGE_SIZE
+
+
+def process_tree_usage(root_pid: int = None):
+    """
+    CPU seconds and resident bytes of root_pid plus all live descendants (Linux /proc). Falls back to
+    getrusage for the current process and its reaped children elsewhere.
+    """
+    root_pid = root_pid or os.getpid()
+    if not PROC_AVAILABLE:
+        if resource is None:
+            return time.process_time(), 0
+        self_usage = resource.getrusage(resource.RUSAGE_SELF)
+        child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = self_usage.ru_utime + self_usage.ru_stime + child_usage.ru_utime + child_usage.ru_stime
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return cpu, self_usage.ru_maxrss * scale
+    stats = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            stats[int(entry)] = _read_proc_stat(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    children = {}
+    for pid, (ppid, _, _) in stats.items():
+        children.setdefault(ppid, []).append(pid)
+    cpu, rss, stack = 0.0, 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid not in stats:
+            continue
+        _, pid_cpu, pid_rss = stats[pid]
+        cpu += pid_cpu
+        rss += pid_rss
+        stack.extend(children.get(pid, []))
+    return cpu, rss
+
+
+class ResourceMonitor:
+    """
+    Samples the driver's process tree (itself, subprocess stages, loky workers) in a background thread to
+    capture peak resident memory over a stage; CPU time is the tree's delta between start and stop.
+    When stages run concurrently their footprints overlap, so each sees the whole tree.
+    """
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.peak_rss = 0
+        self._cpu_start = 0.0
+        self._wall_start = 0.0
+
+    def _sample(self):
+        _, rss = process_tree_usage()
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start, self.peak_rss = process_tree_usage()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, float]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        cpu_end, rss = process_tree_usage()
+        self.peak_rss = max(self.peak_rss, rss)
+        return {
+            'wall_time_s': round(time.perf_counter() - self._wall_start, 4),
+            'cpu_time_s': round(max(0.0, cpu_end - self._cpu_start), 4),
+            'peak_rss_bytes': int(self.peak_rss),
+        }
+
+
+def artifact_size(path: str) -> Optional[int]:
+    if not path or not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def artifact_rows(path: str) -> Optional[int]:
+    """
+    Row count of a data artifact without loading it: npy schema sidecar, parquet/Arrow metadata, or a
+    newline count for CSV. Returns None for non-tabular or unreadable artifacts.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        if os.path.isdir(path):
+            schema_path = os.path.join(path, '_schema.json')
+            if not os.path.isfile(schema_path):
+                return None
+            with open(schema_path) as f:
+                return int(json.load(f)['n_rows'])
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.csv':
+            lines, last = 0, b'\n'
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    lines += chunk.count(b'\n')
+                    last = chunk[-1:]
+            if last != b'\n':
+                lines += 1
+            return max(0, lines - 1)
+        if ext == '.parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(path).metadata.num_rows
+        if ext in ('.feather', '.arrow', '.ipc'):
+            import pyarrow.ipc as ipc
+            with ipc.open_file(path) as reader:
+                return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    except Exception as e:
+        logging.warning(f"Could not count rows of {path}: {e}")
+    return None
+
+
+def _sum_known(values):
+    known = [v for v in values if v is not None]
+    return sum(known) if known else None
+
+
+class PerfRecorder:
+    """
+    Collects one machine-readable performance record per stage, appends them to a per-project JSONL
+    history and compares each stage with the rolling median of its previous successful runs.
+    """
+
+    def __init__(self, history_path: str, run_id: str, executor: str, git_commit: str = 'N/A',
+                 window: int = 5, tolerance: float = 0.25):
+        self.history_path = history_path
+        self.run_id = run_id
+        self.executor = executor
+        self.git_commit = git_commit
+        self.window = window
+        self.tolerance = tolerance
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _base_record(self, stage, status: str, cache_hit: bool) -> Dict[str, Any]:
+        reads = list(getattr(stage, 'reads', []) or [])
+        writes = list(getattr(stage, 'writes', []) or [])
+        return {
+            'run_id': self.run_id,
+            'timestamp': datetime.now().isoformat(),
+            'stage': stage.name,
+            'executor': self.executor,
+            'git_commit': self.git_commit,
+            'status': status,
+            'cache_hit': cache_hit,
+            'rows_in': artifact_rows(reads[0]) if reads else None,
+            'rows_out': artifact_rows(writes[0]) if writes else None,
+            'bytes_read': _sum_known(artifact_size(p) for p in reads),
+            'bytes_written': _sum_known(artifact_size(p) for p in writes),
+        }
+
+    def _emit(self, record: Dict[str, Any]):
+        with self._lock:
+            self.records.append(record)
+        logging.info(f"PERF {json.dumps(record, sort_keys=True)}")
+
+    def measure(self, stage, func, *args):
+        """
+        Runs func(*args) under a ResourceMonitor and records the stage, also when it fails.
+        """
+        monitor = ResourceMonitor().start()
+        status = 'failed'
+        try:
+            result = func(*args)
+            status = 'ok'
+            return result
+        finally:
+            metrics = monitor.stop()
+            record = self._base_record(stage, status, cache_hit=False)
+            record.update(metrics)
+            self._emit(record)
+
+    def record_cache_hit(self, stage):
+        record = self._base_record(stage, 'ok', cache_hit=True)
+        record.update({'wall_time_s': 0.0, 'cpu_time_s': 0.0, 'peak_rss_bytes': None})
+        self._emit(record)
+
+    def record_resumed(self, stage):
+        """
+        Records a stage skipped by --resume because the run directory already holds its finished outputs.
+        """
+        record = self._base_record(stage, 'resumed', cache_hit=False)
+        record.update({'wall_time_s': 0.0, 'cpu_time_s': 0.0, 'peak_rss_bytes': None})
+        self._emit(record)
+
+    def load_history(self) -> List[Dict[str, Any]]:
+        if not os.path.isfile(self.history_path):
+            return []
+        history = []
+        with open(self.history_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    history.append(json.loads(line))
+                except ValueError:
+                    logging.warning(f"Skipping malformed perf history line in {self.history_path}")
+        return history
+
+    def baseline(self, history, stage_name: str) -> Dict[str, float]:
+        """
+        Rolling median of the last `window` successful, non-cached runs of the stage with the same executor.
+        """
+        previous = [
+            r for r in history
+            if r.get('stage') == stage_name and r.get('executor') == self.executor
+            and r.get('status') == 'ok' and not r.get('cache_hit') and r.get('run_id') != self.run_id
+        ][-self.window:]
+        result = {}
+        for metric in GATED_METRICS:
+            values = [r[metric] for r in previous if r.get(metric) is not None]
+            if values:
+                result[metric] = statistics.median(values)
+        result['n_runs'] = len(previous)
+        return result
+
+    def compare(self, history=None) -> List[Dict[str, Any]]:
+        """
+        Returns one entry per metric that exceeds its baseline by more than `tolerance`.
+        """
+        history = self.load_history() if history is None else history
+        regressions = []
+        for record in self.records:
+            if record['status'] != 'ok' or record['cache_hit']:
+                continue
+            base = self.baseline(history, record['stage'])
+            if not base['n_runs']:
+                logging.info(f"No perf baseline yet for stage '{record['stage']}' ({self.executor}).")
+                continue
+            for metric, floor in GATED_METRICS.items():
+                current, reference = record.get(metric), base.get(metric)
+                if current is None or reference is None or reference < floor:
+                    continue
+                ratio = current / reference if reference else float('inf')
+                if ratio > 1 + self.tolerance:
+                    regressions.append({
+                        'stage': record['stage'], 'metric': metric, 'current': current,
+                        'baseline': reference, 'ratio': round(ratio, 3), 'baseline_runs': base['n_runs'],
+                    })
+        for r in regressions:
+            logging.warning(f"Perf regression in stage '{r['stage']}': {r['metric']} {r['current']} vs baseline "
+                            f"{r['baseline']} (x{r['ratio']}, median of {r['baseline_runs']} runs)")
+        return regressions
+
+    def save(self, run_dir: str = None):
+        """
+        Appends this run's records to the history file and writes them to <run_dir>/perf_records.json.
+        """
+        if run_dir:
+            path = os.path.join(run_dir, 'perf_records.json')
+            with open(path, 'w') as f:
+                json.dump(self.records, f, indent=2)
+        parent = os.path.dirname(self.history_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(self.history_path, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps(record, sort_keys=True) + '\n')
+        logging.info(f"Appended {len(self.records)} stage perf records to {self.history_path}")
@@ -4,17 +4,27 @@ import logging
 import json
 import getpass
 import hashlib
+import shutil
+import threading
+import warnings
 import joblib
+from joblib import Parallel, delayed
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from sklearn.model_selection import train_test_split, StratifiedKFold, RandomizedSearchCV
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterSampler
+from sklearn.metrics import check_scoring
 from sklearn.ensemble import RandomForestClassifier
 from xgboost import XGBClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
 from sklearn.utils.multiclass import type_of_target
 from typing import Any, Dict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.artifact_io import read_frame, secure_file_permissions
+from utils.dtypes import compact_dtypes, DTYPE_POLICIES
+
 # Try to import MLflow if available
 try:
     import mlflow
@@ -31,16 +41,6 @@ logging.basicConfig(
     ]
 )
 
-def secure_file_permissions(filepath: str):
-    """
-    Restricts file permissions to owner read/write only (POSIX).
-    """
-    try:
-        os.chmod(filepath, 0o600)
-        logging.info(f"Restricted permissions for {filepath} to owner read/write only.")
-    except Exception as e:
-        logging.warning(f"Could not set secure file permissions for {filepath}: {e}")
-
 def get_git_commit() -> str:
     """
     Attempts to obtain git commit SHA for provenance.
@@ -92,11 +92,12 @@ def check_data_drift(X_train, X_test, logger=logging, threshold=0.05):
     else:
         logger.info("No significant feature drift detected between train and test splits.")
 
-def load_feature_matrix(feature_matrix_path: str, target_col: str):
-    if not os.path.isfile(feature_matrix_path):
+def load_feature_matrix(feature_matrix_path: str, target_col: str, dtype_policy: str = 'compact'):
+    if not os.path.exists(feature_matrix_path):
         logging.error(f"Feature matrix file '{feature_matrix_path}' does not exist.")
         sys.exit(1)
-    df = pd.read_csv(feature_matrix_path)
+    # CSV artifacts come back as float64/int64: downcast (validated) to the pipeline dtype policy
+    df = compact_dtypes(read_frame(feature_matrix_path), exclude=[target_col], policy=dtype_policy)
     if target_col not in df.columns:
         logging.error(f"Target column '{target_col}' is not in the feature matrix.")
         sys.exit(2)
@@ -184,22 +185,266 @@ def has_imbalance(y, threshold=0.8):
         return True, counts.to_dict()
     return False, counts.to_dict()
 
-def main():
-    import argparse
-    parser = argparse.ArgumentParser(description="Train and tune supervised classification models (RandomForest, XGBoost)")
-    parser.add_argument('--feature_matrix', required=True, help='Input CSV file containing features and target column')
-    parser.add_argument('--target_col', required=True, help='Name of the target column for classification')
-    parser.add_argument('--artifacts_dir', required=True, help='Directory to save trained models and logs')
-    parser.add_argument('--test_size', type=float, default=0.2, help='Test set proportion')
-    parser.add_argument('--val_size', type=float, default=0.1, help='Validation set proportion (of entire data)')
-    parser.add_argument('--rf_param_dist', default='', help='JSON: param grid for RandomForest (or default)')
-    parser.add_argument('--xgb_param_dist', default='', help='JSON: param grid for XGBoost (or default)')
-    parser.add_argument('--cv_folds', type=int, default=5, help='Cross-validation folds for tuning')
-    parser.add_argument('--n_iter', type=int, default=30, help='Number of parameter settings sampled by randomized search')
-    parser.add_argument('--random_state', type=int, default=42, help='Random seed')
-    args = parser.parse_args()
-    os.makedirs(args.artifacts_dir, exist_ok=True)
-    X, y, df = load_feature_matrix(args.feature_matrix, args.target_col)
+def resolve_n_jobs(n_jobs: int) -> int:
+    """
+    Converts a joblib-style n_jobs (-1 = all cores, -2 = all but one, ...) into a concrete core count.
+    """
+    cpus = os.cpu_count() or 1
+    if not n_jobs:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return n_jobs
+
+def split_cpu_budget(budget: int, n_tasks: int):
+    """
+    Splits a core budget into n_tasks near-equal integer shares (each at least 1).
+    """
+    base, extra = divmod(max(budget, n_tasks), n_tasks)
+    return [base + (1 if i < extra else 0) for i in range(n_tasks)]
+
+def build_estimator(model_name: str, random_state: int):
+    """
+    Single-threaded base estimators: parallelism comes from the search's n_jobs, so nested
+    estimator threads never multiply the core count. The final refit gets the search's cores back.
+    """
+    if model_name == 'random_forest':
+        return RandomForestClassifier(random_state=random_state, n_jobs=1)
+    if model_name == 'xgboost':
+        return XGBClassifier(random_state=random_state, use_label_encoder=False, eval_metric='logloss', n_jobs=1)
+    raise ValueError(f"Unknown model: {model_name}")
+
+class ProgressScorer:
+    """
+    Wraps a scorer so every finished CV fit appends one byte to a progress file. Fits may run in any
+    search worker process; the file size is the number of fits finished so far.
+    """
+
+    def __init__(self, scorer, progress_path: str):
+        self.scorer = scorer
+        self.progress_path = progress_path
+
+    def __call__(self, estimator, X, y):
+        score = self.scorer(estimator, X, y)
+        with open(self.progress_path, 'ab') as f:
+            f.write(b'.')
+        return score
+
+    def __repr__(self):
+        return repr(self.scorer)
+
+class SearchProgressMonitor:
+    """
+    Logs live `PROGRESS train:` lines (fits and candidates finished per model) by polling the progress
+    files written by ProgressScorer, from a background thread of the process that started the searches.
+    """
+
+    def __init__(self, searches: Dict[str, Dict[str, Any]], interval: float = 5.0):
+        self.searches = searches
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = {}
+
+    def _report(self):
+        for name, info in self.searches.items():
+            try:
+                fits = os.path.getsize(info['path'])
+            except OSError:
+                continue
+            if self._last.get(name) == fits:
+                continue
+            self._last[name] = fits
+            total = info['candidates'] * info['cv_folds']
+            logging.info(f"PROGRESS train: {name} search {fits}/{total} fits, "
+                         f"{fits // info['cv_folds']}/{info['candidates']} candidates finished")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._report()
+
+    def __enter__(self):
+        for info in self.searches.values():
+            open(info['path'], 'wb').close()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._report()
+        # Progress files are scratch state, not training artifacts
+        for info in self.searches.values():
+            if os.path.exists(info['path']):
+                os.remove(info['path'])
+        return False
+
+def search_progress_path(artifacts_dir: str, model_name: str) -> str:
+    return os.path.join(artifacts_dir, f'.{model_name}_search_progress')
+
+def search_state_dir(artifacts_dir: str) -> str:
+    return os.path.join(artifacts_dir, '.search_state')
+
+def _take(data, idx):
+    return data.iloc[idx] if hasattr(data, 'iloc') else data[idx]
+
+def _fit_and_score_fold(estimator, params, X, y, train_idx, test_idx, scorer):
+    est = clone(estimator).set_params(**params)
+    try:
+        est.fit(_take(X, train_idx), _take(y, train_idx))
+        return float(scorer(est, _take(X, test_idx), _take(y, test_idx)))
+    except Exception as e:
+        # Same policy as RandomizedSearchCV(error_score=np.nan): a failing candidate is scored NaN, not fatal
+        warnings.warn(f"Fit failed for parameters {params}: {e}")
+        return float('nan')
+
+def _load_search_state(state_path: str, fingerprint: str, candidates) -> Dict[int, dict]:
+    """
+    Finished candidates from a previous attempt, keyed by candidate index. A state file written for a
+    different search (fingerprint) or with mismatching candidate parameters is ignored.
+    """
+    if not os.path.isfile(state_path):
+        return {}
+    done = {}
+    with open(state_path) as f:
+        lines = [line for line in f if line.strip()]
+    try:
+        header = json.loads(lines[0]) if lines else {}
+    except ValueError:
+        header = {}
+    if header.get('fingerprint') != fingerprint:
+        logging.info(f"Discarding search checkpoint {state_path}: it belongs to a different search.")
+        return {}
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # A torn last line from an interrupted write; that candidate simply runs again
+            continue
+        idx = entry.get('index')
+        if isinstance(idx, int) and idx < len(candidates) and \
+                entry.get('params') == json.loads(json.dumps(candidates[idx], default=str)):
+            done[idx] = entry
+    return done
+
+def resumable_search(model_name: str, estimator, param_dist, X, y, scorer, cv, n_iter: int, random_state: int,
+                     n_jobs: int = 1, state_path: str = None):
+    """
+    Randomized search equivalent to RandomizedSearchCV(refit=True): same sampled candidates, CV splits, mean
+    fold score ranking (first best wins) and refit on the full training split. Candidates are evaluated in
+    batches of n_jobs and each finished candidate is appended to `state_path`, so an interrupted search
+    resumes with only the remaining candidates. The refit of the best candidate runs with n_jobs
+    estimator threads. Returns (best_estimator, best_params, best_score).
+    """
+    candidates = list(ParameterSampler(param_dist, n_iter, random_state=random_state))
+    splits = list(cv.split(X, y))
+    fingerprint = joblib.hash((model_name, estimator.get_params(), json.dumps(param_dist, sort_keys=True, default=str),
+                               n_iter, random_state, repr(cv), repr(scorer), X, y))
+    done = _load_search_state(state_path, fingerprint, candidates) if state_path else {}
+    logging.info(f"Fitting {len(splits)} folds for each of {len(candidates)} candidates, totalling "
+                 f"{len(splits) * len(candidates)} fits ({len(done)} candidates restored from checkpoint)")
+    if state_path:
+        # Rewrite header + valid entries, dropping a torn last line so new entries append cleanly
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        with open(state_path, 'w') as f:
+            f.write(json.dumps({'model': model_name, 'fingerprint': fingerprint}) + '\n')
+            for i in sorted(done):
+                f.write(json.dumps(done[i]) + '\n')
+    todo = [i for i in range(len(candidates)) if i not in done]
+    batch = max(1, n_jobs)
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for start in range(0, len(todo), batch):
+            chunk = todo[start:start + batch]
+            scores = parallel(
+                delayed(_fit_and_score_fold)(estimator, candidates[i], X, y, train_idx, test_idx, scorer)
+                for i in chunk for train_idx, test_idx in splits
+            )
+            entries = []
+            for pos, i in enumerate(chunk):
+                fold_scores = scores[pos * len(splits):(pos + 1) * len(splits)]
+                entry = {'index': i, 'params': json.loads(json.dumps(candidates[i], default=str)),
+                         'fold_scores': fold_scores, 'mean_score': float(np.mean(fold_scores))}
+                done[i] = entry
+                entries.append(entry)
+            if state_path:
+                with open(state_path, 'a') as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+    means = np.array([done[i]['mean_score'] for i in range(len(candidates))], dtype=float)
+    means = np.where(np.isnan(means), -np.inf, means)
+    best_index = int(np.argmax(means))
+    best_params = candidates[best_index]
+    best = clone(estimator).set_params(**best_params, n_jobs=n_jobs)
+    best.fit(X, y)
+    return best, best_params, float(means[best_index])
+
+def tune_model(model_name: str, param_dist, splits, scoring: str, cv_folds: int, n_iter: int,
+               random_state: int, artifacts_dir: str, n_jobs: int = 1, progress_path: str = None) -> Dict[str, Any]:
+    """
+    Runs the randomized search for one model, evaluates the best estimator on train/val/test, and
+    persists the model and its feature importance. Self-contained so it can run in a worker process.
+    With progress_path, each finished CV fit is counted there (see SearchProgressMonitor); finished
+    candidates are checkpointed under <artifacts_dir>/.search_state/ so a re-run resumes the search.
+    """
+    X_train, X_val, X_test, y_train, y_val, y_test = splits
+    estimator = build_estimator(model_name, random_state)
+    scorer = check_scoring(estimator, scoring=scoring)
+    if progress_path:
+        scorer = ProgressScorer(scorer, progress_path)
+    logging.info(f"Starting {model_name} hyperparameter search with scoring: {scoring} (n_jobs={n_jobs})")
+    best, best_params, _ = resumable_search(
+        model_name, estimator, param_dist, X_train, y_train, scorer,
+        cv=StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=random_state),
+        n_iter=n_iter, random_state=random_state, n_jobs=n_jobs,
+        state_path=os.path.join(search_state_dir(artifacts_dir), f'{model_name}.jsonl')
+    )
+    featimp_path = log_feature_importance(best, X_train, artifacts_dir, model_name)
+    metrics = {}
+    metrics.update(evaluate(best, X_train, y_train, prefix='train'))
+    metrics.update(evaluate(best, X_val, y_val, prefix='val'))
+    metrics.update(evaluate(best, X_test, y_test, prefix='test'))
+    model_path = os.path.join(artifacts_dir, f'{model_name}_best.joblib')
+    joblib.dump(best, model_path)
+    secure_file_permissions(model_path)
+    logging.info(f"Saved {model_name} model to {model_path}")
+    return {
+        'hyperparameters': param_dist,
+        'best_param': best_params,
+        'metrics': metrics,
+        'feature_importance_path': featimp_path,
+        'model_path': model_path
+    }
+
+def train_models(
+    X: pd.DataFrame,
+    y: pd.Series,
+    df: pd.DataFrame,
+    artifacts_dir: str,
+    target_col: str,
+    feature_matrix_path: str = None,
+    test_size: float = 0.2,
+    val_size: float = 0.1,
+    rf_param_dist: str = '',
+    xgb_param_dist: str = '',
+    cv_folds: int = 5,
+    n_iter: int = 30,
+    random_state: int = 42,
+    cli_command: str = None,
+    n_jobs: int = -1,
+    log_to_mlflow: bool = True,
+    dtype_policy: str = 'compact'
+) -> Dict[str, Any]:
+    """
+    Tunes, evaluates and persists RandomForest and XGBoost models on an in-memory feature matrix.
+    Shared by the CLI and the in-process pipeline executor; returns the training log dict.
+    n_jobs is the total core budget for both searches; log_to_mlflow=False leaves MLflow logging to the caller.
+    Under the 'compact' dtype_policy X is float32, which both RandomForest and XGBoost use natively (no copy).
+    """
+    os.makedirs(artifacts_dir, exist_ok=True)
+    X = compact_dtypes(X, policy=dtype_policy)
 
     # --- Security: Check for sensitive attributes ---
     sensitive_column_candidates = [col for col in X.columns if 'ssn' in col.lower() or 'name' in col.lower() or 'email' in col.lower() or 'dob' in col.lower()]
@@ -207,11 +452,11 @@ def main():
         logging.warning(f"Sensitive candidate columns potentially leaking PII: {sensitive_column_candidates}")
     
     # --- Target leakage detection ---
-    detect_target_leakage(X, y, df, args.target_col)
+    detect_target_leakage(X, y, df, target_col)
 
     # --- Preprocessing pipeline feature/versioning ---
     feature_list = list(X.columns)
-    preprocessing_meta_path = save_preprocessing_metadata(args.artifacts_dir, feature_list, None)  # Pipeline not provided here
+    preprocessing_meta_path = save_preprocessing_metadata(artifacts_dir, feature_list, None)  # Pipeline not provided here
 
     # --- Check for NaN/Inf and log class distribution ---
     check_nan_inf(X, y, logging)
@@ -219,7 +464,7 @@ def main():
     log_class_distribution(y, 'Original', logging)
     
     # --- Data leakage check: make sure test/val not contaminated ---
-    X_train, X_val, X_test, y_train, y_val, y_test = split_train_val_test(X, y, args.test_size, args.val_size, args.random_state)
+    X_train, X_val, X_test, y_train, y_val, y_test = split_train_val_test(X, y, test_size, val_size, random_state)
     logging.info(f"Train/val/test split shapes: X_train: {X_train.shape}, X_val: {X_val.shape}, X_test: {X_test.shape}")
     log_class_distribution(y_train, 'Train', logging)
     log_class_distribution(y_val, 'Val', logging)
@@ -237,8 +482,8 @@ def main():
         'run_timestamp': datetime.now().isoformat(),
         'user': getpass.getuser(),
         'git_commit': get_git_commit(),
-        'feature_matrix': os.path.abspath(args.feature_matrix),
-        'target_col': args.target_col,
+        'feature_matrix': os.path.abspath(feature_matrix_path) if feature_matrix_path else None,
+        'target_col': target_col,
         'split': {
             'X_train_shape': list(X_train.shape),
             'X_val_shape': list(X_val.shape),
@@ -253,16 +498,16 @@ def main():
         'xgb_best_param': {},
         'rf_metrics': {},
         'xgb_metrics': {},
-        'random_state': args.random_state,
+        'random_state': random_state,
         'artifacts': {},
         'feature_list': feature_list,
         'preprocessing_meta': preprocessing_meta_path
     }
 
     # --- Random Forest param distribution ---
-    if args.rf_param_dist:
+    if rf_param_dist:
         try:
-            rf_param_dist = json.loads(args.rf_param_dist)
+            rf_param_dist = json.loads(rf_param_dist)
         except Exception:
             logging.warning("rf_param_dist not valid JSON; using defaults.")
             rf_param_dist = None
@@ -277,9 +522,9 @@ def main():
         }
 
     # --- XGBoost param distribution ---
-    if args.xgb_param_dist:
+    if xgb_param_dist:
         try:
-            xgb_param_dist = json.loads(args.xgb_param_dist)
+            xgb_param_dist = json.loads(xgb_param_dist)
         except Exception:
             logging.warning("xgb_param_dist not valid JSON; using defaults.")
             xgb_param_dist = None
@@ -295,78 +540,52 @@ def main():
             'reg_lambda': [0.1, 1.0, 10.0]
         }
 
-    # --- Random Forest Training (tunable scoring for imbalance/multiclass) ---
+    # --- RF and XGBoost searches are independent: run them side by side under one core budget ---
     scoring_metric = 'f1_weighted' if len(np.unique(y_train)) > 2 or is_imbal_train else 'f1'
-    rf = RandomForestClassifier(random_state=args.random_state, n_jobs=-1)
-    rf_search = RandomizedSearchCV(
-        estimator=rf,
-        param_distributions=rf_param_dist,
-        n_iter=args.n_iter,
-        scoring=scoring_metric,
-        n_jobs=-1,
-        cv=StratifiedKFold(n_splits=args.cv_folds, shuffle=True, random_state=args.random_state),
-        verbose=1,
-        random_state=args.random_state
-    )
-    logging.info(f"Starting Random Forest hyperparameter search with scoring: {scoring_metric}")
-    rf_search.fit(X_train, y_train)
-    best_rf = rf_search.best_estimator_
-    training_log['rf_hyperparameters'] = rf_param_dist
-    training_log['rf_best_param'] = rf_search.best_params_
-    # --- Feature importance log for RF ---
-    rf_featimp_path = log_feature_importance(best_rf, X_train, args.artifacts_dir, 'random_forest')
-    training_log['artifacts']['rf_feature_importance'] = rf_featimp_path
-    # --- Evaluate Random Forest ---
-    training_log['rf_metrics'].update(evaluate(best_rf, X_train, y_train, prefix='train'))
-    training_log['rf_metrics'].update(evaluate(best_rf, X_val, y_val, prefix='val'))
-    training_log['rf_metrics'].update(evaluate(best_rf, X_test, y_test, prefix='test'))
-    rf_model_path = os.path.join(args.artifacts_dir, 'random_forest_best.joblib')
-    joblib.dump(best_rf, rf_model_path)
-    secure_file_permissions(rf_model_path)
-    training_log['artifacts']['rf_model'] = rf_model_path
-    logging.info(f"Saved Random Forest model to {rf_model_path}")
-
-    # --- XGBoost Training (tunable scoring for imbalance/multiclass) ---
-    xgb = XGBClassifier(random_state=args.random_state, use_label_encoder=False, eval_metric='logloss', n_jobs=-1)
-    xgb_search = RandomizedSearchCV(
-        estimator=xgb,
-        param_distributions=xgb_param_dist,
-        n_iter=args.n_iter,
-        scoring=scoring_metric,
-        n_jobs=-1,
-        cv=StratifiedKFold(n_splits=args.cv_folds, shuffle=True, random_state=args.random_state),
-        verbose=1,
-        random_state=args.random_state
-    )
-    logging.info(f"Starting XGBoost hyperparameter search with scoring: {scoring_metric}")
-    xgb_search.fit(X_train, y_train)
-    best_xgb = xgb_search.best_estimator_
-    training_log['xgb_hyperparameters'] = xgb_param_dist
-    training_log['xgb_best_param'] = xgb_search.best_params_
-    # --- Feature importance log for XGB ---
-    xgb_featimp_path = log_feature_importance(best_xgb, X_train, args.artifacts_dir, 'xgboost')
-    training_log['artifacts']['xgb_feature_importance'] = xgb_featimp_path
-    # --- Evaluate XGBoost ---
-    training_log['xgb_metrics'].update(evaluate(best_xgb, X_train, y_train, prefix='train'))
-    training_log['xgb_metrics'].update(evaluate(best_xgb, X_val, y_val, prefix='val'))
-    training_log['xgb_metrics'].update(evaluate(best_xgb, X_test, y_test, prefix='test'))
-    xgb_model_path = os.path.join(args.artifacts_dir, 'xgboost_best.joblib')
-    joblib.dump(best_xgb, xgb_model_path)
-    secure_file_permissions(xgb_model_path)
-    training_log['artifacts']['xgb_model'] = xgb_model_path
-    logging.info(f"Saved XGBoost model to {xgb_model_path}")
+    splits = (X_train, X_val, X_test, y_train, y_val, y_test)
+    searches = [('random_forest', rf_param_dist), ('xgboost', xgb_param_dist)]
+    budget = resolve_n_jobs(n_jobs)
+    search_kwargs = dict(scoring=scoring_metric, cv_folds=cv_folds, n_iter=n_iter,
+                         random_state=random_state, artifacts_dir=artifacts_dir)
+    progress = {
+        name: {'path': search_progress_path(artifacts_dir, name), 'cv_folds': cv_folds,
+               'candidates': len(ParameterSampler(dist, n_iter, random_state=random_state)) if dist else n_iter}
+        for name, dist in searches
+    }
+    with SearchProgressMonitor(progress):
+        if budget >= len(searches):
+            shares = split_cpu_budget(budget, len(searches))
+            logging.info(f"Running {len(searches)} hyperparameter searches concurrently with core shares {shares} (budget {budget})")
+            outcomes = Parallel(n_jobs=len(searches), backend='loky')(
+                delayed(tune_model)(name, dist, splits, n_jobs=share, progress_path=progress[name]['path'],
+                                    **search_kwargs)
+                for (name, dist), share in zip(searches, shares)
+            )
+        else:
+            outcomes = [tune_model(name, dist, splits, n_jobs=budget, progress_path=progress[name]['path'],
+                                   **search_kwargs) for name, dist in searches]
+    rf_outcome, xgb_outcome = outcomes
+    # Both searches finished: their resume checkpoints are no longer needed
+    shutil.rmtree(search_state_dir(artifacts_dir), ignore_errors=True)
+    for prefix, outcome in (('rf', rf_outcome), ('xgb', xgb_outcome)):
+        training_log[f'{prefix}_hyperparameters'] = outcome['hyperparameters']
+        training_log[f'{prefix}_best_param'] = outcome['best_param']
+        training_log[f'{prefix}_metrics'].update(outcome['metrics'])
+        training_log['artifacts'][f'{prefix}_feature_importance'] = outcome['feature_importance_path']
+        training_log['artifacts'][f'{prefix}_model'] = outcome['model_path']
+    rf_featimp_path, rf_model_path = rf_outcome['feature_importance_path'], rf_outcome['model_path']
+    xgb_featimp_path, xgb_model_path = xgb_outcome['feature_importance_path'], xgb_outcome['model_path']
 
     # --- Model explainability & feature importance logging, CLI parameter audit ---
-    cli_cmd = ' '.join(sys.argv)
-    training_log['cli_command'] = cli_cmd
+    training_log['cli_command'] = cli_command if cli_command is not None else ' '.join(sys.argv)
     
     # --- Log reproducibility: parameters, git, user, etc. ---
-    train_log_path = os.path.join(args.artifacts_dir, 'model_training_log.json')
+    train_log_path = os.path.join(artifacts_dir, 'model_training_log.json')
     with open(train_log_path, 'w') as f:
         json.dump(training_log, f, indent=2)
     secure_file_permissions(train_log_path)
     logging.info(f"Training log saved to {train_log_path}")
-    if MLFLOW_AVAILABLE:
+    if MLFLOW_AVAILABLE and log_to_mlflow:
         try:
             mlflow.log_artifact(train_log_path)
             if rf_featimp_path: mlflow.log_artifact(rf_featimp_path)
@@ -376,6 +595,44 @@ def main():
             logging.info("Logged artifacts to MLflow.")
         except Exception as e:
             logging.warning(f"MLflow log_artifact failed: {e}")
+    return training_log
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Train and tune supervised classification models (RandomForest, XGBoost)")
+    parser.add_argument('--feature_matrix', required=True, help='Feature matrix with target column (CSV, .parquet, .feather or .npy directory)')
+    parser.add_argument('--target_col', required=True, help='Name of the target column for classification')
+    parser.add_argument('--artifacts_dir', required=True, help='Directory to save trained models and logs')
+    parser.add_argument('--test_size', type=float, default=0.2, help='Test set proportion')
+    parser.add_argument('--val_size', type=float, default=0.1, help='Validation set proportion (of entire data)')
+    parser.add_argument('--rf_param_dist', default='', help='JSON: param grid for RandomForest (or default)')
+    parser.add_argument('--xgb_param_dist', default='', help='JSON: param grid for XGBoost (or default)')
+    parser.add_argument('--cv_folds', type=int, default=5, help='Cross-validation folds for tuning')
+    parser.add_argument('--n_iter', type=int, default=30, help='Number of parameter settings sampled by randomized search')
+    parser.add_argument('--random_state', type=int, default=42, help='Random seed')
+    parser.add_argument('--n_jobs', type=int, default=-1, help='Total core budget shared by the RF and XGBoost searches (-1 = all cores)')
+    parser.add_argument('--no_mlflow', action='store_true', help='Skip MLflow artifact logging (e.g. when the pipeline driver logs them)')
+    parser.add_argument('--dtype_policy', default='compact', choices=list(DTYPE_POLICIES),
+                        help='compact: float32 features, uint8 flags; float64: pandas defaults')
+    args = parser.parse_args()
+    os.makedirs(args.artifacts_dir, exist_ok=True)
+    X, y, df = load_feature_matrix(args.feature_matrix, args.target_col, dtype_policy=args.dtype_policy)
+    train_models(
+        X, y, df,
+        artifacts_dir=args.artifacts_dir,
+        target_col=args.target_col,
+        feature_matrix_path=args.feature_matrix,
+        test_size=args.test_size,
+        val_size=args.val_size,
+        rf_param_dist=args.rf_param_dist,
+        xgb_param_dist=args.xgb_param_dist,
+        cv_folds=args.cv_folds,
+        n_iter=args.n_iter,
+        random_state=args.random_state,
+        n_jobs=args.n_jobs,
+        log_to_mlflow=not args.no_mlflow,
+        dtype_policy=args.dtype_policy
+    )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,382 @@
+import os
+import json
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Parquet / Arrow IPC need pyarrow; the per-column .npy format only needs numpy
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SCHEMA_NAME = '_schema.json'
+FORMAT_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npy': '.npy',
+}
+SUPPORTED_FORMATS = tuple(FORMAT_EXTENSIONS)
+# What sensitive columns hold in every artifact written with redaction
+REDACTED = 'REDACTED'
+
+
+def secure_file_permissions(filepath: str):
+    """
+    Restricts an artifact to its owner (POSIX): read/write for files, and the execute bit too for directory
+    artifacts (npy column stores) so the owner can still traverse them. Logs a warning on failure.
+    """
+    try:
+        os.chmod(filepath, 0o700 if os.path.isdir(filepath) else 0o600)
+        logging.info(f"Restricted permissions for {filepath} to owner read/write only.")
+    except Exception as e:
+        logging.warning(f"Could not set secure file permissions for {filepath}: {e}")
+
+
+def artifact_path(base_path: str, fmt: str) -> str:
+    """
+    Swaps the extension of base_path for the one used by fmt (e.g. 'preprocessed.csv' -> 'preprocessed.parquet').
+    """
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported artifact format '{fmt}'. Choose from {SUPPORTED_FORMATS}.")
+    return os.path.splitext(base_path)[0] + FORMAT_EXTENSIONS[fmt]
+
+
+def infer_format(path: str) -> str:
+    """
+    Determines the artifact format from the path: an existing directory with a schema sidecar is the
+    per-column npy format, otherwise the extension decides (.arrow/.ipc are Arrow IPC like .feather).
+    """
+    if os.path.isdir(path) and os.path.isfile(os.path.join(path, SCHEMA_NAME)):
+        return 'npy'
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in FORMAT_EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    if ext in ('.arrow', '.ipc'):
+        return 'feather'
+    raise ValueError(f"Cannot infer artifact format for '{path}'. Supported extensions: {sorted(FORMAT_EXTENSIONS.values())}")
+
+
+def is_supported_artifact(path: str) -> bool:
+    try:
+        infer_format(path)
+        return True
+    except ValueError:
+        return False
+
+
+def iter_artifact_files(path: str):
+    """
+    Yields the regular files making up an artifact, in a stable order (the file itself, or every file of a
+    directory artifact sorted by relative path).
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+    else:
+        yield path
+
+
+def _require_pyarrow(fmt: str):
+    if not PYARROW_AVAILABLE:
+        raise ImportError(f"Artifact format '{fmt}' requires pyarrow; install it or use the 'npy' format.")
+
+
+def _categories_entry(categories: pd.Index) -> dict:
+    """Sidecar entry for a vocabulary: JSON values plus their dtype, so numeric or datetime categories come back as such."""
+    if categories.dtype == object:
+        values = [str(c) for c in categories]
+    elif pd.api.types.is_datetime64_any_dtype(categories.dtype) or pd.api.types.is_timedelta64_dtype(categories.dtype):
+        values = categories.astype(str).tolist()
+    else:
+        values = categories.tolist()
+    return {'categories': values, 'categories_dtype': str(categories.dtype)}
+
+
+def _restore_categories(entry: dict) -> pd.Index:
+    # Schemas written before categories_dtype was recorded hold strings
+    return pd.Index(entry['categories'], dtype=object).astype(entry.get('categories_dtype', 'object'))
+
+
+def _write_npy_columns(df: pd.DataFrame, path: str):
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        fname = f'c{i:05d}.npy'
+        entry = {'name': col, 'file': fname}
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(series.dtype) \
+                or pd.api.types.is_string_dtype(series.dtype):
+            # Strings are stored as int32 codes (-1 = missing) with the vocabulary in the sidecar: no pickles
+            cat = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+            values = cat.cat.codes.to_numpy(dtype=np.int32)
+            entry.update(kind='category' if isinstance(series.dtype, pd.CategoricalDtype) else 'object',
+                         dtype='int32', **_categories_entry(cat.cat.categories))
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = series.to_numpy(dtype='datetime64[ns]')
+            entry.update(kind='datetime', dtype=str(values.dtype))
+        else:
+            values = series.to_numpy()
+            entry.update(kind='numeric', dtype=str(values.dtype))
+        np.save(os.path.join(tmp_path, fname), values, allow_pickle=False)
+        columns.append(entry)
+    schema = {'format': 'npy-columns', 'version': 1, 'n_rows': int(len(df)), 'columns': columns}
+    with open(os.path.join(tmp_path, SCHEMA_NAME), 'w') as f:
+        json.dump(schema, f, indent=2, default=str)
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+
+
+def _read_npy_columns(path: str, columns=None) -> pd.DataFrame:
+    with open(os.path.join(path, SCHEMA_NAME)) as f:
+        schema = json.load(f)
+    data = {}
+    for entry in schema['columns']:
+        if columns is not None and entry['name'] not in columns:
+            continue
+        values = np.load(os.path.join(path, entry['file']), allow_pickle=False)
+        if entry['kind'] in ('category', 'object'):
+            cat = pd.Categorical.from_codes(values, categories=_restore_categories(entry))
+            data[entry['name']] = cat if entry['kind'] == 'category' else np.asarray(cat.astype(object))
+        else:
+            data[entry['name']] = values
+    return pd.DataFrame(data)
+
+
+def write_frame(df: pd.DataFrame, path: str, fmt: str = None, csv_export: bool = False) -> str:
+    """
+    Writes df in the format implied by path (or fmt). Binary formats keep dtypes and skip text formatting;
+    csv_export=True also writes a human-facing CSV copy next to a binary artifact. Returns path.
+    """
+    fmt = fmt or infer_format(path)
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'parquet':
+        _require_pyarrow(fmt)
+        df.to_parquet(path, index=False)
+    elif fmt == 'feather':
+        _require_pyarrow(fmt)
+        df.reset_index(drop=True).to_feather(path)
+    elif fmt == 'npy':
+        _write_npy_columns(df, path)
+    else:
+        raise ValueError(f"Unsupported artifact format '{fmt}'.")
+    if csv_export and fmt != 'csv':
+        export_path = artifact_path(path, 'csv')
+        df.to_csv(export_path, index=False)
+        logging.info(f"Human-facing CSV export written to {export_path}")
+    return path
+
+
+def read_frame(path: str, columns=None) -> pd.DataFrame:
+    """
+    Reads an artifact written by write_frame (or any CSV), optionally only the given columns.
+    """
+    fmt = infer_format(path)
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns)
+    if fmt == 'parquet':
+        _require_pyarrow(fmt)
+        return pd.read_parquet(path, columns=columns)
+    if fmt == 'feather':
+        _require_pyarrow(fmt)
+        return pd.read_feather(path, columns=columns)
+    return _read_npy_columns(path, columns=columns)
+
+
+class FrameWriter:
+    """
+    Appends DataFrame chunks to one artifact so large frames never have to be held in memory at once.
+    CSV chunks are appended (header once), parquet chunks become row groups, feather chunks Arrow record
+    batches, and npy columns are preallocated .npy memmaps filled slice by slice (requires n_rows and
+    numeric, datetime or categorical columns, the latter with the same categories in every chunk). Reading the result back gives the same frame as write_frame on the
+    concatenated chunks. Use as a context manager or call close().
+    """
+
+    def __init__(self, path: str, fmt: str = None, n_rows: int = None, csv_export: bool = False):
+        self.path = path
+        self.fmt = fmt or infer_format(path)
+        self.n_rows = n_rows
+        self.rows_written = 0
+        self._writer = None
+        self._columns = None
+        self._export = FrameWriter(artifact_path(path, 'csv'), 'csv') if csv_export and self.fmt != 'csv' else None
+        if self.fmt in ('parquet', 'feather'):
+            _require_pyarrow(self.fmt)
+        elif self.fmt == 'npy' and n_rows is None:
+            raise ValueError("Chunked npy writes need the total row count (n_rows) up front.")
+
+    def _open_npy(self, chunk: pd.DataFrame):
+        self._tmp_path = self.path + '.tmp'
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(self._tmp_path)
+        self._columns, self._arrays, self._categories = [], [], {}
+        for i, col in enumerate(chunk.columns):
+            series = chunk.iloc[:, i]
+            entry = {'name': col, 'file': f'c{i:05d}.npy'}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Codes only mean the same thing across chunks if every chunk carries the same categories
+                dtype = np.dtype(np.int32)
+                self._categories[i] = series.dtype
+                entry.update(kind='category', **_categories_entry(series.cat.categories))
+            elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+                dtype = np.dtype('datetime64[ns]')
+                entry.update(kind='datetime')
+            elif pd.api.types.is_numeric_dtype(series.dtype):
+                dtype = series.to_numpy().dtype
+                entry.update(kind='numeric')
+            else:
+                raise ValueError(f"Chunked npy writes support numeric, datetime and categorical columns only; "
+                                 f"'{col}' is {series.dtype}.")
+            self._arrays.append(np.lib.format.open_memmap(os.path.join(self._tmp_path, entry['file']), mode='w+',
+                                                          dtype=dtype, shape=(self.n_rows,)))
+            entry['dtype'] = str(dtype)
+            self._columns.append(entry)
+
+    def write(self, chunk: pd.DataFrame):
+        if self.fmt == 'csv':
+            chunk.to_csv(self.path, index=False, header=self.rows_written == 0, mode='w' if self.rows_written == 0 else 'a')
+        elif self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        elif self.fmt == 'feather':
+            import pyarrow as pa
+            table = pa.Table.from_pandas(chunk.reset_index(drop=True), preserve_index=False)
+            if self._writer is None:
+                self._writer = pa.ipc.new_file(self.path, table.schema)
+            self._writer.write_table(table)
+        elif self.fmt == 'npy':
+            if self._columns is None:
+                self._open_npy(chunk)
+            end = self.rows_written + len(chunk)
+            if end > self.n_rows:
+                raise ValueError(f"More rows written than announced ({end} > {self.n_rows}).")
+            for i, array in enumerate(self._arrays):
+                series = chunk.iloc[:, i]
+                if i in self._categories:
+                    if series.dtype != self._categories[i]:
+                        raise ValueError(f"Column '{self._columns[i]['name']}' changed categories between chunks.")
+                    series = series.cat.codes
+                array[self.rows_written:end] = series.to_numpy(dtype=array.dtype)
+        else:
+            raise ValueError(f"Unsupported artifact format '{self.fmt}'.")
+        if self._export is not None:
+            self._export.write(chunk)
+        self.rows_written += len(chunk)
+
+    def close(self) -> str:
+        if self.fmt in ('parquet', 'feather') and self._writer is not None:
+            self._writer.close()
+        elif self.fmt == 'npy' and self._columns is not None:
+            if self.rows_written != self.n_rows:
+                raise ValueError(f"Expected {self.n_rows} rows, wrote {self.rows_written}.")
+            for array in self._arrays:
+                array.flush()
+            self._arrays = []
+            schema = {'format': 'npy-columns', 'version': 1, 'n_rows': int(self.n_rows), 'columns': self._columns}
+            with open(os.path.join(self._tmp_path, SCHEMA_NAME), 'w') as f:
+                json.dump(schema, f, indent=2, default=str)
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.rename(self._tmp_path, self.path)
+        if self._export is not None:
+            self._export.close()
+            logging.info(f"Human-facing CSV export written to {self._export.path}")
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+class ArtifactWriter:
+    """
+    Writes artifacts on one background thread, in the order they are queued, while the caller keeps
+    computing. Frames are queued as shallow snapshots (do not modify their columns in place until flushed)
+    with the `sensitive_columns` replaced by REDACTED on the way, so an unredacted copy never reaches disk
+    and no artifact has to be read back to be redacted. flush() waits for everything queued and re-raises
+    the first failure: call it before checksumming or reading the artifacts. As a context manager it
+    flushes and stops the thread on exit.
+    """
+
+    def __init__(self, sensitive_columns=None):
+        self.sensitive_columns = list(sensitive_columns or [])
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='artifact-writer')
+        self._pending = []
+
+    def submit(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) on the writer thread after everything queued before; returns its future."""
+        future = self._pool.submit(func, *args, **kwargs)
+        self._pending.append(future)
+        return future
+
+    def redacted(self, df: pd.DataFrame) -> pd.DataFrame:
+        """df with its sensitive columns set to REDACTED; the other columns are shared, df is left as it is."""
+        columns = [c for c in self.sensitive_columns if c in df.columns]
+        if not columns:
+            return df
+        frame = df.copy(deep=False)
+        for col in columns:
+            frame[col] = REDACTED
+        return frame
+
+    def write_frame(self, df: pd.DataFrame, path: str, fmt: str = None, csv_export: bool = False, then=None):
+        """Queues write_frame of the redacted df; then(path), if given, runs on the writer thread afterwards."""
+        frame = self.redacted(df)
+
+        def write():
+            write_frame(frame, path, fmt, csv_export=csv_export)
+            if then is not None:
+                then(path)
+            return path
+        return self.submit(write)
+
+    def write_json(self, obj, path: str, then=None):
+        """Queues json.dump(obj) to path (indented); obj must not change until it is written."""
+        def write():
+            with open(path, 'w') as f:
+                json.dump(obj, f, indent=2)
+            if then is not None:
+                then(path)
+            return path
+        return self.submit(write)
+
+    def flush(self):
+        """Waits for every queued write; raises the first exception one of them raised."""
+        pending, self._pending = self._pending, []
+        errors = [future.exception() for future in pending]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True)  # the caller's error wins over any from the writes
+        return False
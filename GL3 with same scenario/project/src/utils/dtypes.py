@@ -0,0 +1,79 @@
+import logging
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Pipeline-wide dtype policy: sensor and feature columns as float32, 0/1 flags as uint8, strings as category.
+# 'float64' keeps the wide pandas defaults (for debugging numerical differences).
+DTYPE_POLICIES = ('compact', 'float64')
+FEATURE_DTYPE = np.float32
+FLAG_DTYPE = np.uint8
+
+_FLOAT32_EPS = np.finfo(np.float32).eps
+
+
+def feature_dtype(policy: str = 'compact'):
+    """Dtype for generated numeric features under the policy."""
+    return FEATURE_DTYPE if policy == 'compact' else np.float64
+
+
+def flag_dtype(policy: str = 'compact'):
+    """Dtype for generated 0/1 condition flags under the policy."""
+    return FLAG_DTYPE if policy == 'compact' else np.int64
+
+
+def fits_float32(values: np.ndarray) -> bool:
+    """
+    True if every finite value survives a float64 -> float32 -> float64 round trip: whole numbers (ids, counts,
+    epoch times) unchanged, other values within float32 rounding (so no overflow and no subnormal precision loss).
+    """
+    finite = values[np.isfinite(values)]
+    with np.errstate(over='ignore'):
+        restored = finite.astype(np.float32).astype(np.float64)
+    if np.array_equal(finite, np.round(finite)):
+        return np.array_equal(finite, restored)
+    return bool(np.all(np.abs(restored - finite) <= _FLOAT32_EPS * np.abs(finite)))
+
+
+def _is_flag(series: pd.Series) -> bool:
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return True
+    if not pd.api.types.is_integer_dtype(series.dtype):
+        return False
+    values = series.to_numpy()
+    return bool(values.size) and values.min() >= 0 and values.max() <= 1
+
+
+def compact_dtypes(df: pd.DataFrame, exclude: Iterable[str] = (), policy: str = 'compact') -> pd.DataFrame:
+    """
+    Validated downcast to the compact policy, column by column (so the peak is one column, not the frame):
+    float64 -> float32 when fits_float32 holds (otherwise kept, with a warning), 0/1 integer or bool flags ->
+    uint8, other integers -> the smallest integer type holding their range, strings -> category. Columns in
+    `exclude` (targets) are left untouched. A no-op under the 'float64' policy.
+    """
+    if policy != 'compact':
+        return df
+    exclude = set(exclude)
+    before = int(df.memory_usage(deep=True).sum())
+    for col in df.columns:
+        if col in exclude:
+            continue
+        series = df[col]
+        dtype = series.dtype
+        if pd.api.types.is_float_dtype(dtype) and dtype.itemsize > 4:
+            if fits_float32(series.to_numpy()):
+                df[col] = series.astype(FEATURE_DTYPE)
+            else:
+                logging.warning(f"Column '{col}' does not survive a float32 round trip; keeping {dtype}.")
+        elif _is_flag(series) and dtype != FLAG_DTYPE:
+            df[col] = series.astype(FLAG_DTYPE)
+        elif pd.api.types.is_integer_dtype(dtype):
+            signed = 'unsigned' if series.size and series.min() >= 0 else 'integer'
+            df[col] = pd.to_numeric(series, downcast=signed)
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            df[col] = series.astype('category')
+    after = int(df.memory_usage(deep=True).sum())
+    if before:
+        logging.info(f"Compact dtypes: {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB")
+    return df
@@ -0,0 +1,194 @@
+import os
+import mmap
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+BUFFER_SIZE = 8 * 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_CACHE_PATH = '.hash_cache.json'
+# Files modified this recently may still change within the same mtime tick, so their digests are not cached
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+
+def _hash_stream(path: str, algo: str) -> str:
+    """
+    Hashes one regular file: mmap for large files (no copies into Python), otherwise readinto a reused
+    8 MB buffer. hashlib releases the GIL on large updates, so several files hash in parallel threads.
+    """
+    hash_func = hashlib.new(algo)
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hash_func.update(mm)
+        else:
+            buf = bytearray(min(BUFFER_SIZE, max(size, 1)))
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                hash_func.update(view[:n])
+    return hash_func.hexdigest()
+
+
+class HashCache:
+    """
+    Persistent digest cache keyed by (path, inode, size, mtime_ns). Stored as JSON and rewritten atomically;
+    concurrent writers (parallel subprocess stages) merge with what is on disk, and losing an entry to a
+    race only costs a re-hash.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get('ARTIFACT_HASH_CACHE', DEFAULT_CACHE_PATH)
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable hash cache {self.path}: {e}")
+            return {}
+
+    def _ensure_loaded(self):
+        if self._entries is None:
+            self._entries = self._load()
+
+    @staticmethod
+    def _signature(st: os.stat_result, algo: str) -> list:
+        return [st.st_ino, st.st_size, st.st_mtime_ns, algo]
+
+    def get(self, path: str, st: os.stat_result, algo: str):
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(path)
+        if entry and entry.get('sig') == self._signature(st, algo):
+            return entry['digest']
+        return None
+
+    def put(self, path: str, st: os.stat_result, algo: str, digest: str):
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[path] = {'sig': self._signature(st, algo), 'digest': digest}
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = self._load()
+            merged.update(self._entries)
+            # Drop entries for files that no longer exist so the cache does not grow without bound
+            merged = {p: e for p, e in merged.items() if os.path.exists(p)}
+            parent = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(parent, exist_ok=True)
+            tmp_path = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(merged, f)
+                os.replace(tmp_path, self.path)
+                self._entries = merged
+                self._dirty = False
+            except OSError as e:
+                logging.warning(f"Could not persist hash cache {self.path}: {e}")
+
+
+_default_caches: Dict[str, HashCache] = {}
+_default_lock = threading.Lock()
+
+
+def default_cache() -> HashCache:
+    """
+    Process-wide cache at $ARTIFACT_HASH_CACHE (or ./.hash_cache.json), shared by every caller in the process.
+    """
+    path = os.environ.get('ARTIFACT_HASH_CACHE', DEFAULT_CACHE_PATH)
+    with _default_lock:
+        if path not in _default_caches:
+            _default_caches[path] = HashCache(path)
+        return _default_caches[path]
+
+
+def file_digest(path: str, algo: str = 'sha256', cache: HashCache = None, persist: bool = True) -> str:
+    """
+    Digest of one regular file, served from the cache when its inode, size and mtime are unchanged.
+    """
+    cache = cache or default_cache()
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    digest = cache.get(abs_path, st, algo)
+    if digest is None:
+        digest = _hash_stream(abs_path, algo)
+        cache.put(abs_path, st, algo, digest)
+        if persist:
+            cache.save()
+    return digest
+
+
+def _member_files(path: str):
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+    else:
+        yield path
+
+
+def hash_files(paths: Iterable[str], algo: str = 'sha256', max_workers: int = None,
+               cache: HashCache = None) -> Dict[str, str]:
+    """
+    Digests many regular files in parallel threads; the cache is written once at the end.
+    """
+    cache = cache or default_cache()
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return {}
+    workers = max_workers or min(len(paths), os.cpu_count() or 1, 8)
+    if workers <= 1 or len(paths) == 1:
+        digests = {p: file_digest(p, algo, cache, persist=False) for p in paths}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            digests = dict(zip(paths, pool.map(lambda p: file_digest(p, algo, cache, persist=False), paths)))
+    cache.save()
+    return digests
+
+
+def _combine(path: str, members, digests: Dict[str, str], algo: str) -> str:
+    hash_func = hashlib.new(algo)
+    for member in members:
+        rel = os.path.relpath(member, path).replace(os.sep, '/')
+        hash_func.update(f"{rel}:{digests[member]}\n".encode('utf-8'))
+    return hash_func.hexdigest()
+
+
+def artifact_checksum(path: str, algo: str = 'sha256', max_workers: int = None, cache: HashCache = None) -> str:
+    """
+    Checksum of an artifact: the file digest for a single file; for a directory artifact (npy column store)
+    a digest over the sorted "relative path: member digest" lines, so members are hashed in parallel and cached
+    individually.
+    """
+    return artifact_checksums([path], algo, max_workers=max_workers, cache=cache)[path]
+
+
+def artifact_checksums(paths: Iterable[str], algo: str = 'sha256', max_workers: int = None,
+                       cache: HashCache = None) -> Dict[str, str]:
+    """
+    Checksums of several artifacts, hashing all their member files in one parallel batch.
+    """
+    members = {p: list(_member_files(p)) for p in paths}
+    digests = hash_files([m for files in members.values() for m in files], algo, max_workers=max_workers,
+                         cache=cache)
+    return {p: _combine(p, files, digests, algo) if os.path.isdir(p) else digests[p]
+            for p, files in members.items()}
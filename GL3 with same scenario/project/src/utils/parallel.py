@@ -0,0 +1,153 @@
+import os
+import shutil
+import logging
+import tempfile
+from typing import Callable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+PARALLEL_BACKENDS = ('threads', 'processes')
+# Shared buffers live in RAM-backed /dev/shm where available (plain temp dir otherwise)
+SHM_DIR = '/dev/shm'
+
+
+def column_blocks(n_columns: int, n_blocks: int) -> List[slice]:
+    """Contiguous, near-equal column slices covering range(n_columns), at most n_blocks of them."""
+    n_blocks = max(1, min(n_blocks, n_columns))
+    bounds = np.linspace(0, n_columns, n_blocks + 1).round().astype(int)
+    return [slice(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def partition_tasks(bounds: np.ndarray, n_tasks: int) -> List[List[tuple]]:
+    """
+    Groups the row partitions delimited by bounds (0 = bounds[0] < ... < bounds[-1] = n_rows) into at most
+    n_tasks runs of consecutive partitions holding similar numbers of rows; a partition is never split.
+    """
+    bounds = np.asarray(bounds, dtype=np.int64)
+    parts = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+    if not parts:
+        return []
+    targets = np.linspace(0, bounds[-1], max(1, min(n_tasks, len(parts))) + 1)[1:-1]
+    cuts = np.unique(np.searchsorted(bounds[1:-1], targets) + 1)
+    return [group for group in (parts[a:b] for a, b in zip([0, *cuts], [*cuts, len(parts)])) if group]
+
+
+def _map_block(func, matrix, columns, kwargs):
+    return func(matrix[:, columns], columns, **kwargs)
+
+
+def _transform_block(func, matrix, out, columns, n_outputs, kwargs):
+    func(matrix[:, columns], out[:, columns.start * n_outputs:columns.stop * n_outputs], columns, **kwargs)
+
+
+def _transform_partitions(func, matrix, out, partitions, row_kwargs, kwargs):
+    columns = slice(0, matrix.shape[1])
+    for start, stop in partitions:
+        func(matrix[start:stop], out[start:stop], columns,
+             **{name: values[start:stop] for name, values in row_kwargs.items()}, **kwargs)
+
+
+class ColumnBlockExecutor:
+    """
+    Runs per-column work over contiguous column blocks of a column-major matrix, one block per worker, and
+    hands the results back in column order (or over row partitions, see transform_partitions). backend 'threads' shares the arrays directly (the NumPy/pandas
+    kernels release the GIL); 'processes' places input and output matrices in memory-mapped .npy files under
+    /dev/shm, which joblib passes to the workers by file name, so no column data is pickled. Use as a context
+    manager: the shared buffers are removed on exit, so copy results out before leaving the block.
+    With n_workers=1 everything runs inline in the calling thread.
+    """
+
+    def __init__(self, n_workers: int = 1, backend: str = 'threads'):
+        if backend not in PARALLEL_BACKENDS:
+            raise ValueError(f"backend must be one of {PARALLEL_BACKENDS}, got '{backend}'.")
+        self.n_workers = max(1, int(n_workers or 1))
+        self.backend = backend
+        self._temp_dir = None
+        self._n_buffers = 0
+
+    @property
+    def parallel(self) -> bool:
+        return self.n_workers > 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+
+    def empty(self, n_rows: int, n_columns: int, dtype) -> np.ndarray:
+        """Uninitialized column-major matrix, shared-memory backed when workers are processes."""
+        if not (self.parallel and self.backend == 'processes'):
+            return np.empty((n_rows, n_columns), dtype=dtype, order='F')
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix='column_blocks_',
+                                              dir=SHM_DIR if os.access(SHM_DIR, os.W_OK) else None)
+        self._n_buffers += 1
+        path = os.path.join(self._temp_dir, f'buffer{self._n_buffers}.npy')
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_rows, n_columns), fortran_order=True)
+
+    def matrix(self, df: pd.DataFrame, columns: Sequence[str], dtype=None, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Column-major copy of df[columns], filled one column at a time. The default dtype is the common type of
+        the columns, at least float32 (so integer and flag columns stay exact). rows (positions) reorders the
+        rows, e.g. to make partitions contiguous, or picks a subset of them.
+        """
+        columns = list(columns)
+        dtype = dtype or np.result_type(np.float32, *[df[c].dtype for c in columns])
+        out = self.empty(len(df) if rows is None else len(rows), len(columns), dtype)
+        for i, col in enumerate(columns):
+            values = df[col].to_numpy()
+            out[:, i] = values if rows is None else values[rows]
+        return out
+
+    def vector(self, values: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """1-D copy of values (reordered by rows) in the same shared storage as matrix()."""
+        out = self.empty(len(values), 1, values.dtype)
+        out[:, 0] = values if rows is None else values[rows]
+        return out[:, 0]
+
+    def _run(self, calls: list) -> list:
+        if not self.parallel or len(calls) <= 1:
+            return [func(*args) for func, *args in calls]
+        backend = 'threading' if self.backend == 'threads' else 'loky'
+        # max_nbytes=None: arrays are only memmapped if they already are (ours), nothing else is dumped to disk
+        return Parallel(n_jobs=min(len(calls), self.n_workers), backend=backend, max_nbytes=None)(
+            delayed(func)(*args) for func, *args in calls)
+
+    def map(self, func: Callable, matrix: np.ndarray, **kwargs) -> list:
+        """func(block, columns, **kwargs) for every column block (columns = its slice); results in block order."""
+        blocks = column_blocks(matrix.shape[1], self.n_workers)
+        return self._run([(_map_block, func, matrix, columns, kwargs) for columns in blocks])
+
+    def transform(self, func: Callable, matrix: np.ndarray, n_outputs: int = 1, dtype=np.float64, **kwargs) -> np.ndarray:
+        """
+        Returns an (n_rows, n_columns * n_outputs) matrix whose outputs for input column i sit at
+        [i * n_outputs, (i + 1) * n_outputs); func(block, out, columns, **kwargs) fills the slice of one block.
+        """
+        out = self.empty(matrix.shape[0], matrix.shape[1] * n_outputs, dtype)
+        blocks = column_blocks(matrix.shape[1], self.n_workers)
+        logging.info(f"Processing {matrix.shape[1]} columns in {len(blocks)} block(s) on {self.backend}")
+        self._run([(_transform_block, func, matrix, out, columns, n_outputs, kwargs) for columns in blocks])
+        return out
+
+    def transform_partitions(self, func: Callable, matrix: np.ndarray, bounds: np.ndarray, n_outputs: int = 1,
+                             dtype=np.float64, row_kwargs: dict = None, **kwargs) -> np.ndarray:
+        """
+        transform() split by rows instead of columns: bounds delimit independent row partitions (one machine
+        each, say) and func(rows, out, columns, **kwargs) runs once per partition over all columns, so no
+        computation crosses a partition boundary. row_kwargs are arrays aligned with the matrix rows (see
+        vector()), handed to func sliced to the partition. Partitions are batched into a few tasks per worker
+        of similar row counts; the output layout is the same as transform's.
+        """
+        out = self.empty(matrix.shape[0], matrix.shape[1] * n_outputs, dtype)
+        tasks = partition_tasks(bounds, 4 * self.n_workers if self.parallel else 1)
+        logging.info(f"Processing {len(bounds) - 1} row partition(s) in {len(tasks)} task(s) on {self.backend}")
+        self._run([(_transform_partitions, func, matrix, out, task, row_kwargs or {}, kwargs) for task in tasks])
+        return out
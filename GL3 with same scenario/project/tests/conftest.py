@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def sensor_frame():
+    """
+    Factory of sensor frames: readings s0-s2 around 500 (with gaps in s1), a machine_id over n_machines machines
+    and irregularly spaced string timestamps. Test modules add the columns they need.
+    """
+    def build(n_rows=600, seed=0, n_machines=3):
+        rng = np.random.default_rng(seed)
+        df = pd.DataFrame(500 + rng.normal(size=(n_rows, 3)), columns=['s0', 's1', 's2'])
+        df.iloc[rng.choice(n_rows, 40, replace=False), 1] = np.nan
+        df['machine_id'] = rng.choice([f'M{i + 1}' for i in range(n_machines)], n_rows)
+        gaps = rng.choice([0, 20, 90, 900], n_rows, p=[0.1, 0.5, 0.3, 0.1])
+        times = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.cumsum(gaps), unit='s')
+        df['timestamp'] = times.astype(str)
+        return df
+    return build
@@ -0,0 +1,150 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import src.utils.artifact_io as artifact_io
+
+
+@pytest.fixture
+def mixed_frame():
+    return pd.DataFrame({
+        'temperature': np.array([70.5, np.nan, 71.25], dtype=np.float32),
+        'cycles': np.array([1, 2, 3], dtype=np.int64),
+        'alarm': np.array([True, False, True]),
+        'machine_id': ['M1', None, 'M2'],
+        'shift': pd.Categorical(['A', 'B', 'A']),
+        'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+    })
+
+
+def test_npy_round_trip_preserves_dtypes(mixed_frame, tmp_path):
+    path = str(tmp_path / 'frame.npy')
+    artifact_io.write_frame(mixed_frame, path)
+    assert os.path.isdir(path)
+    assert artifact_io.infer_format(path) == 'npy'
+    loaded = artifact_io.read_frame(path)
+    pd.testing.assert_frame_equal(loaded, mixed_frame)
+
+
+def test_npy_round_trip_preserves_category_dtypes(tmp_path):
+    frame = pd.DataFrame({
+        'line': pd.Categorical([3, 1, None, 3]),
+        'ratio': pd.Categorical([0.5, 1.5, 0.5, 0.5]),
+        'flag': pd.Categorical([True, False, True, True]),
+        'day': pd.Categorical(pd.to_datetime(['2024-01-02', '2024-01-01', '2024-01-02', None])),
+    })
+    path = str(tmp_path / 'frame.npy')
+    artifact_io.write_frame(frame, path)
+    pd.testing.assert_frame_equal(artifact_io.read_frame(path), frame)
+    with artifact_io.FrameWriter(str(tmp_path / 'chunked.npy'), n_rows=len(frame)) as writer:
+        writer.write(frame.iloc[:2])
+        writer.write(frame.iloc[2:])
+    pd.testing.assert_frame_equal(artifact_io.read_frame(str(tmp_path / 'chunked.npy')), frame)
+
+
+def test_npy_read_subset_of_columns(mixed_frame, tmp_path):
+    path = str(tmp_path / 'frame.npy')
+    artifact_io.write_frame(mixed_frame, path)
+    loaded = artifact_io.read_frame(path, columns=['cycles', 'shift'])
+    assert list(loaded.columns) == ['cycles', 'shift']
+
+
+@pytest.mark.skipif(not artifact_io.PYARROW_AVAILABLE, reason="pyarrow not installed")
+@pytest.mark.parametrize('ext', ['.parquet', '.feather'])
+def test_arrow_formats_round_trip(mixed_frame, tmp_path, ext):
+    path = str(tmp_path / f'frame{ext}')
+    artifact_io.write_frame(mixed_frame, path)
+    loaded = artifact_io.read_frame(path)
+    assert loaded['temperature'].dtype == np.float32
+    assert loaded['cycles'].tolist() == [1, 2, 3]
+
+
+def test_csv_export_alongside_binary(mixed_frame, tmp_path):
+    path = str(tmp_path / 'frame.npy')
+    artifact_io.write_frame(mixed_frame, path, csv_export=True)
+    assert os.path.isfile(str(tmp_path / 'frame.csv'))
+
+
+def test_artifact_path_and_unknown_format(tmp_path):
+    assert artifact_io.artifact_path('run/preprocessed.csv', 'parquet') == 'run/preprocessed.parquet'
+    with pytest.raises(ValueError):
+        artifact_io.infer_format(str(tmp_path / 'frame.xlsx'))
+
+
+def test_secure_file_permissions_keep_directories_traversable(mixed_frame, tmp_path):
+    csv_path, npy_path = str(tmp_path / 'frame.csv'), str(tmp_path / 'frame.npy')
+    artifact_io.write_frame(mixed_frame, csv_path)
+    artifact_io.write_frame(mixed_frame, npy_path)
+    for path in (csv_path, npy_path):
+        artifact_io.secure_file_permissions(path)
+    assert os.stat(csv_path).st_mode & 0o777 == 0o600
+    assert os.stat(npy_path).st_mode & 0o777 == 0o700
+    pd.testing.assert_frame_equal(artifact_io.read_frame(npy_path), mixed_frame)
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.npy'] + (['.parquet', '.feather'] if artifact_io.PYARROW_AVAILABLE else []))
+def test_frame_writer_chunks_match_write_frame(tmp_path, ext):
+    frame = pd.DataFrame({'a': np.arange(10, dtype=np.float64), 'b': np.arange(10, dtype=np.int64) * 2})
+    path = str(tmp_path / f'chunked{ext}')
+    with artifact_io.FrameWriter(path, n_rows=len(frame)) as writer:
+        for start in range(0, len(frame), 4):
+            writer.write(frame.iloc[start:start + 4])
+    pd.testing.assert_frame_equal(artifact_io.read_frame(path), frame)
+
+
+def test_frame_writer_npy_categorical_chunks(tmp_path):
+    machines = pd.Categorical(['M2', 'M1', None, 'M2', 'M1'], categories=['M1', 'M2'])
+    frame = pd.DataFrame({'machine_id': machines, 'a': np.arange(5, dtype=np.float32)})
+    path = str(tmp_path / 'chunked.npy')
+    with artifact_io.FrameWriter(path, n_rows=len(frame)) as writer:
+        writer.write(frame.iloc[:2])
+        writer.write(frame.iloc[2:])
+    pd.testing.assert_frame_equal(artifact_io.read_frame(path), frame)
+    with pytest.raises(ValueError):
+        with artifact_io.FrameWriter(str(tmp_path / 'other.npy'), n_rows=len(frame)) as writer:
+            writer.write(frame.iloc[:2])
+            writer.write(frame.iloc[2:].assign(machine_id=pd.Categorical(['M1', 'M2', 'M3'])))
+
+
+def test_artifact_writer_redacts_in_the_background(mixed_frame, tmp_path):
+    written = []
+    with artifact_io.ArtifactWriter(sensitive_columns=['machine_id', 'absent']) as writer:
+        writer.write_frame(mixed_frame, str(tmp_path / 'a.npy'), then=written.append)
+        writer.write_frame(mixed_frame, str(tmp_path / 'b.npy'), then=written.append)
+        writer.write_json({'rows': 3}, str(tmp_path / 'meta.json'), then=written.append)
+        writer.flush()
+        assert [os.path.basename(p) for p in written] == ['a.npy', 'b.npy', 'meta.json']
+    assert mixed_frame['machine_id'].tolist() == ['M1', None, 'M2']  # the caller's frame is untouched
+    loaded = artifact_io.read_frame(written[0])
+    assert (loaded['machine_id'] == artifact_io.REDACTED).all()
+    pd.testing.assert_frame_equal(loaded.drop(columns='machine_id'), mixed_frame.drop(columns='machine_id'))
+
+
+def test_artifact_writer_flush_raises_write_errors(mixed_frame, tmp_path):
+    writer = artifact_io.ArtifactWriter()
+    writer.write_frame(mixed_frame, str(tmp_path / 'frame.unknown'))
+    writer.write_json({}, str(tmp_path / 'ok.json'))
+    with pytest.raises(ValueError):
+        writer.flush()
+    assert os.path.exists(tmp_path / 'ok.json')
+    writer.close()
+
+
+def test_feature_stage_never_reads_back_its_artifacts(tmp_path, monkeypatch):
+    import src.data.feature_engineering as feature_engineering
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(300, 3)), columns=['s0', 's1', 's2'])
+    df['operator'] = rng.choice(['ann', 'bob'], 300)
+    df['target'] = (df['s0'] > 0).astype(int)
+    monkeypatch.setattr(feature_engineering, 'read_frame', lambda *a, **k: pytest.fail('artifact re-read'))
+    paths = {name: str(tmp_path / name) for name in ('features.npy', 'selected.npy', 'report.csv', 'log.json',
+                                                     'meta.json', 'plan.json')}
+    featmat = feature_engineering.run_feature_stage(
+        df, paths['features.npy'], paths['selected.npy'], paths['report.csv'], paths['log.json'],
+        paths['meta.json'], 'target', num_features=3, sensitive_cols=['operator'], rolling_windows=[3],
+        n_jobs=1, plan_path=paths['plan.json'])
+    assert all(os.path.exists(p) for p in paths.values())
+    features = artifact_io.read_frame(paths['features.npy'])
+    assert (features['operator'] == artifact_io.REDACTED).all()
+    pd.testing.assert_frame_equal(artifact_io.read_frame(paths['selected.npy']), featmat)
+    assert os.path.exists(str(tmp_path / 'selected_artifact_metadata.json'))
@@ -0,0 +1,25 @@
+import json
+import src.main as main_module
+
+
+def test_collect_datasets_from_glob_and_manifest(tmp_path):
+    for name in ('line-1.csv', 'line 2.csv'):
+        (tmp_path / name).write_text('x\n1\n')
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([str(tmp_path / 'line-1.csv'), {'name': 'press', 'path': 'other/press.csv'}]))
+    datasets = main_module.collect_datasets(str(tmp_path / '*.csv'), str(manifest))
+    assert [name for name, _ in datasets] == ['line_2', 'line-1', 'line-1_2', 'press']
+    assert datasets[-1][1] == 'other/press.csv'
+
+
+def test_batch_summary_combines_metrics_and_timings(tmp_path):
+    train_dir = tmp_path / 'line_1' / 'train'
+    train_dir.mkdir(parents=True)
+    (train_dir / 'model_training_log.json').write_text(json.dumps({
+        'rf_metrics': {'test_f1': 0.9}, 'xgb_metrics': {'test_f1': 0.8}}))
+    records = [{'stage': 'line_1.train', 'wall_time_s': 2.0}, {'stage': 'line_2.preprocess', 'wall_time_s': 0.5}]
+    rows = main_module.write_batch_summary(str(tmp_path), [('line_1', 'a.csv'), ('line_2', 'b.csv')], records,
+                                           failures={'line_2.preprocess': RuntimeError()}, skipped=['line_2.train'])
+    assert rows[0]['status'] == 'ok' and rows[0]['rf_test_f1'] == 0.9 and rows[0]['train_wall_s'] == 2.0
+    assert rows[1]['status'] == 'failed' and rows[1]['failed_stages'] == 'line_2.preprocess'
+    assert (tmp_path / 'batch_summary.csv').read_text().startswith('dataset,')
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from src.data.column_stats import ColumnStats
+from src.data.preprocessing import scale_features
+
+
+def _frame(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'temperature': rng.normal(70, 5, n),
+        'pressure': rng.exponential(2.0, n),
+        'constant': np.full(n, 3.0),
+    })
+    df.loc[rng.choice(n, 40, replace=False), 'temperature'] = np.nan
+    return df
+
+
+def test_from_frame_matches_pandas_and_chunks_merge_exactly():
+    df = _frame()
+    stats = ColumnStats.from_frame(df)
+    np.testing.assert_array_equal(stats.nulls, df.isna().sum().to_numpy())
+    np.testing.assert_array_equal(stats.count, df.count().to_numpy())
+    np.testing.assert_allclose(stats.mean, df.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(stats.variance(), df.var(ddof=0).to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(stats.skew(), df.skew().to_numpy(), rtol=1e-9)
+    np.testing.assert_array_equal(stats.min, df.min().to_numpy())
+    merged = ColumnStats.empty()
+    for start in range(0, len(df), 77):
+        merged = merged.merge(ColumnStats.from_frame(df.iloc[start:start + 77]))
+    for attr in ('count', 'nulls', 'mean', 'm2', 'm3', 'min', 'max'):
+        np.testing.assert_allclose(getattr(merged, attr), getattr(stats, attr), rtol=1e-9, atol=1e-9)
+    profile = stats.to_profile()
+    assert profile['temperature']['nulls'] == 40 and profile['constant']['skew'] == 0.0
+
+
+def test_from_counts_and_scaler_match_sklearn():
+    codes = pd.DataFrame({'machine': [0.0] * 7 + [1.0] * 3})
+    from_counts = ColumnStats.from_counts({'machine': {0.0: 7, 1.0: 3}})
+    direct = ColumnStats.from_frame(codes)
+    np.testing.assert_allclose(from_counts.mean, direct.mean)
+    np.testing.assert_allclose(from_counts.m2, direct.m2)
+    np.testing.assert_allclose(from_counts.skew(), direct.skew())
+    df = pd.DataFrame({'a': np.linspace(0, 1, 20), 'b': np.linspace(5, 6, 20) ** 2})
+    scaled, scaler = scale_features(df.copy())
+    assert isinstance(scaler, StandardScaler)
+    np.testing.assert_allclose(scaled.to_numpy(), StandardScaler().fit_transform(df), rtol=1e-9, atol=1e-12)
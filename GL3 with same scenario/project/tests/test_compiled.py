@@ -0,0 +1,60 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import src.data.preprocessing as preprocessing
+from src.utils.artifact_io import read_frame
+
+
+def _raw_frame(n=200, seed=3):
+    rng = np.random.default_rng(seed)
+    temperature = rng.normal(70, 5, n)
+    temperature[rng.random(n) < 0.1] = np.nan
+    machine = rng.choice(['M1', 'M2', 'M3', 'M4', 'M5'], n).astype(object)
+    machine[rng.random(n) < 0.1] = None
+    return pd.DataFrame({
+        'temperature': temperature,
+        'cycles': rng.integers(0, 100, n),
+        'machine_id': machine,
+        'shift': rng.choice(['day', 'night'], n).astype(object),
+        'tool': np.array([f'T{i:03d}' for i in rng.integers(0, 40, n)], dtype=object),
+        'target': rng.integers(0, 2, n),
+    })
+
+
+@pytest.mark.parametrize('chunksize', [None, 64])
+@pytest.mark.parametrize('strategy', ['frequency', 'hash'])
+def test_compiled_transform_matches_pipeline_output(tmp_path, chunksize, strategy):
+    raw = str(tmp_path / 'raw.csv')
+    _raw_frame().to_csv(raw, index=False)
+    out, compiled_path = str(tmp_path / 'pre.npy'), str(tmp_path / 'compiled.joblib')
+    preprocessing.run_pipeline(raw, out, str(tmp_path / 'enc.joblib'), str(tmp_path / 'scaler.joblib'),
+                               chunksize=chunksize, max_onehot=10, high_cardinality=strategy,
+                               n_hash_features=8, compiled_path=compiled_path)
+    compiled = joblib.load(compiled_path)
+    expected = read_frame(out).drop(columns=['target'])
+    assert compiled.output_columns == list(expected.columns)
+
+    raw_frame = pd.read_csv(raw)
+    batch = {col: raw_frame[col].to_numpy() for col in compiled.input_columns}
+    np.testing.assert_allclose(compiled.transform(batch), expected.to_numpy(), rtol=1e-6, atol=1e-6)
+    matrix = raw_frame[compiled.input_columns].to_numpy(dtype=object)
+    np.testing.assert_allclose(compiled.transform(matrix), expected.to_numpy(), rtol=1e-6, atol=1e-6)
+
+
+def test_compiled_handles_missing_and_unseen_values(tmp_path):
+    raw = str(tmp_path / 'raw.csv')
+    _raw_frame().to_csv(raw, index=False)
+    compiled_path = str(tmp_path / 'compiled.joblib')
+    preprocessing.run_pipeline(raw, str(tmp_path / 'pre.csv'), str(tmp_path / 'enc.joblib'),
+                               str(tmp_path / 'scaler.joblib'), max_onehot=10, compiled_path=compiled_path)
+    compiled = joblib.load(compiled_path)
+    batch = pd.DataFrame({'temperature': [np.nan], 'cycles': [5], 'machine_id': ['M9'], 'shift': [None],
+                          'tool': ['T999']})
+    row = compiled.transform({c: batch[c].to_numpy() for c in compiled.input_columns})[0]
+    names = compiled.output_columns
+    # An unseen machine lights up no one-hot column; an unseen tool has frequency 0
+    assert all(row[names.index(f'machine_id__M{i}')] == compiled.add[names.index(f'machine_id__M{i}')]
+               for i in range(1, 6))
+    assert row[names.index('tool')] == compiled.add[names.index('tool')]
+    assert np.isfinite(row).all()
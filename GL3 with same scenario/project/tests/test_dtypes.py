@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import src.data.feature_engineering as feature_engineering
+from src.utils.dtypes import compact_dtypes
+
+
+def test_compact_dtypes_downcasts_with_validation():
+    df = pd.DataFrame({
+        'temperature': [70.5, np.nan, 71.25],
+        'huge': [1e300, 0.0, 1.0],
+        'epoch': [1.7e9 + 1, 1.7e9 + 2, np.nan],
+        'tiny': [1e-42, 0.5, 1.0],
+        'alarm': [1, 0, 1],
+        'cycles': [10, 2000, 3],
+        'offset': [-5, 0, 5],
+        'machine_id': ['M1', 'M2', 'M1'],
+        'target': [0, 1, 0],
+    })
+    out = compact_dtypes(df, exclude=['target'])
+    assert out['temperature'].dtype == np.float32
+    assert out['huge'].dtype == np.float64  # would overflow float32
+    assert out['epoch'].dtype == np.float64  # whole numbers past 2**24 would be rounded
+    assert out['tiny'].dtype == np.float64  # subnormal in float32
+    assert out['alarm'].dtype == np.uint8
+    assert out['cycles'].dtype == np.uint16
+    assert out['offset'].dtype == np.int8
+    assert isinstance(out['machine_id'].dtype, pd.CategoricalDtype)
+    assert out['target'].dtype == np.int64
+    assert compact_dtypes(pd.DataFrame({'x': [1.5]}), policy='float64')['x'].dtype == np.float64
+
+
+def test_engineered_features_follow_policy(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'vibration': rng.normal(size=50), 'target': rng.integers(0, 2, 50)})
+    out = str(tmp_path / 'features.npy')
+    _, _, generated, engineered = feature_engineering.engineer_features(
+        df, out, rolling_windows=[5], agg_funcs=['mean', 'std'], condition_thresholds={'vibration': 0.0},
+        return_df=True, target_col='target')
+    assert engineered['vibration_roll5_mean'].dtype == np.float32
+    assert engineered['vibration_std'].dtype == np.float32
+    assert engineered['vibration_high'].dtype == np.uint8
+    assert engineered['target'].dtype == np.int64
+    np.testing.assert_allclose(engineered['vibration_roll5_mean'],
+                               df['vibration'].astype(np.float32).rolling(5, min_periods=1).mean(), rtol=1e-6)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+from src.data.encoding import CategoricalEncoder, stable_bucket
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    n = 300
+    return pd.DataFrame({
+        'shift': rng.choice(['day', 'night'], n).astype(object),
+        'line': rng.choice(['A', 'B', 'C', 'D'], n).astype(object),
+        'tool': np.array([f'T{i:04d}' for i in rng.integers(0, 200, n)], dtype=object),
+        'load': rng.normal(size=n),
+    })
+
+
+def test_low_cardinality_matches_sklearn_encoders(frame):
+    encoder = CategoricalEncoder(max_onehot=10).fit(frame, ['shift', 'line'])
+    out = encoder.transform(frame.copy())
+    assert list(out.columns) == ['shift', 'tool', 'load'] + [f'line__{c}' for c in 'ABCD']
+    np.testing.assert_array_equal(out['shift'], LabelEncoder().fit_transform(frame['shift']))
+    assert (out[[f'line__{c}' for c in 'ABCD']].dtypes == np.uint8).all()
+    ohe = OneHotEncoder(sparse=False).fit_transform(frame[['line']])
+    np.testing.assert_array_equal(out[[f'line__{c}' for c in 'ABCD']].to_numpy(), ohe)
+
+
+def test_high_cardinality_frequency_and_hash(frame):
+    freq = CategoricalEncoder(max_onehot=10).fit(frame, ['tool'])
+    assert freq.plans_['tool']['kind'] == 'frequency'
+    out = freq.transform(frame.copy())
+    expected = frame['tool'].map(frame['tool'].value_counts(normalize=True))
+    np.testing.assert_allclose(out['tool'], expected)
+
+    hashed = CategoricalEncoder(max_onehot=10, high_cardinality='hash', n_hash_features=8).fit(frame, ['tool'])
+    out = hashed.transform(frame.copy())
+    block = out[[f'tool__hash{i}' for i in range(8)]].to_numpy()
+    assert block.dtype == np.uint8
+    assert (block.sum(axis=1) == 1).all()
+    # Unseen categories still land in a bucket
+    unseen = hashed.transform(pd.DataFrame({'tool': ['NEW']}))
+    assert unseen[f"tool__hash{stable_bucket('NEW', 8)}"].iloc[0] == 1.0
+
+
+def test_sparse_and_codes_outputs_agree_with_dense(frame):
+    encoder = CategoricalEncoder(max_onehot=10, high_cardinality='hash', n_hash_features=8).fit(
+        frame, ['shift', 'line', 'tool'])
+    dense = encoder.transform(frame.copy())[encoder.feature_names()].to_numpy()
+    csr = encoder.transform_sparse(frame)
+    assert csr.nnz < csr.shape[0] * csr.shape[1]
+    np.testing.assert_array_equal(csr.toarray(), dense)
+    codes = encoder.transform_codes(pd.DataFrame({'shift': ['night', None], 'line': ['Z', 'A'], 'tool': ['T0001', 'x']}))
+    assert codes['shift'].tolist() == [1, -1]
+    assert codes['line'].tolist() == [-1, 0]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.data.feature_engineering as feature_engineering
+from src.data.feature_plan import FeaturePlan, FeatureSpec
+
+
+def _plan_frame(df):
+    """Adds cycle counts and a target to the shared sensor frame."""
+    df['cycles'] = np.random.default_rng(1).integers(0, 300, len(df))
+    df['target'] = (df['s0'] > 500).astype(int)
+    return df
+
+
+KWARGS = dict(agg_funcs=['mean', 'std', 'min', 'max'], condition_thresholds={'s0': 500.5, 'cycles': 150},
+              target_col='target', return_df=True)
+
+
+@pytest.mark.parametrize('windows,group_col', [([3, 10], None), ([4, '5min', '1h'], 'machine_id')])
+@pytest.mark.parametrize('dtype_policy', ['compact', 'float64'])
+def test_selected_features_match_full_table(sensor_frame, windows, group_col, dtype_policy, tmp_path):
+    df = _plan_frame(sensor_frame(n_machines=4))
+    kwargs = dict(KWARGS, rolling_windows=windows, group_col=group_col, dtype_policy=dtype_policy)
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    names = ['cycles', f's1_roll{windows[-1]}_std', 's0_high', f's0_roll{windows[1]}_max', f's0_roll{windows[1]}_std', 's2_min',
+             f's2_roll{windows[-1]}_mean']
+    plan_path = str(tmp_path / 'plan.json')
+    _, columns, feature_log, got = feature_engineering.engineer_features(
+        df.copy(), str(tmp_path / 'some.npy'), feature_names=names, plan_path=plan_path, **kwargs)
+    generated = [n for n in full.columns if n in names and n not in df.columns]
+    assert columns == list(df.columns) + generated and sorted(feature_log) == sorted(generated)
+    pd.testing.assert_frame_equal(got, full[columns], check_exact=True)
+    plan = FeaturePlan.load(plan_path)
+    assert plan.selected == names
+    assert plan.resolve(['s1_roll' + str(windows[-1]) + '_std'])[0] == FeatureSpec('rolling', 's1', windows[-1], 'std')
+
+
+def test_plan_names_follow_the_engineered_table(sensor_frame, tmp_path):
+    df = _plan_frame(sensor_frame(n_rows=100, n_machines=4))
+    df['s0_max'] = 1.0  # an input column taking a generated name: the input wins
+    kwargs = dict(KWARGS, rolling_windows=[5, '15min'])
+    _, columns, _, _ = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    plan = FeaturePlan(['s0', 's1', 's2', 'cycles', 'target', 's0_max'], [5, '15min'], KWARGS['agg_funcs'],
+                       KWARGS['condition_thresholds'], list(df.columns))
+    assert list(df.columns) + plan.names == columns
+    with pytest.raises(ValueError, match='s0_roll7_mean'):
+        plan.select(['s0_roll5_mean', 's0_roll7_mean'])
+
+
+def test_sampled_groups_keep_their_full_table_features(sensor_frame, tmp_path):
+    df = _plan_frame(sensor_frame(n_machines=4))
+    kwargs = dict(KWARGS, rolling_windows=[4, '1h'], group_col='machine_id')
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    *_, sample = feature_engineering.engineer_features(df.copy(), None, sample_rows=200, **kwargs)
+    machines = sample['machine_id'].unique()
+    assert 200 <= len(sample) < len(df) and len(machines) < 4
+    expected = full[full['machine_id'].isin(machines)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(sample, expected, check_exact=True)
@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_selection import mutual_info_classif
+import src.data.feature_engineering as feature_engineering
+from src.data.feature_selection import correlation_matrix, histogram_mutual_info, prune_correlated, quantile_codes
+
+
+def _frame(n_rows=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 8)), columns=[f'x{i}' for i in range(8)])
+    X.iloc[rng.choice(n_rows, 500, replace=False), 3] = np.nan
+    y = ((X['x0'] + 0.5 * X['x1'] ** 2 + 0.3 * X['x2'] + rng.normal(size=n_rows)) > 1).astype(int)
+    X['flag'] = (X['x0'] > 0).astype(np.uint8)
+    return X, y
+
+
+def test_quantile_codes_bin_once_into_uint8():
+    values = np.array([0.0, 1.0, 1.0, 1.0, np.nan, 5.0, 1.0, 0.0])
+    codes = quantile_codes(values, n_bins=4)
+    assert codes.dtype == np.uint8 and codes[4] == 4
+    assert codes[0] == codes[7] < codes[1] == codes[2] == codes[6]
+    flag = quantile_codes(np.array([0.0, 1.0, 0.0, 0.0, 1.0]), n_bins=32)
+    assert flag[0] == flag[2] == flag[3] < flag[1] == flag[4]
+    np.testing.assert_array_equal(np.bincount(quantile_codes(np.arange(100.0), n_bins=4)), [25] * 4)
+    with pytest.raises(ValueError):
+        quantile_codes(values, n_bins=300)
+
+
+def test_histogram_mi_matches_knn_estimate_and_workers():
+    X, y = _frame()
+    got = histogram_mutual_info(X, y)
+    knn = pd.Series(mutual_info_classif(X.fillna(0), y, random_state=42), index=X.columns)
+    informative = ['x0', 'flag', 'x1', 'x2']
+    np.testing.assert_allclose(got.loc[informative, 'mutual_info'], knn[informative], rtol=0.25)
+    assert got['mutual_info'].drop(informative).max() < 0.005
+    pd.testing.assert_frame_equal(histogram_mutual_info(X, y, n_workers=3), got, check_exact=True)
+    # A feature equal to a balanced binary target carries its entropy
+    exact = histogram_mutual_info(pd.DataFrame({'copy': np.tile([0, 1], 500)}), np.tile([0, 1], 500))
+    assert exact.loc['copy', 'mutual_info'] == pytest.approx(np.log(2), abs=1e-3)
+
+
+def test_sampled_histogram_mi_reports_wider_errors():
+    X, y = _frame()
+    full = histogram_mutual_info(X, y)
+    sampled = histogram_mutual_info(X, y, sample_rows=2000)
+    assert (sampled.loc[['x0', 'x1', 'flag'], 'mi_std_error'] > 0).all()
+    assert sampled['mi_std_error'].median() > full['mi_std_error'].median()
+    assert abs(sampled.loc['x0', 'mutual_info'] - full.loc['x0', 'mutual_info']) < 4 * sampled.loc['x0', 'mi_std_error']
+
+
+def test_select_top_features_with_histogram_mi(tmp_path):
+    X, y = _frame(n_rows=3000)
+    df = X.fillna(0).assign(target=y)
+    log = tmp_path / 'rationale.json'
+    selected, report = feature_engineering.select_top_features(df, 'target', num_features=4, n_jobs=2,
+                                                              selection_log_path=str(log), mi_method='histogram',
+                                                              mi_sample_rows=1000)
+    assert set(selected) >= {'x0', 'x1'} and 'mi_std_error' in report.columns
+    summary = json.loads(log.read_text())
+    assert summary['mutual_info_estimator'] == {'method': 'histogram', 'rows': 1000, 'bins': 32}
+
+
+def test_correlation_matrix_accumulates_row_blocks():
+    X, y = _frame(n_rows=1000)
+    X['const'] = 2.0
+    corr = correlation_matrix(X, y.to_numpy(), chunk_elements=500)  # 45 rows per block
+    with np.errstate(invalid='ignore'):
+        expected = np.corrcoef(np.column_stack([X.fillna(X.mean()).to_numpy(), y]), rowvar=False)
+    expected[np.isnan(expected)] = 0.0
+    np.fill_diagonal(expected, 1.0)
+    np.testing.assert_allclose(corr, expected, atol=1e-12)
+
+
+def test_prune_correlated_keeps_the_most_target_correlated_representative():
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=2000)
+    y = (base + rng.normal(size=2000) > 0).astype(int)
+    X = pd.DataFrame({'noisy_copy': base + 0.5 * rng.normal(size=2000), 'other': rng.normal(size=2000),
+                      'base': base, 'scaled': -3 * base, 'smooth': base + 0.05 * rng.normal(size=2000)})
+    kept, clusters = prune_correlated(X, y, threshold=0.95)
+    assert kept == ['noisy_copy', 'other', 'base'] or kept == ['noisy_copy', 'other', 'smooth']
+    [cluster] = clusters
+    assert {d['feature'] for d in cluster['dropped']} | {cluster['representative']} == {'base', 'scaled', 'smooth'}
+    assert all(abs(d['correlation']) >= 0.95 for d in cluster['dropped'])
+    assert prune_correlated(X, threshold=0.999)[0] == ['noisy_copy', 'other', 'base', 'smooth']
+
+
+def test_select_top_features_records_pruning(tmp_path):
+    X, y = _frame(n_rows=2000)
+    df = X.fillna(0).assign(x0_copy=X['x0'].fillna(0) * 2, target=y)
+    log = tmp_path / 'rationale.json'
+    selected, report = feature_engineering.select_top_features(df, 'target', num_features=5, n_jobs=1,
+                                                              selection_log_path=str(log))
+    summary = json.loads(log.read_text())['redundancy_pruning']
+    assert summary['candidates'] == 10 and summary['kept'] == 9
+    assert summary['clusters'][0]['dropped'][0]['correlation'] == pytest.approx(1.0)
+    assert len(report) == 9 and not {'x0', 'x0_copy'} <= set(selected)
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import time
+import src.utils.hashing as hashing
+
+
+def _write_old(path, data):
+    path.write_bytes(data)
+    # Outside the racy window, so the digest may be cached
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+
+def test_file_digest_matches_hashlib_and_is_cached(tmp_path, monkeypatch):
+    target = tmp_path / 'raw.csv'
+    _write_old(target, b'a,b\n1,2\n' * 1000)
+    cache = hashing.HashCache(str(tmp_path / 'hashes.json'))
+    assert hashing.file_digest(str(target), cache=cache) == hashlib.sha256(target.read_bytes()).hexdigest()
+
+    calls = []
+    original = hashing._hash_stream
+    monkeypatch.setattr(hashing, '_hash_stream', lambda p, a: calls.append(p) or original(p, a))
+    # A fresh cache object reads the persisted entries
+    reloaded = hashing.HashCache(str(tmp_path / 'hashes.json'))
+    hashing.file_digest(str(target), cache=reloaded)
+    assert calls == []
+
+    _write_old(target, b'a,b\n3,4\n' * 1001)
+    assert hashing.file_digest(str(target), cache=reloaded) == hashlib.sha256(target.read_bytes()).hexdigest()
+    assert len(calls) == 1
+
+
+def test_recently_modified_files_are_not_cached(tmp_path):
+    target = tmp_path / 'fresh.bin'
+    target.write_bytes(b'x' * 10)
+    cache = hashing.HashCache(str(tmp_path / 'hashes.json'))
+    hashing.file_digest(str(target), cache=cache)
+    assert not os.path.exists(tmp_path / 'hashes.json')
+
+
+def test_parallel_hashing_and_directory_artifacts(tmp_path):
+    files = []
+    for i in range(6):
+        f = tmp_path / f'f{i}.bin'
+        f.write_bytes(os.urandom(1000 + i))
+        files.append(str(f))
+    cache = hashing.HashCache(str(tmp_path / 'hashes.json'))
+    digests = hashing.hash_files(files, max_workers=3, cache=cache)
+    assert digests == {f: hashlib.sha256(open(f, 'rb').read()).hexdigest() for f in files}
+
+    store = tmp_path / 'frame.npy'
+    (store / 'sub').mkdir(parents=True)
+    (store / 'c00000.npy').write_bytes(b'one')
+    (store / 'sub' / 'c00001.npy').write_bytes(b'two')
+    first = hashing.artifact_checksum(str(store), cache=cache)
+    assert hashing.artifact_checksums([str(store), files[0]], cache=cache) == {str(store): first,
+                                                                               files[0]: digests[files[0]]}
+    (store / 'sub' / 'c00001.npy').write_bytes(b'TWO')
+    assert hashing.artifact_checksum(str(store), cache=cache) != first
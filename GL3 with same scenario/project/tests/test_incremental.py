@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.data.feature_engineering as feature_engineering
+
+
+def _incremental_frame(df):
+    df.iloc[:25, 2] = np.nan  # first values missing in every early window
+    return df
+
+
+@pytest.mark.parametrize('windows,group_col', [([3, 10], None), ([4, '5min', '1h'], 'machine_id'),
+                                               (['15min'], None)])
+@pytest.mark.parametrize('dtype_policy', ['compact', 'float64'])
+def test_append_matches_full_recompute(sensor_frame, windows, group_col, dtype_policy, tmp_path):
+    df = _incremental_frame(sensor_frame())
+    kwargs = dict(rolling_windows=windows, agg_funcs=['mean', 'std', 'min', 'max'], dtype_policy=dtype_policy,
+                  group_col=group_col, condition_thresholds={'s0': 500.5}, return_df=True)
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    out, state = str(tmp_path / 'inc.npy'), str(tmp_path / 'state.joblib')
+    for batch in (df[:250], df[250:260], df[260:]):
+        *_, got = feature_engineering.engineer_features(batch.copy().reset_index(drop=True), out, state_path=state,
+                                                        append=True, **kwargs)
+    pd.testing.assert_frame_equal(got, full, check_exact=True)
+    pd.testing.assert_frame_equal(feature_engineering.read_frame(out), full, check_exact=True)
+
+
+def test_out_of_order_rows_fall_back_to_full_recompute(sensor_frame, tmp_path, caplog):
+    df = _incremental_frame(sensor_frame())
+    kwargs = dict(rolling_windows=[5, '5min'], agg_funcs=['mean', 'max'], group_col='machine_id', return_df=True)
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    out, state = str(tmp_path / 'inc.npy'), str(tmp_path / 'state.joblib')
+    # Rows arriving after later ones (with timestamps of their own, so their place in the sort is unique)
+    unique = df.index[~df['timestamp'].duplicated(keep=False)]
+    late = df.index.isin(unique[[50, 300]])
+    feature_engineering.engineer_features(df[~late].copy(), out, state_path=state, **kwargs)
+    *_, got = feature_engineering.engineer_features(df[late].copy().reset_index(drop=True), out, state_path=state,
+                                                    append=True, **kwargs)
+    assert 'Recomputing all' in caplog.text
+    pd.testing.assert_frame_equal(got, full, check_exact=True)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.data.feature_engineering as feature_engineering
+from src.data.preprocessing import impute_missing_values, scale_features
+from src.utils.parallel import ColumnBlockExecutor, column_blocks
+
+
+def _wide_frame(n_rows=200, n_cols=9, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_cols)), columns=[f's{i}' for i in range(n_cols)])
+    df.iloc[rng.choice(n_rows, 15, replace=False), 2] = np.nan
+    df['cycles'] = rng.integers(0, 500, n_rows)
+    return df
+
+
+def test_column_blocks_cover_columns_in_order():
+    blocks = column_blocks(10, 4)
+    assert [(b.start, b.stop) for b in blocks] == [(0, 2), (2, 5), (5, 8), (8, 10)]
+    assert column_blocks(2, 8) == [slice(0, 1), slice(1, 2)]
+
+
+@pytest.mark.parametrize('backend', ['threads', 'processes'])
+def test_parallel_blocks_match_serial(backend, tmp_path):
+    df = _wide_frame()
+    kwargs = dict(rolling_windows=[3, 10], agg_funcs=['mean', 'std', 'max'], return_df=True)
+    *_, serial = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'a.npy'), **kwargs)
+    *_, parallel = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'b.npy'), n_workers=3,
+                                                         parallel_backend=backend, **kwargs)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    expected, _ = scale_features(impute_missing_values(df.copy()))
+    with ColumnBlockExecutor(3, backend) as executor:
+        got = impute_missing_values(df.copy(), executor=executor)
+        got, _ = scale_features(got, executor=executor)
+    pd.testing.assert_frame_equal(expected, got)
+
+
+@pytest.mark.parametrize('n_workers,backend', [(1, 'threads'), (3, 'threads'), (3, 'processes')])
+def test_group_col_keeps_windows_within_partitions(n_workers, backend, tmp_path):
+    df = _wide_frame(n_cols=3)
+    df['machine_id'] = np.random.default_rng(1).choice(['M1', 'M2', 'M3', 'M4', 'M5'], len(df))
+    *_, grouped = feature_engineering.engineer_features(
+        df.copy(), str(tmp_path / 'a.npy'), rolling_windows=[4], agg_funcs=['mean', 'std'], return_df=True,
+        dtype_policy='float64', group_col='machine_id', n_workers=n_workers, parallel_backend=backend)
+    pd.testing.assert_frame_equal(grouped[df.columns], df)  # rows keep their order
+    assert 'machine_id_mean' not in grouped.columns
+    by_machine = df.groupby('machine_id')['s0']
+    expected = {
+        's0_roll4_mean': by_machine.transform(lambda s: s.rolling(4, min_periods=1).mean()),
+        's0_roll4_std': by_machine.transform(lambda s: s.rolling(4, min_periods=1).std()).fillna(0),
+        's0_max': by_machine.cummax(),
+        's0_std': by_machine.transform(lambda s: s.expanding().std()).fillna(0),
+    }
+    for name, values in expected.items():
+        np.testing.assert_allclose(grouped[name], values, rtol=1e-9, atol=1e-12, err_msg=name)
+
+
+@pytest.mark.parametrize('n_workers,backend', [(1, 'threads'), (3, 'processes')])
+def test_time_windows_within_groups(n_workers, backend, tmp_path):
+    df = _wide_frame(n_cols=3)
+    rng = np.random.default_rng(2)
+    df['machine_id'] = rng.choice(['M1', 'M2', 'M3'], len(df))
+    # Irregular, partly shared timestamps as text, shuffled (engineer_features sorts them)
+    times = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.cumsum(rng.choice([0, 20, 90, 900], len(df))), unit='s')
+    df['timestamp'] = times.astype(str)
+    df = df.sample(frac=1, random_state=0).reset_index(drop=True)
+    *_, got = feature_engineering.engineer_features(
+        df.copy(), str(tmp_path / 'a.npy'), rolling_windows=['5min', 3], agg_funcs=['mean', 'max'], return_df=True,
+        dtype_policy='float64', group_col='machine_id', n_workers=n_workers, parallel_backend=backend)
+    assert got['timestamp'].is_monotonic_increasing
+    expected = got[['machine_id', 'timestamp', 's2']].set_index('timestamp').groupby('machine_id')['s2']
+    for name, func in [('s2_roll5min_mean', lambda s: s.rolling('5min').mean()),
+                       ('s2_roll5min_max', lambda s: s.rolling('5min').max()),
+                       ('s2_roll3_mean', lambda s: s.rolling(3, min_periods=1).mean())]:
+        np.testing.assert_allclose(got[name], expected.transform(func).to_numpy(), rtol=1e-9, err_msg=name)
+
+
+def test_parse_rolling_windows():
+    assert feature_engineering.parse_rolling_windows('5, 15,30') == [5, 15, 30]
+    assert feature_engineering.parse_rolling_windows('5min,1h,24h') == ['5min', '1h', '24h']
+    for bad in ('0', '-5min', 'soon'):
+        with pytest.raises(ValueError):
+            feature_engineering.parse_rolling_windows(bad)
+
+
+def test_feature_blocks_skip_taken_names_and_keep_order():
+    df = pd.DataFrame({'a': [1.0, 2.0], 'a_high': [0, 1]})
+    blocks = feature_engineering.FeatureBlocks(df)
+    assert blocks.add(['a_mean', 'a_high', 'a_mean'], np.arange(6, dtype=np.float32).reshape(2, 3)) == ['a_mean']
+    assert blocks.add(['a_low'], np.ones((2, 1), dtype=np.uint8)) == ['a_low']
+    out = blocks.frame()
+    assert list(out.columns) == ['a', 'a_high', 'a_mean', 'a_low']
+    assert out['a_mean'].tolist() == [0.0, 3.0] and out['a_mean'].dtype == np.float32
+    assert out['a_low'].dtype == np.uint8
+    assert feature_engineering.FeatureBlocks(df).frame() is df
+
+
+def test_condition_flags_match_per_column_comparisons():
+    df = _wide_frame(n_cols=3)
+    thresholds = {'s0': 0.0, 'cycles': 250}
+    got = feature_engineering.create_condition_encoding(df.copy(), list(thresholds), thresholds, dtype=np.uint8)
+    for col, threshold in thresholds.items():
+        assert (got[f'{col}_high'] == (df[col] > threshold).astype(np.uint8)).all()
+        assert (got[f'{col}_low'] == (df[col] < threshold).astype(np.uint8)).all()
+    assert list(got.columns[-4:]) == ['s0_high', 's0_low', 'cycles_high', 'cycles_low']
@@ -0,0 +1,60 @@
+import json
+import pandas as pd
+import src.pipeline.dag as dag_module
+from src.pipeline.dag import Stage
+from src.pipeline.perf import PerfRecorder, artifact_rows
+
+
+def _history_line(run_id, stage, wall, executor='inprocess'):
+    return json.dumps({'run_id': run_id, 'stage': stage, 'executor': executor, 'status': 'ok', 'cache_hit': False,
+                       'wall_time_s': wall, 'cpu_time_s': 0.0, 'peak_rss_bytes': None})
+
+
+def test_stages_emit_records_with_rows_and_bytes(tmp_path):
+    raw = tmp_path / 'raw.csv'
+    out = tmp_path / 'out.csv'
+    pd.DataFrame({'x': range(10)}).to_csv(raw, index=False)
+
+    def copy_half(inputs):
+        pd.read_csv(raw).head(5).to_csv(out, index=False)
+
+    perf = PerfRecorder(str(tmp_path / 'history.jsonl'), run_id='run1', executor='inprocess')
+    dag_module.run_dag([Stage('copy', copy_half, reads=[str(raw)], writes=[str(out)])], perf=perf)
+    perf.save(str(tmp_path))
+    record = perf.records[0]
+    assert record['stage'] == 'copy' and record['status'] == 'ok'
+    assert record['rows_in'] == 10 and record['rows_out'] == 5
+    assert record['bytes_written'] == out.stat().st_size
+    assert record['wall_time_s'] >= 0 and record['peak_rss_bytes'] > 0
+    assert len((tmp_path / 'history.jsonl').read_text().splitlines()) == 1
+    assert json.loads((tmp_path / 'perf_records.json').read_text())[0]['stage'] == 'copy'
+
+
+def test_regression_against_rolling_median(tmp_path):
+    history = tmp_path / 'history.jsonl'
+    history.write_text('\n'.join(_history_line(f'r{i}', 'train', wall) for i, wall in enumerate([10, 11, 30, 10, 9])))
+    perf = PerfRecorder(str(history), run_id='now', executor='inprocess', window=5, tolerance=0.25)
+    perf.records.append(json.loads(_history_line('now', 'train', 12.0)))
+    assert perf.compare() == []
+    perf.records[0]['wall_time_s'] = 14.0
+    regressions = perf.compare()
+    assert [(r['stage'], r['metric']) for r in regressions] == [('train', 'wall_time_s')]
+    assert regressions[0]['baseline'] == 10
+
+
+def test_baseline_ignores_other_executors_and_tiny_stages(tmp_path):
+    history = tmp_path / 'history.jsonl'
+    history.write_text('\n'.join([_history_line('r0', 'train', 1.0, executor='subprocess'),
+                                  _history_line('r1', 'verify', 0.01)]))
+    perf = PerfRecorder(str(history), run_id='now', executor='inprocess')
+    perf.records.extend([json.loads(_history_line('now', 'train', 50.0)),
+                         json.loads(_history_line('now', 'verify', 0.5))])
+    assert perf.compare() == []
+
+
+def test_artifact_rows_for_npy_directory(tmp_path):
+    from src.utils.artifact_io import write_frame
+    path = str(tmp_path / 'frame.npy')
+    write_frame(pd.DataFrame({'a': [1, 2, 3]}), path)
+    assert artifact_rows(path) == 3
+    assert artifact_rows(str(tmp_path)) is None
@@ -0,0 +1,38 @@
+import logging
+import sys
+import time
+import pytest
+import src.main as main_module
+
+PY = sys.executable
+
+
+def test_output_is_streamed_into_driver_log(caplog):
+    caplog.set_level(logging.INFO)
+    main_module.run_cli(f"{PY} -c \"print('hello'); print('PROGRESS demo: rows=10')\"", label='Demo')
+    messages = [r.getMessage() for r in caplog.records]
+    assert '[Demo] hello' in messages
+    assert '[Demo] PROGRESS demo: rows=10' in messages
+
+
+def test_failure_reports_bounded_tail(caplog):
+    cmd = f"{PY} -c \"import sys; [print(i) for i in range(50)]; sys.exit(3)\""
+    with pytest.raises(SystemExit):
+        main_module.run_cli(cmd, label='Failing', tail_lines=5)
+    report = [r.getMessage() for r in caplog.records if 'failed with code 3' in r.getMessage()][0]
+    assert report.endswith('45\n46\n47\n48\n49')
+    assert '\n44\n' not in report
+
+
+def test_timeout_kills_stage():
+    started = time.monotonic()
+    with pytest.raises(SystemExit):
+        main_module.run_cli(f"{PY} -c \"import time; time.sleep(60)\"", label='Slow', timeout=1)
+    assert time.monotonic() - started < 15
+
+
+def test_memory_limit_kills_stage(caplog):
+    cmd = f"{PY} -c \"import time; b = b'x' * (400 * 1024 * 1024); time.sleep(60)\""
+    with pytest.raises(SystemExit):
+        main_module.run_cli(cmd, label='Hungry', max_memory_mb=150)
+    assert any('memory limit' in r.getMessage() for r in caplog.records)
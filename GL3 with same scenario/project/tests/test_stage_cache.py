@@ -0,0 +1,106 @@
+import os
+import src.pipeline.dag as dag_module
+from src.pipeline.dag import Stage
+from src.pipeline.cache import StageCache
+
+
+def _make_stages(tmp_path, run_name, calls, param=1):
+    raw = tmp_path / 'raw.csv'
+    out_a = tmp_path / run_name / 'a'
+    out_b = tmp_path / run_name / 'b'
+
+    def stage_a(inputs):
+        calls.append('a')
+        out_a.mkdir(parents=True, exist_ok=True)
+        (out_a / 'a.txt').write_text(raw.read_text().upper())
+        return 'a-result'
+
+    def stage_b(inputs):
+        calls.append('b')
+        out_b.mkdir(parents=True, exist_ok=True)
+        (out_b / 'b.txt').write_text(f"{inputs['a']}:{param}")
+        return 'b-result'
+
+    return [
+        Stage('a', stage_a, inputs=[str(raw)], output_dir=str(out_a), load=lambda: (out_a / 'a.txt').read_text()),
+        Stage('b', stage_b, deps=['a'], params={'param': param}, output_dir=str(out_b)),
+    ]
+
+
+def test_unchanged_stages_are_restored_from_cache(tmp_path):
+    (tmp_path / 'raw.csv').write_text('x,y\n1,2\n')
+    cache = StageCache(str(tmp_path / 'cache'), code_version='abc')
+    calls = []
+    dag_module.run_dag(_make_stages(tmp_path, 'run1', calls), cache=cache)
+    assert calls == ['a', 'b']
+
+    calls.clear()
+    dag_module.run_dag(_make_stages(tmp_path, 'run2', calls), cache=cache)
+    assert calls == []
+    assert (tmp_path / 'run2' / 'b' / 'b.txt').read_text() == 'a-result:1'
+    assert os.path.samefile(tmp_path / 'run1' / 'a' / 'a.txt', tmp_path / 'run2' / 'a' / 'a.txt')
+
+
+def test_param_change_recomputes_only_downstream_stage(tmp_path):
+    (tmp_path / 'raw.csv').write_text('x,y\n1,2\n')
+    cache = StageCache(str(tmp_path / 'cache'))
+    calls = []
+    dag_module.run_dag(_make_stages(tmp_path, 'run1', calls, param=1), cache=cache)
+    calls.clear()
+    dag_module.run_dag(_make_stages(tmp_path, 'run2', calls, param=2), cache=cache)
+    # Stage b re-runs and receives the cached result of a, rebuilt from its artifacts
+    assert calls == ['b']
+    assert (tmp_path / 'run2' / 'b' / 'b.txt').read_text() == 'X,Y\n1,2\n:2'
+
+
+def test_input_change_invalidates_cache(tmp_path):
+    raw = tmp_path / 'raw.csv'
+    raw.write_text('x,y\n1,2\n')
+    cache = StageCache(str(tmp_path / 'cache'))
+    calls = []
+    dag_module.run_dag(_make_stages(tmp_path, 'run1', calls), cache=cache)
+    raw.write_text('x,y\n3,4\n')
+    calls.clear()
+    dag_module.run_dag(_make_stages(tmp_path, 'run2', calls), cache=cache)
+    assert calls == ['a', 'b']
+
+
+def test_rerun_over_restored_entry_leaves_cache_intact(tmp_path):
+    (tmp_path / 'raw.csv').write_text('x,y\n1,2\n')
+    cache = StageCache(str(tmp_path / 'cache'))
+    calls = []
+    dag_module.run_dag(_make_stages(tmp_path, 'run1', calls, param=1), cache=cache)
+    dag_module.run_dag(_make_stages(tmp_path, 'run2', calls, param=1), cache=cache)
+    # run2/b/b.txt is a hard link into the cache entry; the changed stage rewrites it in place
+    calls.clear()
+    dag_module.run_dag(_make_stages(tmp_path, 'run2', calls, param=2), cache=cache)
+    assert calls == ['b'] and (tmp_path / 'run2' / 'b' / 'b.txt').read_text() == 'X,Y\n1,2\n:2'
+    assert (tmp_path / 'run1' / 'b' / 'b.txt').read_text() == 'a-result:1'
+    dag_module.run_dag(_make_stages(tmp_path, 'run3', calls, param=1), cache=cache)
+    assert calls == ['b'] and (tmp_path / 'run3' / 'b' / 'b.txt').read_text() == 'a-result:1'
+
+
+def test_modified_entry_is_not_restored(tmp_path):
+    (tmp_path / 'raw.csv').write_text('x,y\n1,2\n')
+    cache = StageCache(str(tmp_path / 'cache'))
+    calls = []
+    dag_module.run_dag(_make_stages(tmp_path, 'run1', calls), cache=cache)
+    with open(tmp_path / 'run1' / 'b' / 'b.txt', 'a') as f:  # bypasses the executor
+        f.write('tampered')
+    calls.clear()
+    dag_module.run_dag(_make_stages(tmp_path, 'run2', calls), cache=cache)
+    assert calls == ['b'] and (tmp_path / 'run2' / 'b' / 'b.txt').read_text() == 'X,Y\n1,2\n:1'
+    # The recomputed outputs replace the modified entry
+    calls.clear()
+    dag_module.run_dag(_make_stages(tmp_path, 'run3', calls), cache=cache)
+    assert calls == [] and (tmp_path / 'run3' / 'b' / 'b.txt').read_text() == 'X,Y\n1,2\n:1'
+
+
+def test_source_edits_change_the_key(tmp_path):
+    source = tmp_path / 'src'
+    (source / 'utils').mkdir(parents=True)
+    (source / 'utils' / 'helper.py').write_text('X = 1\n')
+    stage = Stage('a', inputs=[], output_dir=str(tmp_path / 'out'))
+    key, _ = StageCache(str(tmp_path / 'cache'), source_dir=str(source)).stage_key(stage, {})
+    (source / 'utils' / 'helper.py').write_text('X = 2\n')
+    assert StageCache(str(tmp_path / 'cache'), source_dir=str(source)).stage_key(stage, {})[0] != key
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+import src.data.feature_engineering as feature_engineering
+from src.data.streaming import FeatureState, FeatureStream
+
+
+def _stream_frame(df):
+    """Adds early gaps in s2, a constant stretch in s0 and cycle counts to the shared sensor frame."""
+    df.iloc[:25, 2] = np.nan
+    df.iloc[300:310, 0] = 500.25  # constant stretch
+    df['cycles'] = np.random.default_rng(1).integers(0, 300, len(df))
+    return df
+
+
+KWARGS = dict(agg_funcs=['mean', 'std', 'min', 'max'], condition_thresholds={'s0': 500.5, 'cycles': 150},
+              group_col='machine_id', return_df=True)
+
+
+@pytest.mark.parametrize('windows', [[3, 10], [4, '5min', '1h']])
+@pytest.mark.parametrize('dtype_policy', ['compact', 'float64'])
+def test_stream_continues_batch_bit_for_bit(sensor_frame, windows, dtype_policy, tmp_path):
+    df = _stream_frame(sensor_frame())
+    kwargs = dict(KWARGS, rolling_windows=windows, dtype_policy=dtype_policy)
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    state = str(tmp_path / 'state.joblib')
+    feature_engineering.engineer_features(df[:400].copy(), str(tmp_path / 'head.npy'), state_path=state, **kwargs)
+    stream = FeatureStream.load(state)
+    rows = [stream.update(event) for event in df[400:].to_dict('records')]
+    got = pd.DataFrame(rows)
+    expected = full.iloc[400:].reset_index(drop=True)[got.columns]
+    pd.testing.assert_frame_equal(got, expected, check_exact=True)
+
+
+def test_fresh_state_matches_batch_over_each_history(sensor_frame, tmp_path):
+    df = _stream_frame(sensor_frame(n_rows=500))
+    df = df[df['machine_id'] == 'M1'].reset_index(drop=True)
+    kwargs = dict(KWARGS, rolling_windows=[2, '15min', '2h'], dtype_policy='float64')
+    state = FeatureState(['s0', 's1', 's2', 'cycles'], [2, '15min', '2h'], kwargs['agg_funcs'],
+                         kwargs['condition_thresholds'], dtype_policy='float64',
+                         input_dtypes={'cycles': 'int64'})
+    got = pd.DataFrame([state.update(event) for event in df.to_dict('records')])
+    assert list(got.columns[4:]) == state.names
+    # Each event matches the batch run over the history up to it (the duration windows' block grows with it)
+    for end in [1, 2, 9, 40, 77, 130, len(df)]:
+        *_, batch = feature_engineering.engineer_features(df[:end].copy(), str(tmp_path / 'batch.npy'), **kwargs)
+        pd.testing.assert_frame_equal(got.iloc[end - 1:end], batch[got.columns].iloc[end - 1:end],
+                                      check_exact=True)
+    with pytest.raises(ValueError):
+        state.update(dict(df.iloc[0]))  # earlier than the last event
+
+
+def test_stream_computes_only_the_selected_features(sensor_frame, tmp_path):
+    df = _stream_frame(sensor_frame())
+    kwargs = dict(KWARGS, rolling_windows=[3, 10, '5min', '1h'], dtype_policy='compact')
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    names = ['s0_roll3_std', 's1_roll1h_mean', 's2_max', 'cycles_high']
+    state = str(tmp_path / 'state.joblib')
+    _, columns, _, head = feature_engineering.engineer_features(df[:400].copy(), str(tmp_path / 'head.npy'),
+                                                                state_path=state, feature_names=names, **kwargs)
+    stream = FeatureStream.load(state)
+    rows = [stream.update(event) for event in df[400:].to_dict('records')]
+    got = pd.DataFrame(rows)
+    assert list(got.columns) == ['s0', 's1', 's2', 'cycles'] + names
+    assert list(got.columns) == [c for c in columns if c in got.columns] and set(names) <= set(columns)
+    assert sorted(stream.states['M1'].row_windows) == [0]  # the 10-row window feeds no selected feature
+    pd.testing.assert_frame_equal(got, full.iloc[400:].reset_index(drop=True)[got.columns], check_exact=True)
+
+
+def test_stream_matches_batch_across_a_level_shift(sensor_frame, tmp_path):
+    df = _stream_frame(sensor_frame())
+    df.loc[450:, 's0'] += 1e9
+    kwargs = dict(KWARGS, rolling_windows=[7, '30min'], dtype_policy='float64')
+    *_, full = feature_engineering.engineer_features(df.copy(), str(tmp_path / 'full.npy'), **kwargs)
+    state = str(tmp_path / 'state.joblib')
+    feature_engineering.engineer_features(df[:400].copy(), str(tmp_path / 'head.npy'), state_path=state, **kwargs)
+    stream = FeatureStream.load(state)
+    got = pd.DataFrame([stream.update(event) for event in df[400:].to_dict('records')])
+    pd.testing.assert_frame_equal(got, full.iloc[400:].reset_index(drop=True)[got.columns], check_exact=True)
+    # Past the shift the spread stays at the noise level (unit normal) instead of collapsing
+    spread = full.loc[480:].groupby('machine_id')['s0_roll7_std'].median()
+    assert ((spread > 0.5) & (spread < 2)).all()
@@ -0,0 +1,55 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
+import src.training.train as train
+
+
+def _data():
+    rng = np.random.RandomState(0)
+    X = pd.DataFrame(rng.randn(120, 4), columns=['a', 'b', 'c', 'd'])
+    y = pd.Series((X['a'] + rng.randn(120) * 0.5 > 0).astype(int))
+    return X, y
+
+
+PARAM_DIST = {'n_estimators': [5, 10], 'max_depth': [None, 2, 4], 'min_samples_leaf': [1, 3]}
+
+
+def test_resumable_search_matches_randomized_search_cv():
+    X, y = _data()
+    estimator = train.build_estimator('random_forest', 42)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    reference = RandomizedSearchCV(estimator, PARAM_DIST, n_iter=4, scoring='f1', cv=cv, random_state=42).fit(X, y)
+    best, best_params, best_score = train.resumable_search('random_forest', estimator, PARAM_DIST, X, y,
+                                                           check_scoring(estimator, scoring='f1'), cv, 4, 42,
+                                                           n_jobs=2)
+    assert best_params == reference.best_params_
+    assert np.isclose(best_score, reference.best_score_)
+    # Candidates are fitted single-threaded, the refit uses the search's cores
+    assert estimator.n_jobs == 1 and best.n_jobs == 2
+
+
+def test_interrupted_search_resumes_remaining_candidates(tmp_path):
+    X, y = _data()
+    estimator = train.build_estimator('random_forest', 42)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    state = str(tmp_path / 'state' / 'random_forest.jsonl')
+    progress = str(tmp_path / 'fits')
+    scorer = train.ProgressScorer(check_scoring(estimator, scoring='f1'), progress)
+    full = train.resumable_search('random_forest', estimator, PARAM_DIST, X, y, scorer, cv, 4, 42, state_path=state)
+
+    # Simulate a crash after two candidates (plus a torn final line)
+    with open(state) as f:
+        lines = f.readlines()
+    with open(state, 'w') as f:
+        f.writelines(lines[:3])
+        f.write('{"index": 2, "par')
+    os.remove(progress)
+    resumed = train.resumable_search('random_forest', estimator, PARAM_DIST, X, y, scorer, cv, 4, 42, state_path=state)
+    assert os.path.getsize(progress) == 2 * 3
+    assert resumed[1] == full[1] and resumed[2] == full[2]
+    assert json.loads(lines[0])['model'] == 'random_forest'
+    with open(state) as f:
+        assert [json.loads(line)['index'] for line in f.readlines()[1:]] == [0, 1, 2, 3]